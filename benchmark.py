@@ -0,0 +1,558 @@
+"""
+Load and latency benchmark for the CareWise API.
+Drives /query, /query-stream and the conversation endpoints with a seeded,
+weighted mix of workloads at a fixed concurrency, and reports throughput plus
+p50/p95/p99 latency per pipeline stage, per source and to the first SSE event.
+Results are written as JSON; a saved baseline can be compared against to catch
+regressions between commits (non-zero exit code).
+
+Caches: the plan, source result and record caches would turn a repeated query
+into a cache hit, so by default a cold pass runs first - every query once per
+workload, one at a time, with the API's caches cleared (POST /cache/clear)
+before each - followed by the concurrent warm run. The two are reported and
+compared separately (--caches cold|warm|both).
+
+Offline: --offline starts stub_server.py and the API with CAREWISE_REPLAY_MODE=stub
+against recorded fixtures (see carewise/README.md), so no upstream or Ollama is
+needed and numbers are comparable between runs. An offline run is compared
+against benchmarks/baseline.json, or saved as that baseline if there is none
+yet. --record produces the fixtures: it starts the API against the live
+upstreams and Ollama in record mode and runs every benchmark query once. The
+conversation workload needs a MongoDB at MONGODB_URL (a local mongod is enough).
+
+Usage:
+    python benchmark.py --record --fixtures carewise/fixtures
+    python benchmark.py --offline --latency-ms 80 --token-delay-ms 15
+    python benchmark.py --concurrency 8 --requests 64 --mix query=0.4,stream=0.5,conversation=0.1
+    python benchmark.py --offline --compare benchmarks/baseline.json --tolerance 0.15
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+import httpx
+
+API_URL = "http://localhost:8000"
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+CAREWISE_DIR = os.path.join(ROOT_DIR, "carewise")
+BASELINE_PATH = os.path.join(ROOT_DIR, "benchmarks", "baseline.json")
+
+# Workloads that go through the cached pipeline (conversations only touch MongoDB)
+CACHED_WORKLOADS = ("query", "stream")
+
+QUERY_MIXES = {
+    "biomedical": [
+        "What are the side effects of metformin?",
+        "Any ongoing CAR-T trials for melanoma?",
+        "Latest research on CRISPR gene therapy",
+        "Recruiting phase 3 trials for breast cancer",
+        "Drug interactions between warfarin and aspirin",
+    ],
+    "general": [
+        "What is diabetes?",
+        "What causes headaches and how to treat them?",
+        "Global statistics on tuberculosis",
+        "How can I prevent heart disease?",
+        "Leading causes of death in the United States",
+    ],
+}
+QUERY_MIXES["mixed"] = QUERY_MIXES["biomedical"] + QUERY_MIXES["general"]
+
+DEFAULT_MIX = {"query": 0.4, "stream": 0.5, "conversation": 0.1}
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a list (q in 0..100)"""
+    ordered = sorted(values)
+    index = max(0, math.ceil(q / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+class Recorder:
+    """Latency samples (ms) per metric name, plus error counts per workload"""
+
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+        self.completed = 0
+
+    def add(self, name, ms):
+        self.samples.setdefault(name, []).append(ms)
+
+    def error(self, workload, reason):
+        self.errors.setdefault(workload, {})
+        self.errors[workload][reason] = self.errors[workload].get(reason, 0) + 1
+
+    def summary(self) -> dict:
+        return {
+            name: {
+                "count": len(values),
+                "p50": round(percentile(values, 50), 1),
+                "p95": round(percentile(values, 95), 1),
+                "p99": round(percentile(values, 99), 1),
+                "mean": round(sum(values) / len(values), 1),
+                "max": round(max(values), 1)
+            }
+            for name, values in sorted(self.samples.items())
+        }
+
+
+def elapsed_ms(since):
+    return (time.perf_counter() - since) * 1000
+
+
+# -- workloads -----------------------------------------------------------------
+
+async def run_query(client, query, rec):
+    """POST /query: end-to-end latency and per-source latencies"""
+    started = time.perf_counter()
+    response = await client.post("/query", json={"query": query})
+    response.raise_for_status()
+    rec.add("query.total", elapsed_ms(started))
+    for source, status in response.json().get("source_status", {}).items():
+        if status.get("latency_ms") is not None:
+            rec.add(f"source.{source}", status["latency_ms"])
+
+
+async def run_stream(client, query, rec):
+    """GET /query-stream: time to first event/token and the stage boundaries the events mark"""
+    started = time.perf_counter()
+    marks = {}
+    async with client.stream("GET", "/query-stream", params={"query": query}) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line.startswith("data: "):
+                continue
+            event = json.loads(line[len("data: "):])
+            status = event.get("status")
+            now = time.perf_counter()
+            if not marks:
+                rec.add("stream.first_event", elapsed_ms(started))
+            marks.setdefault(status, now)
+            if status == "source_complete" and event.get("latency_ms") is not None:
+                rec.add(f"source.{event['source']}", event["latency_ms"])
+            elif status == "error":
+                raise RuntimeError(event.get("message", "stream error"))
+
+    if "complete" not in marks:
+        raise RuntimeError("stream ended without a complete event")
+    rec.add("stream.total", elapsed_ms(started))
+    stages = [
+        ("stage.plan", "analyzing", "plan_complete"),
+        ("stage.fetch_and_rank", "plan_complete", "ranking_complete"),
+        ("stage.first_token", "generating", "answer_token"),
+        ("stage.answer", "generating", "complete"),
+    ]
+    for name, start, end in stages:
+        if start in marks and end in marks:
+            rec.add(name, (marks[end] - marks[start]) * 1000)
+    if "answer_token" in marks:
+        rec.add("stream.first_token", (marks["answer_token"] - started) * 1000)
+
+
+async def run_conversation(client, query, rec):
+    """A chat session: create, post a question and an answer, reload, list, delete"""
+    email = f"bench-{random.randrange(10 ** 6)}@example.com"
+    session_started = time.perf_counter()
+
+    async def step(name, method, url, **kwargs):
+        started = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        response.raise_for_status()
+        rec.add(f"conversation.{name}", elapsed_ms(started))
+        return response.json()
+
+    conv = await step("create", "POST", "/conversations", json={"user_email": email, "title": query[:40]})
+    conv_id = conv["_id"]
+    await step("post_message", "POST", "/messages", json={"conversation_id": conv_id, "role": "user", "content": query})
+    await step("post_message", "POST", "/messages",
+               json={"conversation_id": conv_id, "role": "assistant", "content": "Benchmark answer. " * 40})
+    await step("get_messages", "GET", f"/messages/{conv_id}")
+    await step("list", "GET", f"/conversations/{email}")
+    await step("delete", "DELETE", f"/conversations/{conv_id}/{email}")
+    rec.add("conversation.total", elapsed_ms(session_started))
+
+
+WORKLOADS = {
+    "query": run_query,
+    "stream": run_stream,
+    "conversation": run_conversation,
+}
+
+
+# -- runner --------------------------------------------------------------------
+
+def build_jobs(total, mix, queries, seed):
+    """Deterministic list of (workload, query) pairs following the mix weights"""
+    rng = random.Random(seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    return [(rng.choices(names, weights)[0], rng.choice(queries)) for _ in range(total)]
+
+
+async def run_job(client, workload, query, rec):
+    try:
+        await WORKLOADS[workload](client, query, rec)
+        rec.completed += 1
+    except httpx.HTTPStatusError as e:
+        rec.error(workload, f"http_{e.response.status_code}")
+    except Exception as e:
+        rec.error(workload, type(e).__name__)
+
+
+async def clear_caches(client):
+    response = await client.post("/cache/clear")
+    if response.status_code == 403:
+        raise RuntimeError("the API does not allow clearing its caches (start it with CAREWISE_REPLAY_MODE set)")
+    response.raise_for_status()
+
+
+async def run_cold_pass(client, mix, queries):
+    """Every query once per cached workload in the mix, one at a time, with the API caches cleared before each"""
+    rec = Recorder()
+    workloads = [name for name in mix if name in CACHED_WORKLOADS]
+    started = time.perf_counter()
+    for query in queries:
+        for workload in workloads:
+            await clear_caches(client)
+            await run_job(client, workload, query, rec)
+    return rec, time.perf_counter() - started
+
+
+async def run_warm(client, total, concurrency, mix, queries, seed, warmup):
+    """The mixed workload at full concurrency, after a few unrecorded warm-up requests"""
+    # Warm-up requests (model load, connection setup) are not recorded
+    for workload, query in build_jobs(warmup, mix, queries, seed + 1):
+        await run_job(client, workload, query, Recorder())
+
+    rec = Recorder()
+    queue = asyncio.Queue()
+    for job in build_jobs(total, mix, queries, seed):
+        queue.put_nowait(job)
+
+    async def worker():
+        while not queue.empty():
+            workload, query = queue.get_nowait()
+            await run_job(client, workload, query, rec)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return rec, time.perf_counter() - started
+
+
+async def run_benchmark(api_url, total, concurrency, mix, queries, seed=0, warmup=2, timeout=300, caches="both",
+                        config=None):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    cold = warm = None
+    async with httpx.AsyncClient(base_url=api_url, timeout=timeout, limits=limits) as client:
+        if caches in ("cold", "both"):
+            cold = await run_cold_pass(client, mix, queries)
+        if caches in ("warm", "both"):
+            warm = await run_warm(client, total, concurrency, mix, queries, seed, warmup)
+
+    meta = {
+        "commit": git_commit(),
+        "requests": total,
+        "concurrency": concurrency,
+        "mix": mix,
+        "seed": seed,
+        "caches": caches,
+        "config": config or {}
+    }
+    result = {"meta": meta}
+    if warm is not None:
+        rec, wall = warm
+        meta.update({
+            "wall_s": round(wall, 3),
+            "throughput_rps": round(rec.completed / wall, 3) if wall else 0.0,
+            "completed": rec.completed,
+            "errors": rec.errors
+        })
+        result["metrics"] = rec.summary()
+    if cold is not None:
+        rec, wall = cold
+        meta["cold"] = {"wall_s": round(wall, 3), "completed": rec.completed, "errors": rec.errors}
+        result["cold_metrics"] = rec.summary()
+    return result
+
+
+def run_errors(result) -> dict:
+    """Errors of the warm run and the cold pass together"""
+    errors = dict(result["meta"].get("errors", {}))
+    for workload, reasons in result["meta"].get("cold", {}).get("errors", {}).items():
+        errors[f"cold.{workload}"] = reasons
+    return errors
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+# -- offline stack -------------------------------------------------------------
+
+def wait_for(url, process, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Process for {url} exited with code {process.returncode}")
+        try:
+            httpx.get(url, timeout=2)
+            return
+        except httpx.TransportError:
+            time.sleep(0.25)
+    raise RuntimeError(f"Timed out waiting for {url}")
+
+
+def fixture_count(directory) -> int:
+    return len(glob.glob(os.path.join(directory, "*", "*.json")))
+
+
+def start_api(args, env):
+    """Start the API with extra environment; returns (api_url, process)"""
+    api = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend_api:app", "--port", str(args.api_port), "--log-level", "warning"],
+        cwd=CAREWISE_DIR, env=dict(os.environ, **env)
+    )
+    api_url = f"http://127.0.0.1:{args.api_port}"
+    try:
+        wait_for(f"{api_url}/health", api)
+    except Exception:
+        stop_processes([api])
+        raise
+    return api_url, api
+
+
+def start_offline_stack(args):
+    """Start stub_server.py and the API wired to it; returns (api_url, processes)"""
+    fixtures = os.path.abspath(args.fixtures)
+    stub_url = f"http://127.0.0.1:{args.stub_port}"
+    stub = subprocess.Popen(
+        [sys.executable, "stub_server.py", "--fixtures", fixtures, "--port", str(args.stub_port),
+         "--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms),
+         "--error-rate", str(args.error_rate), "--token-delay-ms", str(args.token_delay_ms),
+         "--seed", str(args.seed)],
+        cwd=CAREWISE_DIR
+    )
+    processes = [stub]
+    try:
+        wait_for(f"{stub_url}/__stub__/stats", stub)
+        api_url, api = start_api(args, {"CAREWISE_REPLAY_MODE": "stub", "CAREWISE_STUB_URL": stub_url,
+                                        "CAREWISE_FIXTURES_DIR": fixtures})
+    except Exception:
+        stop_processes(processes)
+        raise
+    return api_url, processes + [api]
+
+
+async def record_fixtures(api_url, mix, queries):
+    """Run every benchmark query cold once against an API in record mode"""
+    async with httpx.AsyncClient(base_url=api_url, timeout=300) as client:
+        rec, _ = await run_cold_pass(client, mix, queries)
+    return rec
+
+
+def stop_processes(processes):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+# -- reporting -----------------------------------------------------------------
+
+def print_metrics(title, metrics):
+    print()
+    print(title)
+    print(f"{'metric':32} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, m in metrics.items():
+        print(f"{name:32} {m['count']:>6} {m['p50']:>9.1f} {m['p95']:>9.1f} {m['p99']:>9.1f} {m['max']:>9.1f}")
+
+
+def report(result):
+    meta = result["meta"]
+    print(f"Commit:      {meta['commit']}")
+    if "cold" in meta:
+        cold = meta["cold"]
+        print(f"Cold pass:   {cold['completed']} requests, caches cleared before each, {cold['wall_s']:.2f}s")
+    if "metrics" in result:
+        print(f"Warm run:    {meta['completed']}/{meta['requests']} completed at concurrency {meta['concurrency']}")
+        print(f"Wall time:   {meta['wall_s']:.2f}s")
+        print(f"Throughput:  {meta['throughput_rps']:.2f} req/s")
+    errors = run_errors(result)
+    if errors:
+        print(f"Errors:      {json.dumps(errors)}")
+    if "cold_metrics" in result:
+        print_metrics("Cold (caches cleared)", result["cold_metrics"])
+    if "metrics" in result:
+        print_metrics("Warm", result["metrics"])
+
+
+def compare(result, baseline, tolerance, min_delta_ms=5.0):
+    """
+    Regressions against a baseline, for the cold and the warm metrics: p95
+    slower by more than `tolerance` (and by more than min_delta_ms, to ignore
+    noise on very fast metrics), or warm throughput lower by more than `tolerance`.
+    """
+    regressions = []
+    base_rps = baseline["meta"].get("throughput_rps")
+    rps = result["meta"].get("throughput_rps")
+    if base_rps and rps is not None and rps < base_rps * (1 - tolerance):
+        regressions.append(f"throughput {rps:.2f} req/s vs baseline {base_rps:.2f} req/s")
+    for section, label in (("cold_metrics", "cold "), ("metrics", "")):
+        for name, base in baseline.get(section, {}).items():
+            current = result.get(section, {}).get(name)
+            if current is None:
+                continue
+            limit = base["p95"] * (1 + tolerance)
+            if current["p95"] > limit and current["p95"] - base["p95"] > min_delta_ms:
+                regressions.append(f"{label}{name} p95 {current['p95']:.1f}ms vs baseline {base['p95']:.1f}ms")
+    return regressions
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in WORKLOADS:
+            raise argparse.ArgumentTypeError(f"Unknown workload '{name}' (choose from {', '.join(WORKLOADS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def save_result(path, result):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"\n💾 Saved {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CareWise API load and latency benchmark")
+    parser.add_argument("--api-url", default=API_URL)
+    parser.add_argument("--requests", type=int, default=48)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help="e.g. query=0.4,stream=0.5,conversation=0.1")
+    parser.add_argument("--queries", choices=sorted(QUERY_MIXES), default="mixed")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--caches", choices=("cold", "warm", "both"), default="both",
+                        help="Run the cold pass (caches cleared before each request), the warm run, or both")
+    parser.add_argument("--output", help="Write the JSON result here")
+    parser.add_argument("--save-baseline", metavar="PATH", help="Store the result as the baseline to compare against")
+    parser.add_argument("--compare", metavar="PATH", help="Fail (exit 1) on regressions against this baseline")
+    parser.add_argument("--no-baseline", action="store_true",
+                        help=f"With --offline, neither compare against nor create {os.path.relpath(BASELINE_PATH)}")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    offline = parser.add_argument_group("offline stack")
+    offline.add_argument("--offline", action="store_true", help="Start the stub server and API on recorded fixtures")
+    offline.add_argument("--record", action="store_true",
+                         help="Start the API in record mode (live upstreams and Ollama) and record every benchmark query")
+    offline.add_argument("--fixtures", default=os.path.join(CAREWISE_DIR, "fixtures"))
+    offline.add_argument("--api-port", type=int, default=8100)
+    offline.add_argument("--stub-port", type=int, default=8765)
+    offline.add_argument("--latency-ms", type=float, default=0)
+    offline.add_argument("--jitter-ms", type=float, default=0)
+    offline.add_argument("--error-rate", type=float, default=0.0)
+    offline.add_argument("--token-delay-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    print("="*60)
+    print("🏥 CAREWISE API BENCHMARK")
+    print("="*60)
+    print()
+
+    queries = QUERY_MIXES[args.queries]
+    fixtures = os.path.abspath(args.fixtures)
+
+    if args.record:
+        api_url, api = start_api(args, {"CAREWISE_REPLAY_MODE": "record", "CAREWISE_FIXTURES_DIR": fixtures})
+        try:
+            rec = asyncio.run(record_fixtures(api_url, args.mix, queries))
+        finally:
+            stop_processes([api])
+        print(f"🎙️ Recorded {rec.completed} runs; {fixture_count(fixtures)} fixtures in {fixtures}")
+        if rec.errors:
+            print(f"❌ Errors while recording: {json.dumps(rec.errors)}")
+            sys.exit(1)
+        sys.exit(0)
+
+    save_path, compare_path = args.save_baseline, args.compare
+    if args.offline:
+        if not fixture_count(fixtures):
+            print(f"❌ No recorded fixtures in {fixtures}.")
+            print("   Record them first (needs the live upstreams and Ollama):")
+            print(f"   python benchmark.py --record --fixtures {args.fixtures}")
+            sys.exit(2)
+        if not (save_path or compare_path or args.no_baseline):
+            if os.path.exists(BASELINE_PATH):
+                compare_path = BASELINE_PATH
+            else:
+                save_path = BASELINE_PATH
+
+    # Everything that changes the numbers; a baseline is only compared against the same settings
+    config = {
+        "offline": args.offline,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "mix": args.mix,
+        "seed": args.seed,
+        "queries": args.queries,
+        "latency_ms": args.latency_ms,
+        "jitter_ms": args.jitter_ms,
+        "error_rate": args.error_rate,
+        "token_delay_ms": args.token_delay_ms
+    }
+
+    processes = []
+    api_url = args.api_url
+    try:
+        if args.offline:
+            api_url, processes = start_offline_stack(args)
+        result = asyncio.run(run_benchmark(
+            api_url, args.requests, args.concurrency, args.mix, queries, args.seed, args.warmup,
+            caches=args.caches, config=config
+        ))
+    except httpx.ConnectError:
+        print(f"❌ ERROR: Could not connect to backend API at {api_url}")
+        sys.exit(2)
+    finally:
+        stop_processes(processes)
+
+    report(result)
+    if args.output:
+        save_result(args.output, result)
+    if save_path:
+        if run_errors(result):
+            print(f"\n❌ Not saving {save_path}: a baseline must come from a run without errors")
+            sys.exit(1)
+        save_result(save_path, result)
+
+    if compare_path:
+        with open(compare_path) as f:
+            baseline = json.load(f)
+        print()
+        if baseline["meta"].get("config") != config or baseline["meta"].get("caches") != args.caches:
+            print(f"❌ {compare_path} was taken with different settings: {json.dumps(baseline['meta'].get('config'))} "
+                  f"caches={baseline['meta'].get('caches')}")
+            sys.exit(2)
+        regressions = compare(result, baseline, args.tolerance)
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s) vs {compare_path} (baseline {baseline['meta']['commit']}):")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print(f"✅ No regressions vs {compare_path} (tolerance {args.tolerance:.0%})")
@@ -5,14 +5,17 @@ Combines biomedical research and general health information
 
 __version__ = "2.0.0"
 
-from intelligence.planner import build_execution_plan
-from data.router import execute_data_layer
+from intelligence.planner import build_execution_plan, build_execution_plan_async
+from data.router import execute_data_layer, execute_data_layer_async
 from data.ranker import rank_evidence
-from answer_engine.answer_generator import generate_grounded_answer
+from answer_engine.answer_generator import generate_grounded_answer, generate_grounded_answer_async
 
 __all__ = [
     "build_execution_plan",
+    "build_execution_plan_async",
     "execute_data_layer",
+    "execute_data_layer_async",
     "rank_evidence",
-    "generate_grounded_answer"
+    "generate_grounded_answer",
+    "generate_grounded_answer_async"
 ]
@@ -1,4 +1,12 @@
 """Answer Engine module"""
-from .answer_generator import generate_grounded_answer
+from .answer_generator import (
+    generate_grounded_answer, generate_grounded_answer_async,
+    stream_grounded_answer_async, build_answer_result
+)
 
-__all__ = ["generate_grounded_answer"]
+__all__ = [
+    "generate_grounded_answer",
+    "generate_grounded_answer_async",
+    "stream_grounded_answer_async",
+    "build_answer_result"
+]
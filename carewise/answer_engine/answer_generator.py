@@ -1,6 +1,9 @@
 """Unified Answer Generator - Creates grounded answers using LLM and evidence from all sources"""
 
-from intelligence.llm_client import call_llm
+from intelligence.llm_client import call_llm_async, stream_llm_async
+from intelligence.scheduler import LLMQueueFullError
+from data.clients.http import run_sync
+from telemetry import timed
 
 
 def build_grounding_prompt(query, ranked_evidence, top_k=5):
@@ -37,7 +40,49 @@ ANSWER (cite sources with [PubMed], [ClinicalTrials], [FDA], [MedlinePlus], [CDC
     return prompt
 
 
-def generate_grounded_answer(query, ranked_evidence):
+def build_answer_result(answer, ranked_evidence):
+    """Package the LLM answer with the evidence it was grounded in"""
+    # Extract sources used
+    source_names = ["PubMed", "ClinicalTrials", "FDA", "MedlinePlus", "CDC", "WHO"]
+    sources_used = []
+    
+    for item in ranked_evidence[:5]:
+        if item['source'] in answer or any(src in answer for src in source_names):
+            sources_used.append({
+                'source': item['source'],
+                'title': item['title'],
+                'id': item['id']
+            })
+    
+    # Remove duplicates
+    seen = set()
+    unique_sources = []
+    for src in sources_used:
+        key = (src['source'], src['id'])
+        if key not in seen:
+            seen.add(key)
+            unique_sources.append(src)
+    
+    return {
+        'answer': answer.strip(),
+        'evidence_count': len(ranked_evidence[:5]),
+        'sources_used': unique_sources,
+        'top_evidence': ranked_evidence[:5]
+    }
+
+
+def build_error_result(error):
+    """Answer payload used when generation fails"""
+    return {
+        'answer': f"Error generating answer: {str(error)}",
+        'evidence_count': 0,
+        'sources_used': [],
+        'top_evidence': []
+    }
+
+
+@timed("answer")
+async def generate_grounded_answer_async(query, ranked_evidence):
     """
     Generate an answer grounded in the provided evidence from any source.
     Works for both biomedical research and general health queries.
@@ -47,40 +92,25 @@ def generate_grounded_answer(query, ranked_evidence):
     
     # Call LLM
     try:
-        answer = call_llm(prompt)
-        
-        # Extract sources used
-        source_names = ["PubMed", "ClinicalTrials", "FDA", "MedlinePlus", "CDC", "WHO"]
-        sources_used = []
-        
-        for item in ranked_evidence[:5]:
-            if item['source'] in answer or any(src in answer for src in source_names):
-                sources_used.append({
-                    'source': item['source'],
-                    'title': item['title'],
-                    'id': item['id']
-                })
-        
-        # Remove duplicates
-        seen = set()
-        unique_sources = []
-        for src in sources_used:
-            key = (src['source'], src['id'])
-            if key not in seen:
-                seen.add(key)
-                unique_sources.append(src)
-        
-        return {
-            'answer': answer.strip(),
-            'evidence_count': len(ranked_evidence[:5]),
-            'sources_used': unique_sources,
-            'top_evidence': ranked_evidence[:5]
-        }
-        
+        answer = await call_llm_async(prompt)
+        return build_answer_result(answer, ranked_evidence)
+    except LLMQueueFullError:
+        raise
     except Exception as e:
-        return {
-            'answer': f"Error generating answer: {str(e)}",
-            'evidence_count': 0,
-            'sources_used': [],
-            'top_evidence': []
-        }
+        return build_error_result(e)
+
+
+@timed("answer")
+async def stream_grounded_answer_async(query, ranked_evidence):
+    """
+    Stream a grounded answer token by token.
+    Callers join the tokens and pass them to build_answer_result once the stream ends.
+    """
+    prompt = build_grounding_prompt(query, ranked_evidence, top_k=5)
+    async for token in stream_llm_async(prompt):
+        yield token
+
+
+def generate_grounded_answer(query, ranked_evidence):
+    """Generate an answer grounded in the provided evidence (sync wrapper for the CLI)."""
+    return run_sync(generate_grounded_answer_async(query, ranked_evidence))
@@ -5,16 +5,33 @@ FastAPI server for both biomedical research and general health queries
 
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from pydantic import BaseModel, EmailStr
 from typing import Optional, List
 import json
 import asyncio
 from contextlib import asynccontextmanager
-from intelligence.planner import build_execution_plan
-from data.router import execute_data_layer
+from intelligence.planner import build_execution_plan_async, planner_stats
+from intelligence.plan_cache import plan_cache
+from intelligence.llm_client import llm_client
+from intelligence.scheduler import llm_scheduler, LLMQueueFullError
+from config.settings import LLM_WARMUP_ON_STARTUP, REPLAY_MODE
+from data.router import fetch_sources_async, source_resilience_stats, clear_result_cache
+from data.normalizer import normalize_results
 from data.ranker import rank_evidence
-from answer_engine.answer_generator import generate_grounded_answer
+from data.clients.http import open_http_sessions, close_async_client, session_stats
+from data.clients.rate_limit import rate_limiter
+from data.clients.http_cache import http_cache
+from data.clients.replay import replay_stats
+from data.clients.registry import SOURCE_REGISTRY, BIOMEDICAL, GENERAL_HEALTH
+from data.who_store import who_store
+from data.cdc_store import cdc_store
+from data.record_cache import pubmed_cache, fda_label_cache, medlineplus_cache
+from answer_engine.answer_generator import (
+    generate_grounded_answer_async, stream_grounded_answer_async,
+    build_answer_result, build_error_result
+)
+from telemetry import metrics, trace_buffer, current_trace_id, TraceMiddleware, TRACE_HEADER
 from database.mongodb import (
     create_user, authenticate_user, get_user_by_email,
     create_conversation, get_user_conversations, update_conversation_title, delete_conversation,
@@ -24,8 +41,19 @@ from database.mongodb import (
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    await open_http_sessions()
+    if LLM_WARMUP_ON_STARTUP:
+        await llm_client.warm_up()
+    background = [asyncio.create_task(llm_client.run_health_prober())]
+    if who_store.enabled:
+        background.append(asyncio.create_task(who_store.run_refresher()))
+    if cdc_store.enabled:
+        background.append(asyncio.create_task(cdc_store.run_refresher()))
     yield
     # Shutdown
+    for task in background:
+        task.cancel()
+    await close_async_client()
     await close_database()
 
 app = FastAPI(
@@ -42,8 +70,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[TRACE_HEADER],
 )
 
+# Outermost, so the trace covers the whole request and every response carries its ID
+app.add_middleware(TraceMiddleware)
+
 # Request/Response Models
 class SignupRequest(BaseModel):
     name: str
@@ -84,6 +116,31 @@ class QueryResponse(BaseModel):
     evidence: list
     answer: dict
     top_sources: list
+    source_status: dict = {}
+
+
+def build_top_sources(ranked_evidence, limit=5):
+    """Extract the top-ranked evidence for the frontend"""
+    top_sources = []
+    for item in ranked_evidence[:limit]:
+        top_sources.append({
+            "source": item["source"],
+            "title": item["title"],
+            "content": item["content"],  # Full content, not truncated
+            "score": item["score"],
+            "metadata": item.get("metadata", {})
+        })
+    return top_sources
+
+
+def queue_full_error(e: LLMQueueFullError) -> HTTPException:
+    """503 telling the client when to retry while the LLM queue is saturated"""
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+
+def sse_event(payload: dict) -> str:
+    """Format a payload as a Server-Sent Event"""
+    return f"data: {json.dumps(payload)}\n\n"
 
 
 @app.get("/")
@@ -104,6 +161,9 @@ async def root():
         "endpoints": {
             "/query": "Submit a health query",
             "/health": "Health check",
+            "/stats": "Runtime statistics",
+            "/metrics": "Prometheus metrics",
+            "/traces/{trace_id}": "Timing spans of a recent request",
             "/sources": "List available sources"
         }
     }
@@ -115,44 +175,104 @@ async def health_check():
     return {"status": "healthy", "service": "carewise-unified"}
 
 
+@app.get("/stats")
+async def get_stats():
+    """Runtime statistics for caches and pipeline components"""
+    return {
+        "plan_cache": plan_cache.stats(),
+        "planner": dict(planner_stats),
+        "llm": llm_client.stats(),
+        "llm_scheduler": llm_scheduler.stats(),
+        "who_store": who_store.stats(),
+        "cdc_store": cdc_store.stats(),
+        "pubmed_cache": pubmed_cache.stats(),
+        "fda_label_cache": fda_label_cache.stats(),
+        "medlineplus_cache": medlineplus_cache.stats(),
+        "rate_limits": rate_limiter.stats(),
+        "http_cache": http_cache.stats(),
+        "http_sessions": session_stats(),
+        "replay": replay_stats(),
+        "sources": source_resilience_stats()
+    }
+
+
+def collect_component_metrics():
+    """Counters the caches, planner, LLM client and breakers already keep, as Prometheus samples"""
+    caches = {
+        "plan": plan_cache,
+        "pubmed": pubmed_cache,
+        "fda_label": fda_label_cache,
+        "medlineplus": medlineplus_cache
+    }
+    cache_lookups = []
+    for name, cache in caches.items():
+        cache_lookups.append(({"cache": name, "result": "hit"}, cache.hits))
+        cache_lookups.append(({"cache": name, "result": "miss"}, cache.misses))
+    http_lookups = [
+        ({"host": host, "result": result}, count)
+        for host, counters in http_cache.counters.items()
+        for result, count in counters.items() if result != "stored"
+    ]
+    scheduler = llm_scheduler.stats()
+    return [
+        ("carewise_cache_lookups_total", "counter", "Cache lookups by outcome", cache_lookups),
+        ("carewise_http_cache_lookups_total", "counter", "Disk HTTP response cache lookups by outcome", http_lookups),
+        ("carewise_plans_total", "counter", "Execution plans by planner",
+         [({"planner": planner}, planner_stats[f"{planner}_plans"]) for planner in ("cache", "rule", "llm")]),
+        ("carewise_planner_llm_calls_total", "counter", "LLM calls made by the planner (including retries)",
+         [({}, planner_stats["llm_calls"])]),
+        ("carewise_llm_calls_total", "counter", "LLM calls", [({}, llm_client.calls)]),
+        ("carewise_llm_errors_total", "counter", "Failed LLM calls", [({}, llm_client.errors)]),
+        ("carewise_llm_queue_depth", "gauge", "LLM calls waiting for a slot", [({}, scheduler["queue_depth"])]),
+        ("carewise_llm_rejected_total", "counter", "LLM calls rejected because the queue was full",
+         [({}, scheduler["rejected"])]),
+        ("carewise_circuit_open", "gauge", "1 while a source's circuit breaker is not closed",
+         [({"source": source}, int(state["breaker"]["state"] != "closed"))
+          for source, state in source_resilience_stats().items()]),
+    ]
+
+
+metrics.register_collector(collect_component_metrics)
+
+
+@app.post("/cache/clear")
+async def clear_caches():
+    """
+    Empty the plan, source result, record and HTTP response caches, so the
+    next request runs cold. Only available on offline (record/replay/stub) runs,
+    where benchmark.py uses it.
+    """
+    if not REPLAY_MODE:
+        raise HTTPException(status_code=403, detail="Cache clearing is only available when CAREWISE_REPLAY_MODE is set")
+    plan_cache.clear()
+    clear_result_cache()
+    for cache in (pubmed_cache, fda_label_cache, medlineplus_cache):
+        cache.clear()
+    await asyncio.to_thread(http_cache.clear)
+    return {"cleared": ["plan", "source_results", "pubmed", "fda_label", "medlineplus", "http"]}
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Latency histograms and counters in the Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/traces/{trace_id}")
+async def get_trace(trace_id: str):
+    """Spans of a recent request, by the ID returned in its X-Trace-Id header"""
+    trace = trace_buffer.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found (expired or unknown)")
+    return trace.to_dict()
+
+
 @app.get("/sources")
 async def get_sources():
     """List all available data sources"""
     return {
-        "biomedical": [
-            {
-                "name": "PubMed",
-                "description": "Research articles and scientific literature",
-                "use_case": "Latest research, scientific findings"
-            },
-            {
-                "name": "ClinicalTrials",
-                "description": "Clinical trial data",
-                "use_case": "Ongoing trials, trial status, enrollment"
-            },
-            {
-                "name": "FDA",
-                "description": "Drug safety information",
-                "use_case": "Side effects, warnings, drug labels"
-            }
-        ],
-        "general_health": [
-            {
-                "name": "MedlinePlus",
-                "description": "Consumer health information",
-                "use_case": "Health topics, symptoms, conditions"
-            },
-            {
-                "name": "CDC",
-                "description": "Public health data",
-                "use_case": "Disease prevention, health statistics"
-            },
-            {
-                "name": "WHO",
-                "description": "Global health statistics",
-                "use_case": "Global health data, indicators"
-            }
-        ]
+        category: [spec.describe() for spec in SOURCE_REGISTRY.values() if spec.category == category]
+        for category in (BIOMEDICAL, GENERAL_HEALTH)
     }
 
 
@@ -166,39 +286,39 @@ async def process_query(request: QueryRequest):
     - General health queries (symptoms, prevention, information)
     """
     try:
+        # Reject up front rather than after fetching evidence
+        llm_scheduler.check_admission()
+        
         # Step 1: Build execution plan
-        plan = build_execution_plan(request.query)
+        plan = await build_execution_plan_async(request.query)
         
-        # Step 2: Execute data layer
-        evidence = execute_data_layer(plan)
+        # Step 2: Execute data layer (all sources concurrently)
+        raw_results, source_status = await fetch_sources_async(plan)
+        evidence = normalize_results(raw_results)
         
         # Step 3: Rank evidence
         ranked_evidence = rank_evidence(evidence, plan)
         
         # Step 4: Generate answer
-        answer = generate_grounded_answer(request.query, ranked_evidence)
+        answer = await generate_grounded_answer_async(request.query, ranked_evidence)
         
         # Extract top sources for frontend
-        top_sources = []
-        for item in ranked_evidence[:5]:
-            top_sources.append({
-                "source": item["source"],
-                "title": item["title"],
-                "content": item["content"],  # Full content, not truncated
-                "score": item["score"],
-                "metadata": item.get("metadata", {})
-            })
+        top_sources = build_top_sources(ranked_evidence)
         
         return QueryResponse(
             query=request.query,
             execution_plan=plan,
             evidence=ranked_evidence[:10],
             answer=answer,
-            top_sources=top_sources
+            top_sources=top_sources,
+            source_status=source_status
         )
         
+    except LLMQueueFullError as e:
+        raise queue_full_error(e)
     except Exception as e:
         import traceback
+        print(f"❌ /query failed (trace {current_trace_id()})")
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -208,41 +328,74 @@ async def process_query_stream(query: str):
     """
     Process a query with real-time status updates via Server-Sent Events
     """
+    try:
+        llm_scheduler.check_admission()
+    except LLMQueueFullError as e:
+        raise queue_full_error(e)
+    
     async def event_generator():
         try:
             # Step 1: Analyzing intent
-            yield f"data: {json.dumps({'status': 'analyzing', 'message': 'Analyzing your question'})}\n\n"
-            await asyncio.sleep(0.5)  # Give UI time to show this status
+            yield sse_event({'status': 'analyzing', 'message': 'Analyzing your question'})
             
-            plan = build_execution_plan(query)
+            plan = await build_execution_plan_async(query)
             
-            # Step 2: Selecting sources
-            yield f"data: {json.dumps({'status': 'selecting_sources', 'message': 'Selecting data sources'})}\n\n"
-            await asyncio.sleep(0.5)  # Give UI time to show this status
+            # Step 2: Plan ready - sent as soon as the planner returns
+            yield sse_event({'status': 'plan_complete', 'message': 'Selecting data sources', 'plan': plan})
             
-            # Step 3: Searching databases
-            yield f"data: {json.dumps({'status': 'searching', 'message': 'Searching databases'})}\n\n"
-            await asyncio.sleep(0.3)  # Brief pause before actual search
+            # Step 3: Searching databases - one event per source as it finishes
+            yield sse_event({'status': 'searching', 'message': 'Searching databases', 'sources': plan['sources']})
             
-            evidence = execute_data_layer(plan)
-            ranked_evidence = rank_evidence(evidence, plan)
+            finished = asyncio.Queue()
+            fetch = asyncio.create_task(
+                fetch_sources_async(plan, on_source_done=lambda source, status: finished.put_nowait((source, status)))
+            )
+            getter = None
+            try:
+                while not (fetch.done() and finished.empty()):
+                    getter = asyncio.create_task(finished.get())
+                    await asyncio.wait({getter, fetch}, return_when=asyncio.FIRST_COMPLETED)
+                    if not getter.done():
+                        getter.cancel()
+                        continue
+                    source, status = getter.result()
+                    yield sse_event({
+                        'status': 'source_complete',
+                        'source': source,
+                        'result': status['status'],
+                        'count': status['count'],
+                        'latency_ms': status['latency_ms']
+                    })
+                raw_results, source_status = fetch.result()
+            finally:
+                # Client disconnected (or something failed): stop the source fetches too
+                for task in (fetch, getter):
+                    if task is not None and not task.done():
+                        task.cancel()
             
-            # Step 4: Generating answer
-            yield f"data: {json.dumps({'status': 'generating', 'message': 'Generating answer'})}\n\n"
-            await asyncio.sleep(0.3)  # Brief pause before generation
+            evidence = normalize_results(raw_results)
+            ranked_evidence = rank_evidence(evidence, plan)
+            top_sources = build_top_sources(ranked_evidence)
+            yield sse_event({
+                'status': 'ranking_complete',
+                'message': 'Ranked evidence',
+                'evidence_count': len(ranked_evidence),
+                'top_sources': top_sources
+            })
             
-            answer = generate_grounded_answer(query, ranked_evidence)
+            # Step 4: Generating answer - streamed token by token
+            yield sse_event({'status': 'generating', 'message': 'Generating answer'})
             
-            # Extract top sources
-            top_sources = []
-            for item in ranked_evidence[:5]:
-                top_sources.append({
-                    "source": item["source"],
-                    "title": item["title"],
-                    "content": item["content"],
-                    "score": item["score"],
-                    "metadata": item.get("metadata", {})
-                })
+            tokens = []
+            try:
+                async for token in stream_grounded_answer_async(query, ranked_evidence):
+                    tokens.append(token)
+                    yield sse_event({'status': 'answer_token', 'token': token})
+                answer = build_answer_result("".join(tokens), ranked_evidence)
+            except LLMQueueFullError:
+                raise
+            except Exception as e:
+                answer = build_error_result(e)
             
             # Final result
             result = {
@@ -252,15 +405,19 @@ async def process_query_stream(query: str):
                     'plan': plan,
                     'evidence': ranked_evidence[:10],
                     'answer': answer,
-                    'top_sources': top_sources
+                    'top_sources': top_sources,
+                    'source_status': source_status
                 }
             }
-            yield f"data: {json.dumps(result)}\n\n"
+            yield sse_event(result)
             
+        except LLMQueueFullError as e:
+            yield sse_event({'status': 'error', 'message': str(e), 'retry_after': e.retry_after})
         except Exception as e:
             import traceback
+            print(f"❌ /query-stream failed (trace {current_trace_id()})")
             traceback.print_exc()
-            yield f"data: {json.dumps({'status': 'error', 'message': str(e)})}\n\n"
+            yield sse_event({'status': 'error', 'message': str(e)})
     
     return StreamingResponse(event_generator(), media_type="text/event-stream")
 
@@ -269,8 +426,10 @@ async def process_query_stream(query: str):
 async def create_plan(request: QueryRequest):
     """Create an execution plan without fetching data"""
     try:
-        plan = build_execution_plan(request.query)
+        plan = await build_execution_plan_async(request.query)
         return {"query": request.query, "plan": plan}
+    except LLMQueueFullError as e:
+        raise queue_full_error(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1,5 +1,7 @@
 """Configuration settings for unified CareWise system"""
 
+import os
+
 # API Keys
 PUBMED_API_KEY = "4466672a0ded684cca401ab6a157aaffa709"
 FDA_API_KEY = "KKYHGGWJwfnpsfkij7vS0CgXn6WaRaQ1gKbgPXvH"
@@ -15,7 +17,138 @@ MEDLINEPLUS_URL = "https://wsearch.nlm.nih.gov/ws/query"
 CDC_URL = "https://data.cdc.gov/resource/bi63-dtpu.json"
 WHO_URL = "https://ghoapi.azureedge.net/api/"
 
+# PubMed Fetching
+PUBMED_RESULT_LIMIT = 10             # Articles returned per query
+PUBMED_EFETCH_BATCH_SIZE = 200       # PMIDs per efetch request (larger result sets are paged from the history server)
+PUBMED_CACHE_SIZE = 5000             # Articles held in memory (LRU)
+PUBMED_CACHE_TTL = 30 * 24 * 60 * 60 # Seconds before a cached article is fetched again
+PUBMED_CACHE_PATH = None             # SQLite file to persist articles across restarts (None = memory only)
+
+# FDA Drug Labels
+FDA_LABELS_PER_DRUG = 3              # Labels kept per drug (brand and generic matches combined)
+FDA_CACHE_SIZE = 2000                # Drugs whose extracted label sections are held in memory (LRU)
+FDA_CACHE_TTL = 7 * 24 * 60 * 60     # Seconds before a drug's labels are fetched again
+FDA_CACHE_PATH = None                # SQLite file to persist label sections across restarts (None = memory only)
+
+# ClinicalTrials.gov
+CLINICAL_TRIALS_LIMIT = 10           # Trials returned for an unfiltered query
+CLINICAL_TRIALS_FILTERED_LIMIT = 25  # Trials returned when the plan filters by status/phase (one page)
+CLINICAL_TRIALS_PAGE_SIZE = 100      # Studies per page (pageToken pagination)
+
+# MedlinePlus
+MEDLINEPLUS_CACHE_SIZE = 2000        # Search responses held in memory (LRU)
+MEDLINEPLUS_CACHE_TTL = 24 * 60 * 60 # Seconds before a health-topic search is repeated
+MEDLINEPLUS_CACHE_PATH = None        # SQLite file to persist responses across restarts (None = memory only)
+
+# CDC Socrata Search
+CDC_SEARCH_FIELDS = ["cause_name", "_113_cause_name", "state"]   # Text columns matched by the $where search
+CDC_TITLE_FIELDS = ["cause_name", "state", "year"]               # Columns composing a record title
+CDC_PAGE_SIZE = 1000                 # Rows per Socrata page ($limit/$offset)
+
+# CDC Local Dataset Snapshot
+CDC_STORE_PATH = None                # gzip JSON snapshot of the CDC dataset with an inverted index (None = disabled)
+CDC_STORE_REFRESH_INTERVAL = 24 * 60 * 60   # Seconds before the snapshot is refreshed in the background
+
+# WHO Local Indicator Store
+WHO_STORE_DIR = None                 # Directory for per-indicator columnar snapshots (None = disabled)
+WHO_STORE_REFRESH_INTERVAL = 24 * 60 * 60   # Seconds before a snapshot is refreshed in the background
+
 # LLM Configuration
 OLLAMA_URL = "http://localhost:11434/api/generate"
+OLLAMA_URLS = [OLLAMA_URL]           # All Ollama endpoints to balance across
+LLM_ENDPOINT_FAILURE_THRESHOLD = 3   # Consecutive failures before an endpoint is ejected
+LLM_ENDPOINT_PROBE_INTERVAL = 15     # Seconds between health probes of ejected endpoints
+LLM_STICKY_PREFIX_CHARS = 512        # Prompt prefix length used for KV-cache-friendly sticky routing
 LLM_MODEL = "llama3.1:8b"
 LLM_TIMEOUT = 60
+LLM_JSON_MODE = True                 # Ask Ollama for JSON-constrained output when planning
+LLM_KEEP_ALIVE = -1                  # How long Ollama keeps the model loaded (-1 = indefinitely)
+LLM_MAX_CONNECTIONS = 16             # Connection pool size towards Ollama
+LLM_WARMUP_ON_STARTUP = True         # Load the model into memory when the API starts
+LLM_MAX_CONCURRENCY = 2              # LLM calls allowed to run at once per Ollama endpoint
+LLM_MAX_QUEUE_DEPTH = 32             # Waiting calls beyond this are rejected with 503 + Retry-After
+
+# Upstream HTTP Sessions (one pooled keep-alive client per host)
+HTTP_POOL_LIMITS = {                 # host -> (max connections, max idle keep-alive connections)
+    "eutils.ncbi.nlm.nih.gov": (10, 10),
+    "api.fda.gov": (10, 5),
+    "clinicaltrials.gov": (10, 5),
+    "wsearch.nlm.nih.gov": (5, 5),
+    "data.cdc.gov": (5, 5),
+    "ghoapi.azureedge.net": (10, 5),
+}
+HTTP_POOL_DEFAULT = (10, 5)          # Limits for hosts not listed above
+HTTP_KEEPALIVE_EXPIRY = 60           # Seconds an idle connection is kept open
+HTTP_RETRIES = 2                     # Extra attempts for GETs failing with a transport error or a retryable status
+HTTP_RETRY_STATUSES = [502, 503, 504]
+HTTP_RETRY_BACKOFF = 0.25            # Base delay (seconds); attempt n waits a random 0..base*2^n
+
+# Disk HTTP Response Cache (shared by all source clients)
+HTTP_CACHE_DIR = None                # Directory for compressed response bodies + index (None = disabled)
+HTTP_CACHE_MAX_BYTES = 512 * 1024 * 1024   # Byte budget; least recently used responses are evicted beyond it
+HTTP_CACHE_TTLS = {                  # host -> seconds a response is fresh (hosts not listed are not cached)
+    "eutils.ncbi.nlm.nih.gov": 60 * 60,
+    "api.fda.gov": 24 * 60 * 60,
+    "clinicaltrials.gov": 60 * 60,
+    "wsearch.nlm.nih.gov": 24 * 60 * 60,
+    "data.cdc.gov": 6 * 60 * 60,
+    "ghoapi.azureedge.net": 24 * 60 * 60,
+}
+HTTP_CACHE_STALE_SECONDS = 60 * 60   # Past its TTL a response is still served for this long while it refreshes in the background
+HTTP_CACHE_IGNORED_PARAMS = ["api_key"]    # Params that do not change the response and are left out of cache keys
+
+# Upstream Rate Limits (token bucket per host, shared by all workers)
+RATE_LIMITS = {                      # host -> (requests per second, burst size)
+    "eutils.ncbi.nlm.nih.gov": (10, 10),       # NCBI: 10 req/s with an API key
+    "api.fda.gov": (4, 10),                    # openFDA: 240 req/min per key
+    "clinicaltrials.gov": (10, 10),
+    "wsearch.nlm.nih.gov": (1.5, 3),           # MedlinePlus: 85 req/min per IP
+    "data.cdc.gov": (5, 10),
+    "ghoapi.azureedge.net": (5, 10),
+}
+RATE_LIMIT_STATE_PATH = None         # SQLite file holding the shared buckets (None = <tmpdir>/carewise_rate_limits.db)
+RATE_LIMIT_MAX_WAIT = 2.0            # Longest a caller waits for a token before falling back (seconds)
+
+# Data Layer Fan-out
+SOURCE_TIMEOUT = 10          # Default per-source deadline (seconds)
+SOURCE_TIMEOUTS = {          # Per-source overrides
+    "PubMed": 12,
+    "ClinicalTrials": 12,
+}
+DATA_LAYER_BUDGET = 15       # Overall deadline for the whole fan-out (seconds)
+
+# Source Circuit Breakers
+CIRCUIT_WINDOW_SIZE = 10             # Recent calls considered per source
+CIRCUIT_MIN_CALLS = 4                # Calls needed in the window before the breaker can open
+CIRCUIT_FAILURE_RATIO = 0.5          # Share of failed or slow calls that opens the breaker
+CIRCUIT_SLOW_CALL_SECONDS = 8        # Calls slower than this count as failures
+CIRCUIT_OPEN_SECONDS = 30            # Time a breaker fails fast before letting a probe call through
+
+# Hedged Requests
+HEDGED_SOURCES = ["PubMed", "ClinicalTrials"]   # Sources that get a duplicate request after the p95 delay
+HEDGE_PERCENTILE = 0.95
+HEDGE_MIN_SAMPLES = 20               # Latency samples needed before hedging starts
+HEDGE_MIN_DELAY = 0.25               # Never hedge earlier than this (seconds)
+
+# Tracing and Metrics
+TRACE_BUFFER_SIZE = 500              # Recent request traces kept for /traces/{trace_id}
+TRACE_SLOW_REQUEST_SECONDS = 10      # Requests slower than this are printed with their spans
+
+# Execution Plan Cache
+PLAN_CACHE_SIZE = 1024               # Max plans held in memory (LRU)
+PLAN_CACHE_TTL = 24 * 60 * 60        # Seconds before a cached plan expires
+PLAN_CACHE_PATH = None               # SQLite file to persist plans across restarts (None = memory only)
+
+# Rule-based Fast-path Planner
+RULE_PLANNER_ENABLED = True
+RULE_PLANNER_MIN_CONFIDENCE = 0.75   # Below this the LLM planner is used
+
+# Gazetteer Entity Extraction
+GAZETTEER_VOCAB_DIR = None           # Directory of extra <category>.txt term lists (drugs, diseases, symptoms, ...)
+GAZETTEER_INDEX_PATH = None          # JSON automaton index reused across restarts (None = build in memory)
+
+# Record / Replay of Upstream Traffic (offline runs and benchmarks; switchable per process via env)
+REPLAY_MODE = os.environ.get("CAREWISE_REPLAY_MODE")   # "record", "replay", "stub" or None (live upstreams)
+REPLAY_FIXTURES_DIR = os.environ.get("CAREWISE_FIXTURES_DIR", "fixtures")   # One JSON file per recorded exchange
+REPLAY_STUB_URL = os.environ.get("CAREWISE_STUB_URL", "http://127.0.0.1:8765")   # stub_server.py address ("stub" mode)
+REPLAY_IGNORED_FIELDS = ["api_key", "keep_alive"]     # Query params / JSON body fields left out of fixture keys
@@ -1,7 +1,7 @@
 """Data layer - Clients for all sources"""
 from .clients import *
-from .router import execute_data_layer
+from .router import execute_data_layer, execute_data_layer_async, fetch_sources_async
 from .normalizer import normalize_results
 from .ranker import rank_evidence
 
-__all__ = ["execute_data_layer", "normalize_results", "rank_evidence"]
+__all__ = ["execute_data_layer", "execute_data_layer_async", "fetch_sources_async", "normalize_results", "rank_evidence"]
@@ -0,0 +1,160 @@
+"""
+Local CDC dataset store.
+Keeps a gzip JSON snapshot of the whole CDC dataset on disk, refreshed in the
+background, and an in-memory inverted index over its text columns so topic
+lookups run offline in microseconds.
+"""
+
+import asyncio
+import gzip
+import json
+import os
+import re
+import time
+from config.settings import CDC_STORE_PATH, CDC_STORE_REFRESH_INTERVAL, CDC_SEARCH_FIELDS
+from .clients.cdc import fetch_cdc_rows_async
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+class CDCSnapshot:
+    """Rows of the dataset plus an inverted index token -> sorted row ids"""
+
+    def __init__(self, fetched_at, rows, fields=None):
+        self.fetched_at = fetched_at
+        self.rows = rows
+        self.fields = fields if fields is not None else CDC_SEARCH_FIELDS
+        self.index = self._build_index()
+
+    def _build_index(self):
+        postings = {}
+        for row_id, row in enumerate(self.rows):
+            # Without configured columns every string value is indexed
+            values = [row.get(field) for field in self.fields] if self.fields else [
+                value for key, value in row.items() if isinstance(value, str) and not key.startswith(":")
+            ]
+            tokens = set()
+            for value in values:
+                if value:
+                    tokens.update(tokenize(value))
+            for token in tokens:
+                postings.setdefault(token, []).append(row_id)
+        return postings
+
+    def search(self, query, limit=10):
+        """
+        Rows containing every query token; when no row has all of them, rows
+        ranked by how many tokens they contain. Ties keep dataset order.
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return self.rows[:limit]
+        postings = [self.index.get(token, []) for token in tokens]
+
+        # Intersect starting from the rarest token
+        postings.sort(key=len)
+        matches = set(postings[0])
+        for posting in postings[1:]:
+            if not matches:
+                break
+            matches.intersection_update(posting)
+        if matches:
+            return [self.rows[row_id] for row_id in sorted(matches)[:limit]]
+
+        scores = {}
+        for posting in postings:
+            for row_id in posting:
+                scores[row_id] = scores.get(row_id, 0) + 1
+        ranked = sorted(scores, key=lambda row_id: (-scores[row_id], row_id))
+        return [self.rows[row_id] for row_id in ranked[:limit]]
+
+    def __len__(self):
+        return len(self.rows)
+
+
+class CDCDatasetStore:
+    """Snapshot of the CDC dataset on disk with an indexed in-memory copy"""
+
+    def __init__(self, path=CDC_STORE_PATH, refresh_interval=CDC_STORE_REFRESH_INTERVAL):
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self._snapshot = None
+        if path and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def get(self):
+        """Return the snapshot, loading and indexing it from disk on first use (blocking)"""
+        if not self.enabled:
+            return None
+        if self._snapshot is None and os.path.exists(self.path):
+            try:
+                with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                    data = json.load(f)
+                self._snapshot = CDCSnapshot(data["fetched_at"], data["rows"])
+            except Exception as e:
+                print(f"CDC store: unreadable snapshot: {e}")
+        return self._snapshot
+
+    async def get_async(self):
+        """Like get(), with the disk read and indexing in a worker thread"""
+        if self._snapshot is None and self.enabled:
+            return await asyncio.to_thread(self.get)
+        return self._snapshot
+
+    def is_fresh(self) -> bool:
+        snapshot = self.get()
+        return snapshot is not None and time.time() - snapshot.fetched_at < self.refresh_interval
+
+    def search(self, query, limit=10):
+        snapshot = self.get()
+        return snapshot.search(query, limit) if snapshot is not None else []
+
+    def _build_and_write(self, rows):
+        snapshot = CDCSnapshot(time.time(), rows)
+        tmp_path = self.path + ".tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump({"fetched_at": snapshot.fetched_at, "rows": rows}, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+        return snapshot
+
+    async def refresh(self):
+        """Download the whole dataset and replace the snapshot atomically"""
+        rows = await fetch_cdc_rows_async(timeout=60)
+        # Indexing and compressing a whole dataset would stall the event loop
+        self._snapshot = await asyncio.to_thread(self._build_and_write, rows)
+        return self._snapshot
+
+    async def run_refresher(self):
+        """Background loop keeping the snapshot fresh"""
+        while True:
+            await self.get_async()
+            if not self.is_fresh():
+                try:
+                    snapshot = await self.refresh()
+                    print(f"  🏛️ CDC store: refreshed ({len(snapshot)} rows, {len(snapshot.index)} terms)")
+                except Exception as e:
+                    print(f"  ⚠️ CDC store: refresh failed: {str(e)[:100]}")
+            await asyncio.sleep(min(self.refresh_interval, 3600))
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        if snapshot is None:
+            return {"enabled": self.enabled, "loaded": False}
+        return {
+            "enabled": self.enabled,
+            "loaded": True,
+            "rows": len(snapshot),
+            "terms": len(snapshot.index),
+            "age_s": round(time.time() - snapshot.fetched_at)
+        }
+
+
+cdc_store = CDCDatasetStore()
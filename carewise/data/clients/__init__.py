@@ -1,10 +1,11 @@
 """Data source clients - all 6 sources"""
-from .pubmed import query_pubmed
-from .clinical_trials import query_clinical_trials
-from .fda import query_fda_drug
-from .medline import query_medlineplus
-from .cdc import query_cdc
-from .who import query_who
+from .pubmed import query_pubmed, query_pubmed_async
+from .clinical_trials import query_clinical_trials, query_clinical_trials_async
+from .fda import query_fda_drug, query_fda_drug_async
+from .medline import query_medlineplus, query_medlineplus_async
+from .cdc import query_cdc, query_cdc_async
+from .who import query_who, query_who_async, summarize_who_async
+from .http import get_async_client, open_http_sessions, close_async_client, run_sync
 
 __all__ = [
     "query_pubmed",
@@ -12,5 +13,16 @@ __all__ = [
     "query_fda_drug",
     "query_medlineplus",
     "query_cdc",
-    "query_who"
+    "query_who",
+    "query_pubmed_async",
+    "query_clinical_trials_async",
+    "query_fda_drug_async",
+    "query_medlineplus_async",
+    "query_cdc_async",
+    "query_who_async",
+    "summarize_who_async",
+    "get_async_client",
+    "open_http_sessions",
+    "close_async_client",
+    "run_sync"
 ]
@@ -1,34 +1,107 @@
 """CDC API Client"""
 
-import requests
-from config.settings import CDC_URL
+from config.settings import CDC_URL, CDC_SEARCH_FIELDS, CDC_TITLE_FIELDS, CDC_PAGE_SIZE
+from .http import http_get, run_sync
+from .registry import SourceSpec, register_source, GENERAL_HEALTH
 
 
-def query_cdc(topic, limit=10):
-    """Query CDC public health database"""
-    params = {
-        "$limit": limit
-    }
+def soql_literal(text):
+    """Quote a string for use in a SoQL expression"""
+    return "'" + text.replace("'", "''") + "'"
+
+
+def build_cdc_where(topic, fields=None, match_all=True):
+    """
+    Build a SoQL $where clause matching every word of the topic (or, without
+    match_all, any word) against the searchable text columns (case-insensitive).
+    """
+    fields = fields if fields is not None else CDC_SEARCH_FIELDS
+    clauses = []
+    for word in dict.fromkeys(topic.split()):
+        pattern = soql_literal(f"%{word.upper()}%")
+        clauses.append("(" + " OR ".join(f"upper({field}) like {pattern}" for field in fields) + ")")
+    return (" AND " if match_all else " OR ").join(clauses)
+
 
-    try:
-        res = requests.get(CDC_URL, params=params, timeout=10)
+def build_cdc_search_params(topic, match_all=True):
+    """Server-side search: $where over known text columns, or Socrata full-text $q"""
+    if not topic.strip():
+        return {}
+    if CDC_SEARCH_FIELDS:
+        return {"$where": build_cdc_where(topic, match_all=match_all)}
+    return {"$q": topic}
+
+
+async def fetch_cdc_rows_async(params=None, limit=None, page_size=CDC_PAGE_SIZE, timeout=10):
+    """
+    Fetch rows from the Socrata endpoint page by page ($limit/$offset) until
+    `limit` rows were collected or the dataset is exhausted.
+    """
+    rows = []
+    offset = 0
+    while limit is None or len(rows) < limit:
+        size = page_size if limit is None else min(page_size, limit - len(rows))
+        page_params = dict(params or {})
+        # A stable order is required for $offset paging to be consistent
+        page_params.update({"$limit": size, "$offset": offset, "$order": ":id"})
+
+        res = await http_get(CDC_URL, params=page_params, timeout=timeout)
         res.raise_for_status()
+        page = res.json()
+
+        rows.extend(page)
+        if len(page) < size:
+            break
+        offset += size
+    return rows
+
+
+def format_cdc_row(item):
+    """Shape a Socrata row like the rest of the CDC results"""
+    title = item.get("title") or " - ".join(
+        str(item[field]) for field in CDC_TITLE_FIELDS if item.get(field)
+    )
+    description = item.get("short_description") or "\n".join(
+        f"{key}: {value}" for key, value in item.items() if not key.startswith(":")
+    )
+    return {
+        "source": "CDC",
+        "title": title or "No title",
+        "description": description or "No description"
+    }
+
+
+async def query_cdc_async(topic, limit=10):
+    """
+    Query CDC public health database.
+    Uses the local indexed snapshot when available, otherwise searches on the
+    Socrata server. The search term joins every planned entity, and rows rarely
+    mention all of them, so a search for all words that finds nothing is
+    retried for any of them.
+    """
+    from data.cdc_store import cdc_store
+    if cdc_store.enabled and await cdc_store.get_async() is not None:
+        return [format_cdc_row(item) for item in cdc_store.search(topic, limit)]
+
+    data = await fetch_cdc_rows_async(build_cdc_search_params(topic), limit=limit)
+    if not data and len(topic.split()) > 1:
+        data = await fetch_cdc_rows_async(build_cdc_search_params(topic, match_all=False), limit=limit)
+    return [format_cdc_row(item) for item in data]
+
+
+def query_cdc(topic, limit=10):
+    """Query CDC public health database (sync wrapper)"""
+    return run_sync(query_cdc_async(topic, limit))
+
 
-        data = res.json()
-        
-        # Filter by topic if available
-        filtered = [item for item in data if topic.lower() in str(item).lower()]
-
-        results = [
-            {
-                "source": "CDC",
-                "title": item.get("title", "No title"),
-                "description": item.get("short_description", "No description")
-            }
-            for item in (filtered if filtered else data)
-        ]
-        
-        return results
-    except Exception as e:
-        print(f"CDC API error: {e}")
-        return []
+register_source(SourceSpec(
+    name="CDC",
+    result_key="cdc",
+    query=query_cdc_async,
+    expected_latency=0.8,
+    cache_ttl=60 * 60,
+    icon="🏛️",
+    category=GENERAL_HEALTH,
+    description="Public health data",
+    use_case="Disease prevention, health statistics"
+))
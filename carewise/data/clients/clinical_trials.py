@@ -1,36 +1,105 @@
 """ClinicalTrials.gov API Client"""
 
-import requests
-from config.settings import CLINICAL_TRIALS_URL
+from config.settings import (
+    CLINICAL_TRIALS_URL, CLINICAL_TRIALS_LIMIT, CLINICAL_TRIALS_FILTERED_LIMIT, CLINICAL_TRIALS_PAGE_SIZE
+)
+from .http import http_get, run_sync
+from .registry import SourceSpec, register_source, BIOMEDICAL
 
+# Only the fields we use are returned, instead of whole protocolSection documents
+CLINICAL_TRIALS_FIELDS = "NCTId,BriefTitle,Condition,Phase,OverallStatus"
 
-def query_clinical_trials(query, limit=10):
-    """Query ClinicalTrials.gov v2 API"""
+
+def build_trial_params(query, status=None, phase=None, page_size=CLINICAL_TRIALS_PAGE_SIZE):
+    """v2 /studies parameters with field projection and server-side filters (str or list values)"""
+    if isinstance(status, str):
+        status = [status]
+    if isinstance(phase, str):
+        phase = [phase]
     params = {
         "query.term": query,
-        "pageSize": limit,
+        "fields": CLINICAL_TRIALS_FIELDS,
+        "pageSize": page_size,
         "format": "json"
     }
-    r = requests.get(CLINICAL_TRIALS_URL, params=params, timeout=30)
-    r.raise_for_status()
-
-    studies = r.json().get("studies", [])
-    results = []
-
-    for study in studies:
-        protocol = study.get("protocolSection", {})
-        id_module = protocol.get("identificationModule", {})
-        status_module = protocol.get("statusModule", {})
-        conditions_module = protocol.get("conditionsModule", {})
-        design_module = protocol.get("designModule", {})
-        
-        results.append({
-            "id": id_module.get("nctId", ""),
-            "title": id_module.get("briefTitle", ""),
-            "condition": conditions_module.get("conditions", []),
-            "phase": design_module.get("phases", []),
-            "status": status_module.get("overallStatus", ""),
-            "source": "ClinicalTrials"
-        })
-
-    return results
+    if status:
+        params["filter.overallStatus"] = ",".join(status)
+    if phase:
+        params["filter.advanced"] = "AREA[Phase](" + " OR ".join(phase) + ")"
+    return params
+
+
+def format_study(study):
+    """Shape a (projected) study like the rest of the ClinicalTrials results"""
+    protocol = study.get("protocolSection", {})
+    id_module = protocol.get("identificationModule", {})
+    status_module = protocol.get("statusModule", {})
+    conditions_module = protocol.get("conditionsModule", {})
+    design_module = protocol.get("designModule", {})
+
+    return {
+        "id": id_module.get("nctId", ""),
+        "title": id_module.get("briefTitle", ""),
+        "condition": conditions_module.get("conditions", []),
+        "phase": design_module.get("phases", []),
+        "status": status_module.get("overallStatus", ""),
+        "source": "ClinicalTrials"
+    }
+
+
+async def iter_clinical_trials_async(query, max_results=None, status=None, phase=None,
+                                     page_size=CLINICAL_TRIALS_PAGE_SIZE):
+    """
+    Yield studies page by page, following nextPageToken, until max_results
+    studies were produced or the result set ends. Only one page is held at a time.
+    """
+    if max_results is not None:
+        page_size = min(page_size, max_results)
+    params = build_trial_params(query, status, phase, page_size)
+    produced = 0
+
+    while True:
+        r = await http_get(CLINICAL_TRIALS_URL, params=params, timeout=30)
+        r.raise_for_status()
+        page = r.json()
+
+        for study in page.get("studies", []):
+            yield format_study(study)
+            produced += 1
+            if max_results is not None and produced >= max_results:
+                return
+
+        token = page.get("nextPageToken")
+        if not token:
+            return
+        params["pageToken"] = token
+
+
+async def query_clinical_trials_async(query, limit=None, status=None, phase=None):
+    """
+    Query ClinicalTrials.gov v2 API.
+    Filtered queries (status/phase, e.g. "recruiting phase 3 trials") pull more
+    trials since the filter already keeps them relevant.
+    """
+    if limit is None:
+        limit = CLINICAL_TRIALS_FILTERED_LIMIT if (status or phase) else CLINICAL_TRIALS_LIMIT
+    return [study async for study in iter_clinical_trials_async(query, limit, status, phase)]
+
+
+def query_clinical_trials(query, limit=None, status=None, phase=None):
+    """Query ClinicalTrials.gov v2 API (sync wrapper)"""
+    return run_sync(query_clinical_trials_async(query, limit, status, phase))
+
+
+register_source(SourceSpec(
+    name="ClinicalTrials",
+    result_key="clinical_trials",
+    query=query_clinical_trials_async,
+    filter_params=("status", "phase"),
+    expected_latency=1.5,
+    cache_ttl=10 * 60,
+    icon="🏥",
+    category=BIOMEDICAL,
+    description="Clinical trial data",
+    use_case="Ongoing trials, trial status, enrollment"
+))
@@ -1,35 +1,98 @@
 """FDA openFDA API Client"""
 
-import requests
-from config.settings import FDA_API_KEY, FDA_LABEL_URL
+from config.settings import FDA_API_KEY, FDA_LABEL_URL, FDA_LABELS_PER_DRUG
+from .http import http_get, run_sync
+from .registry import SourceSpec, register_source, BIOMEDICAL
 
+# Output section -> label fields to read, in order of preference
+# (older labels use "warnings", PLR-format labels "warnings_and_cautions")
+LABEL_SECTIONS = {
+    "boxed_warning": ["boxed_warning"],
+    "warnings": ["warnings", "warnings_and_cautions"],
+    "adverse_reactions": ["adverse_reactions"],
+    "purpose": ["purpose", "indications_and_usage"]
+}
 
-def query_fda_drug(drug_name, limit=5):
+
+def build_fda_search(drug_name):
+    """Match the drug as a brand or a generic name in a single search"""
+    name = drug_name.replace('"', "")
+    return f'openfda.brand_name:"{name}" openfda.generic_name:"{name}"'
+
+
+def extract_label_sections(label):
+    """Keep only the label sections we use, so the full label JSON is never stored"""
+    extracted = {}
+    for section, fields in LABEL_SECTIONS.items():
+        value = next((label[field] for field in fields if label.get(field)), None)
+        extracted[section] = value[0] if isinstance(value, list) else value
+    openfda = label.get("openfda", {})
+    extracted["brand_name"] = (openfda.get("brand_name") or [None])[0]
+    extracted["generic_name"] = (openfda.get("generic_name") or [None])[0]
+    extracted["set_id"] = label.get("set_id")
+    return extracted
+
+
+async def fetch_fda_label_sections_async(drug_name, limit=FDA_LABELS_PER_DRUG):
+    """
+    Extracted label sections for a drug, from the label cache when possible.
+    A drug without labels is cached too, so misses are not re-queried.
+    """
+    from data.record_cache import fda_label_cache
+
+    async def fetch():
+        params = {
+            "search": build_fda_search(drug_name),
+            "limit": limit,
+            "api_key": FDA_API_KEY
+        }
+        r = await http_get(FDA_LABEL_URL, params=params, timeout=30)
+        # openFDA answers 404 when nothing matches
+        if r.status_code == 404:
+            return []
+        r.raise_for_status()
+        return [extract_label_sections(label) for label in r.json().get("results", [])]
+
+    return await fda_label_cache.get_or_fetch(drug_name.strip().lower(), fetch)
+
+
+async def query_fda_drug_async(drug_name, limit=FDA_LABELS_PER_DRUG):
     """Query FDA drug label database"""
-    # Try brand name first
-    params = {
-        "search": f'openfda.brand_name:"{drug_name}"',
-        "limit": limit,
-        "api_key": FDA_API_KEY
-    }
-    r = requests.get(FDA_LABEL_URL, params=params, timeout=30)
-    
-    # If brand name fails, try generic name
-    if r.status_code == 404:
-        params["search"] = f'openfda.generic_name:"{drug_name}"'
-        r = requests.get(FDA_LABEL_URL, params=params, timeout=30)
-    
-    r.raise_for_status()
-    results = r.json().get("results", [])
+    sections = await fetch_fda_label_sections_async(drug_name, limit)
 
     formatted = []
-    for item in results:
+    for item in sections[:limit]:
         formatted.append({
             "drug": drug_name,
-            "purpose": item.get("purpose", [""])[0] if item.get("purpose") else "N/A",
-            "warnings": item.get("warnings", [""])[0] if item.get("warnings") else "N/A",
-            "adverse_reactions": item.get("adverse_reactions", [""])[0] if item.get("adverse_reactions") else "N/A",
+            "brand_name": item.get("brand_name"),
+            "generic_name": item.get("generic_name"),
+            "set_id": item.get("set_id"),
+            "purpose": item.get("purpose") or "N/A",
+            "boxed_warning": item.get("boxed_warning") or "N/A",
+            "warnings": item.get("warnings") or "N/A",
+            "adverse_reactions": item.get("adverse_reactions") or "N/A",
             "source": "FDA"
         })
 
     return formatted
+
+
+def query_fda_drug(drug_name, limit=FDA_LABELS_PER_DRUG):
+    """Query FDA drug label database (sync wrapper)"""
+    return run_sync(query_fda_drug_async(drug_name, limit))
+
+
+register_source(SourceSpec(
+    name="FDA",
+    result_key="fda",
+    query=query_fda_drug_async,
+    entity_types=["drugs"],
+    per_entity=True,
+    max_parallel=8,
+    expected_latency=0.8,
+    cache_ttl=24 * 60 * 60,
+    icon="💊",
+    category=BIOMEDICAL,
+    description="Drug safety information",
+    use_case="Side effects, warnings, drug labels"
+))
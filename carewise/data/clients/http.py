@@ -0,0 +1,210 @@
+"""
+Shared async HTTP layer used by all data source clients and the LLM client.
+One pooled keep-alive AsyncClient per upstream host (so TLS sessions are
+reused), retries with jittered backoff for idempotent GETs, rate limiting and
+the disk response cache.
+"""
+
+import asyncio
+import random
+from urllib.parse import urlsplit
+import httpx
+from config.settings import (
+    HTTP_POOL_LIMITS, HTTP_POOL_DEFAULT, HTTP_KEEPALIVE_EXPIRY,
+    HTTP_RETRIES, HTTP_RETRY_STATUSES, HTTP_RETRY_BACKOFF
+)
+from .rate_limit import rate_limiter, RateLimitExceeded
+from .http_cache import http_cache
+from .replay import replay_transport
+
+_clients = {}
+_client_loop = None
+_close_hooks = []
+
+
+def _new_client(host) -> httpx.AsyncClient:
+    max_connections, max_keepalive = HTTP_POOL_LIMITS.get(host, HTTP_POOL_DEFAULT)
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+    )
+    return httpx.AsyncClient(
+        follow_redirects=True,
+        headers={"Accept-Encoding": "gzip, deflate"},
+        limits=limits,
+        transport=replay_transport(limits)
+    )
+
+
+def get_async_client(url=None) -> httpx.AsyncClient:
+    """
+    Return the pooled AsyncClient for a URL's host, creating it on first use in
+    the running loop. Without a URL the shared default client is returned.
+    """
+    global _client_loop
+    loop = asyncio.get_running_loop()
+    if _client_loop is not loop:
+        # Clients are bound to the loop they were created in (run_sync uses a fresh loop)
+        _clients.clear()
+        _client_loop = loop
+    host = urlsplit(url).hostname if url else None
+    client = _clients.get(host)
+    if client is None or client.is_closed:
+        client = _clients[host] = _new_client(host)
+    return client
+
+
+async def open_http_sessions(hosts=None):
+    """Create the per-host clients up front (called on API startup)"""
+    for host in hosts or HTTP_POOL_LIMITS:
+        get_async_client(f"https://{host}/")
+
+
+def register_close_hook(hook):
+    """Register an async callable to run whenever the shared clients are closed"""
+    _close_hooks.append(hook)
+
+
+async def close_async_client():
+    """Close every pooled client and other registered clients (called on API shutdown)"""
+    global _client_loop
+    for client in list(_clients.values()):
+        if not client.is_closed:
+            await client.aclose()
+    _clients.clear()
+    _client_loop = None
+    for hook in _close_hooks:
+        await hook()
+
+
+def session_stats() -> dict:
+    """Open pooled clients per host"""
+    return {"hosts": sorted(host for host in _clients if host), "default_client": None in _clients}
+
+
+async def _backoff(attempt):
+    # Full jitter: spreads retries from many concurrent requests
+    await asyncio.sleep(random.uniform(0, HTTP_RETRY_BACKOFF * 2 ** attempt))
+
+
+def retry_after_seconds(res, default=1.0):
+    """Seconds from a Retry-After header (delta form), or the default"""
+    try:
+        return float(res.headers.get("Retry-After", default))
+    except ValueError:
+        return default
+
+
+async def _send(url, params=None, timeout=30, headers=None):
+    """GET a URL through its host's pooled client, within the rate limit, retrying transient failures"""
+    client = get_async_client(url)
+    for attempt in range(HTTP_RETRIES + 1):
+        await rate_limiter.acquire(url)
+        try:
+            res = await client.get(url, params=params, timeout=timeout, headers=headers)
+        except httpx.TransportError:
+            if attempt == HTTP_RETRIES:
+                raise
+            await _backoff(attempt)
+            continue
+        if res.status_code == 429:
+            # Throttled anyway (e.g. other clients on the same key): pause every worker
+            await rate_limiter.backoff_async(res.url.host, retry_after_seconds(res))
+        if res.status_code in HTTP_RETRY_STATUSES and attempt < HTTP_RETRIES:
+            await _backoff(attempt)
+            continue
+        return res
+
+
+async def http_get(url, params=None, timeout=30):
+    """
+    GET a URL, answered from the disk response cache when the host is cached.
+    A cached response of any age is served if the rate limiter refuses the request.
+    """
+    if http_cache.cacheable(url):
+        return await http_cache.get(url, params, lambda headers: _send(url, params, timeout, headers))
+    return await _send(url, params, timeout)
+
+
+def _chunks(body, chunk_size):
+    return (body[start:start + chunk_size] for start in range(0, len(body), chunk_size))
+
+
+async def http_stream(url, params=None, timeout=30, chunk_size=64 * 1024):
+    """
+    GET a URL, yielding the body in chunks as it arrives (or from the response
+    cache; a cached body of any age if the rate limiter refuses the request).
+    A cached response too old to serve is revalidated with a conditional GET.
+    """
+    cacheable = http_cache.cacheable(url)
+    validators, stored = {}, None
+    if cacheable:
+        body = await http_cache.get_body(url, params, lambda headers: _send(url, params, timeout, headers))
+        if body is not None:
+            for chunk in _chunks(body, chunk_size):
+                yield chunk
+            return
+        validators, stored = await http_cache.revalidation(url, params)
+
+    client = get_async_client(url)
+    started = False
+    not_modified = False
+    for attempt in range(HTTP_RETRIES + 1):
+        try:
+            await rate_limiter.acquire(url)
+        except RateLimitExceeded:
+            body = await http_cache.get_stale_body(url, params) if cacheable else None
+            if body is None:
+                raise
+            for chunk in _chunks(body, chunk_size):
+                yield chunk
+            return
+        received = []
+        try:
+            async with client.stream("GET", url, params=params, timeout=timeout, headers=validators) as res:
+                if res.status_code == 304 and stored is not None:
+                    not_modified = True
+                    break
+                if res.status_code == 429:
+                    await rate_limiter.backoff_async(res.url.host, retry_after_seconds(res))
+                if res.status_code in HTTP_RETRY_STATUSES and attempt < HTTP_RETRIES:
+                    await _backoff(attempt)
+                    continue
+                res.raise_for_status()
+                if cacheable and not started:
+                    http_cache.count_miss(url)
+                async for chunk in res.aiter_bytes():
+                    if cacheable:
+                        received.append(chunk)
+                    started = True
+                    yield chunk
+            break
+        except httpx.TransportError:
+            # Only retried before any bytes reached the consumer
+            if attempt == HTTP_RETRIES or started:
+                raise
+            await _backoff(attempt)
+
+    if not_modified:
+        await http_cache.not_modified(url, params)
+        for chunk in _chunks(stored, chunk_size):
+            yield chunk
+        return
+    # Only complete bodies are cached; a consumer that stops early never gets here
+    if cacheable:
+        await http_cache.put(url, params, res, b"".join(received))
+
+
+def run_sync(coro):
+    """
+    Run an async pipeline coroutine from synchronous code (CLI, scripts).
+    The shared client is bound to the temporary event loop, so it is closed on exit.
+    """
+    async def runner():
+        try:
+            return await coro
+        finally:
+            await close_async_client()
+
+    return asyncio.run(runner())
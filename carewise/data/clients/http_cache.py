@@ -0,0 +1,325 @@
+"""
+Disk-backed HTTP response cache shared by all source clients.
+Responses are keyed on method, URL and normalized params, stored gzip-compressed
+on disk with an SQLite index, kept fresh for a per-host TTL and then:
+- served stale while a background refresh runs (stale-while-revalidate),
+- revalidated with If-None-Match / If-Modified-Since once too old to serve stale,
+- served stale, whatever its age, if the upstream cannot be reached at all or
+  our own rate limiter refuses the request (RateLimitExceeded).
+A byte budget is enforced with least-recently-used eviction.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlsplit
+import httpx
+from config.settings import (
+    HTTP_CACHE_DIR, HTTP_CACHE_MAX_BYTES, HTTP_CACHE_TTLS, HTTP_CACHE_STALE_SECONDS, HTTP_CACHE_IGNORED_PARAMS
+)
+
+# Response headers kept with a cached body
+STORED_HEADERS = ("content-type", "etag", "last-modified")
+
+
+def cache_key(method, url, params=None):
+    """Stable key for a request: params sorted, ignored params dropped"""
+    normalized = sorted(
+        (str(name), str(value)) for name, value in (params or {}).items()
+        if name not in HTTP_CACHE_IGNORED_PARAMS
+    )
+    raw = json.dumps([method.upper(), url, normalized], separators=(",", ":"))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class HTTPCache:
+    """Compressed response bodies on disk, metadata and LRU order in SQLite"""
+
+    def __init__(self, directory=HTTP_CACHE_DIR, ttls=HTTP_CACHE_TTLS, max_bytes=HTTP_CACHE_MAX_BYTES,
+                 stale_seconds=HTTP_CACHE_STALE_SECONDS):
+        self.directory = directory
+        self.ttls = ttls
+        self.max_bytes = max_bytes
+        self.stale_seconds = stale_seconds
+        self.counters = {}
+        self._refreshing = {}
+        self._lock = threading.Lock()
+        self._db = None
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(os.path.join(directory, "index.db"), timeout=5, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, host TEXT NOT NULL, url TEXT NOT NULL, status INTEGER NOT NULL, "
+                "headers TEXT NOT NULL, size INTEGER NOT NULL, stored_at REAL NOT NULL, "
+                "expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access)")
+            self._db.commit()
+
+    @property
+    def enabled(self) -> bool:
+        return self._db is not None
+
+    def cacheable(self, url) -> bool:
+        return self.enabled and urlsplit(url).hostname in self.ttls
+
+    def _count(self, host, key):
+        counters = self.counters.setdefault(
+            host, {"hits": 0, "stale_hits": 0, "revalidated": 0, "misses": 0, "stored": 0}
+        )
+        counters[key] += 1
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".gz")
+
+    # -- index -----------------------------------------------------------------
+
+    def _lookup(self, key):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status, headers, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+        return {"status": row[0], "headers": json.loads(row[1]), "expires_at": row[2]}
+
+    def _extend(self, key, host):
+        with self._lock:
+            self._db.execute(
+                "UPDATE responses SET expires_at = ? WHERE key = ?", (time.time() + self.ttls[host], key)
+            )
+            self._db.commit()
+
+    def _store(self, key, host, url, res, body):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        compressed = gzip.compress(body, compresslevel=6)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(compressed)
+        os.replace(tmp_path, path)
+
+        headers = {name: res.headers[name] for name in STORED_HEADERS if name in res.headers}
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, host, url, res.status_code, json.dumps(headers), len(compressed),
+                 now, now + self.ttls[host], now)
+            )
+            self._db.commit()
+        self._count(host, "stored")
+        self._evict()
+
+    def _evict(self):
+        """Drop least recently used responses until the cache is under its byte budget"""
+        with self._lock:
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            victims = []
+            for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY last_access"):
+                if total <= self.max_bytes * 0.9:
+                    break
+                victims.append(key)
+                total -= size
+            self._db.executemany("DELETE FROM responses WHERE key = ?", [(key,) for key in victims])
+            self._db.commit()
+        for key in victims:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def _read_body(self, key):
+        try:
+            with open(self._path(key), "rb") as f:
+                return gzip.decompress(f.read())
+        except (FileNotFoundError, OSError, EOFError):
+            return None
+
+    # -- requests --------------------------------------------------------------
+
+    def _response(self, entry, body, url, params):
+        return httpx.Response(
+            entry["status"],
+            headers={**entry["headers"], "x-cache": "HIT"},
+            content=body,
+            request=httpx.Request("GET", url, params=params)
+        )
+
+    def _conditional_headers(self, entry):
+        headers = {}
+        if "etag" in entry["headers"]:
+            headers["If-None-Match"] = entry["headers"]["etag"]
+        if "last-modified" in entry["headers"]:
+            headers["If-Modified-Since"] = entry["headers"]["last-modified"]
+        return headers
+
+    async def _revalidate(self, key, host, url, params, entry, fetch):
+        """Conditional GET; returns the new response, or None if the cached one is still valid (304)"""
+        res = await fetch(self._conditional_headers(entry) if entry else {})
+        if res.status_code == 304 and entry is not None:
+            self._extend(key, host)
+            self._count(host, "revalidated")
+            return None
+        if res.status_code == 200:
+            await asyncio.to_thread(self._store, key, host, url, res, res.content)
+        return res
+
+    def _refresh_in_background(self, key, host, url, params, entry, fetch):
+        if key in self._refreshing:
+            return
+
+        async def refresh():
+            try:
+                await self._revalidate(key, host, url, params, entry, fetch)
+            except Exception as e:
+                print(f"HTTP cache: background refresh of {url} failed: {str(e)[:100]}")
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._refreshing[key] = asyncio.ensure_future(refresh())
+
+    async def _load(self, key):
+        entry = await asyncio.to_thread(self._lookup, key)
+        body = await asyncio.to_thread(self._read_body, key) if entry else None
+        return (entry, body) if body is not None else (None, None)
+
+    async def _servable(self, key, host, url, params, entry, fetch):
+        """True if the entry can be returned now (fresh, or stale with a refresh scheduled)"""
+        now = time.time()
+        if now < entry["expires_at"]:
+            self._count(host, "hits")
+            return True
+        if now < entry["expires_at"] + self.stale_seconds:
+            self._count(host, "stale_hits")
+            self._refresh_in_background(key, host, url, params, entry, fetch)
+            return True
+        return False
+
+    async def get(self, url, params, fetch):
+        """
+        Cached GET.
+
+        Args:
+            fetch: async callable(extra_headers) performing the real request
+        """
+        host = urlsplit(url).hostname
+        key = cache_key("GET", url, params)
+        entry, body = await self._load(key)
+        if entry is not None and await self._servable(key, host, url, params, entry, fetch):
+            return self._response(entry, body, url, params)
+
+        try:
+            res = await self._revalidate(key, host, url, params, entry, fetch)
+        except Exception:
+            if entry is None:
+                self._count(host, "misses")
+                raise
+            res = httpx.Response(599)
+        if res is None:
+            return self._response(entry, body, url, params)
+        if res.status_code >= 500 and entry is not None:
+            # Upstream failing: an old answer beats none
+            self._count(host, "stale_hits")
+            return self._response(entry, body, url, params)
+        self._count(host, "misses")
+        return res
+
+    async def get_body(self, url, params, fetch):
+        """
+        Body of a fresh or stale-while-revalidate response, or None when the
+        caller must fetch: conditionally with revalidation(), then calling
+        not_modified() on a 304 or count_miss() and put() on a full response
+        """
+        host = urlsplit(url).hostname
+        key = cache_key("GET", url, params)
+        entry, body = await self._load(key)
+        if entry is not None and await self._servable(key, host, url, params, entry, fetch):
+            return body
+        return None
+
+    async def revalidation(self, url, params):
+        """(conditional request headers, body) of the stored response of any age; ({}, None) if none"""
+        entry, body = await self._load(cache_key("GET", url, params))
+        if entry is None:
+            return {}, None
+        return self._conditional_headers(entry), body
+
+    async def not_modified(self, url, params):
+        """The upstream answered 304: keep the stored response fresh for another TTL"""
+        host = urlsplit(url).hostname
+        await asyncio.to_thread(self._extend, cache_key("GET", url, params), host)
+        self._count(host, "revalidated")
+
+    def count_miss(self, url):
+        """Record a lookup the caller answered with a full fetch"""
+        self._count(urlsplit(url).hostname, "misses")
+
+    async def get_stale_body(self, url, params):
+        """Stored body of any age (for when the upstream cannot be asked), or None"""
+        host = urlsplit(url).hostname
+        entry, body = await self._load(cache_key("GET", url, params))
+        if entry is not None:
+            self._count(host, "stale_hits")
+        return body
+
+    async def put(self, url, params, res, body):
+        """Store a response whose body was read by the caller (e.g. streamed)"""
+        if res.status_code == 200:
+            host = urlsplit(url).hostname
+            await asyncio.to_thread(self._store, cache_key("GET", url, params), host, url, res, body)
+
+    def clear(self):
+        """Drop every stored response (blocking; cold benchmark runs)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            keys = [key for (key,) in self._db.execute("SELECT key FROM responses")]
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> dict:
+        if not self.enabled:
+            return {"enabled": False}
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT host, COUNT(*), COALESCE(SUM(size), 0) FROM responses GROUP BY host"
+            ).fetchall()
+        stored = {host: (count, size) for host, count, size in rows}
+        hosts = {}
+        for host in self.ttls:
+            counters = dict(self.counters.get(host, {}))
+            served = counters.get("hits", 0) + counters.get("stale_hits", 0) + counters.get("revalidated", 0)
+            lookups = served + counters.get("misses", 0)
+            count, size = stored.get(host, (0, 0))
+            hosts[host] = {
+                **counters,
+                "hit_rate": round(served / lookups, 3) if lookups else 0.0,
+                "entries": count,
+                "bytes": size
+            }
+        return {
+            "enabled": True,
+            "bytes": sum(size for _, size in stored.values()),
+            "max_bytes": self.max_bytes,
+            "hosts": hosts
+        }
+
+
+http_cache = HTTPCache()
@@ -1,39 +1,83 @@
 """MedlinePlus API Client"""
 
-import requests
 import xml.etree.ElementTree as ET
 from config.settings import MEDLINEPLUS_URL
+from .http import http_stream, run_sync
+from .registry import SourceSpec, register_source, GENERAL_HEALTH
 
 
-def query_medlineplus(term, limit=10):
-    """Query MedlinePlus health topics database"""
+def parse_medlineplus_document(document):
+    """Extract the fields we use from a <document> element in one pass over its children"""
+    fields = {"title": None, "summary": None, "mesh": []}
+    for content in document.iter("content"):
+        name = content.get("name")
+        text = "".join(content.itertext()).strip()
+        if name == "title":
+            fields["title"] = text
+        elif name == "FullSummary":
+            fields["summary"] = text
+        elif name == "mesh" and text:
+            fields["mesh"].append(text)
+
+    rank = document.get("rank")
+    return {
+        "source": "MedlinePlus",
+        "title": fields["title"] or "No title",
+        "summary": fields["summary"] or "No summary",
+        "url": document.get("url"),
+        "mesh_terms": fields["mesh"],
+        "rank": int(rank) if rank and rank.isdigit() else None
+    }
+
+
+async def stream_medlineplus_documents_async(term, limit=10):
+    """Parse search results from the raw response bytes as they arrive, stopping after `limit` documents"""
     params = {
         "db": "healthTopics",
         "term": term,
         "retmax": limit
     }
+    parser = ET.XMLPullParser(events=("end",))
+    results = []
 
+    chunks = http_stream(MEDLINEPLUS_URL, params=params, timeout=10)
     try:
-        res = requests.get(MEDLINEPLUS_URL, params=params, timeout=10)
-        res.raise_for_status()
-
-        root = ET.fromstring(res.text)
-        results = []
-        
-        for doc in root.findall(".//document"):
-            title_elem = doc.find(".//content[@name='title']")
-            summary_elem = doc.find(".//content[@name='FullSummary']")
-            
-            title = title_elem.text if title_elem is not None else "No title"
-            summary = summary_elem.text if summary_elem is not None else "No summary"
-
-            results.append({
-                "source": "MedlinePlus",
-                "title": title,
-                "summary": summary
-            })
-
-        return results
-    except Exception as e:
-        print(f"MedlinePlus API error: {e}")
-        return []
+        async for chunk in chunks:
+            parser.feed(chunk)
+            for _, element in parser.read_events():
+                if element.tag != "document":
+                    continue
+                results.append(parse_medlineplus_document(element))
+                element.clear()
+                if len(results) >= limit:
+                    return results
+    finally:
+        # Closes the response right away, so the rest of the body is never downloaded
+        await chunks.aclose()
+    return results
+
+
+async def query_medlineplus_async(term, limit=10):
+    """Query MedlinePlus health topics database (responses are cached; topics change rarely)"""
+    from data.record_cache import medlineplus_cache
+
+    key = f"{limit}:{' '.join(term.lower().split())}"
+    return await medlineplus_cache.get_or_fetch(key, lambda: stream_medlineplus_documents_async(term, limit))
+
+
+def query_medlineplus(term, limit=10):
+    """Query MedlinePlus health topics database (sync wrapper)"""
+    return run_sync(query_medlineplus_async(term, limit))
+
+
+register_source(SourceSpec(
+    name="MedlinePlus",
+    result_key="medlineplus",
+    query=query_medlineplus_async,
+    expected_latency=0.8,
+    cache_ttl=0,    # the client keeps its own (optionally persistent) response cache
+    icon="📖",
+    category=GENERAL_HEALTH,
+    description="Consumer health information",
+    use_case="Health topics, symptoms, conditions"
+))
@@ -1,53 +1,185 @@
 """PubMed API Client"""
 
-import requests
 import xml.etree.ElementTree as ET
-from config.settings import PUBMED_API_KEY, PUBMED_ESEARCH_URL, PUBMED_EFETCH_URL
+from config.settings import (
+    PUBMED_API_KEY, PUBMED_ESEARCH_URL, PUBMED_EFETCH_URL,
+    PUBMED_RESULT_LIMIT, PUBMED_EFETCH_BATCH_SIZE
+)
+from .http import http_get, http_stream, run_sync
+from .registry import SourceSpec, register_source, BIOMEDICAL
+from .rate_limit import RateLimitExceeded
 
 
-def search_pubmed(query, limit=10):
-    """Search PubMed for article IDs"""
+async def esearch_pubmed_async(query, limit=PUBMED_RESULT_LIMIT):
+    """
+    Search PubMed and keep the result set on the E-utilities history server.
+
+    Returns:
+        Dict with ids (first `limit` PMIDs), count, webenv and query_key
+    """
     params = {
         "db": "pubmed",
         "term": query,
         "retmax": limit,
         "retmode": "json",
+        "usehistory": "y",
         "api_key": PUBMED_API_KEY
     }
-    r = requests.get(PUBMED_ESEARCH_URL, params=params, timeout=30)
+    r = await http_get(PUBMED_ESEARCH_URL, params=params, timeout=30)
     r.raise_for_status()
-    return r.json()["esearchresult"]["idlist"]
+    result = r.json()["esearchresult"]
+    return {
+        "ids": result.get("idlist", []),
+        "count": int(result.get("count", 0)),
+        "webenv": result.get("webenv"),
+        "query_key": result.get("querykey")
+    }
 
 
-def fetch_pubmed_details(pmids):
-    """Fetch full article details from PubMed"""
-    if not pmids:
-        return []
+async def search_pubmed_async(query, limit=PUBMED_RESULT_LIMIT):
+    """Search PubMed for article IDs"""
+    return (await esearch_pubmed_async(query, limit))["ids"]
 
-    params = {
-        "db": "pubmed",
-        "id": ",".join(pmids),
-        "retmode": "xml",
-        "api_key": PUBMED_API_KEY
+
+def element_text(element):
+    """Full text of an element including inline markup (<i>, <sup>, ...)"""
+    if element is None:
+        return None
+    return "".join(element.itertext()).strip()
+
+
+def parse_pubmed_article(article):
+    """Extract the fields we use from a <PubmedArticle> element"""
+    # Structured abstracts have one AbstractText per section (BACKGROUND, METHODS, ...)
+    sections = []
+    for part in article.iterfind(".//Abstract/AbstractText"):
+        text = element_text(part)
+        if not text:
+            continue
+        label = part.get("Label")
+        sections.append(f"{label}: {text}" if label else text)
+
+    year = article.findtext(".//PubDate/Year")
+    if not year:
+        medline_date = article.findtext(".//PubDate/MedlineDate") or ""
+        year = medline_date[:4] or None
+
+    return {
+        "pmid": article.findtext("MedlineCitation/PMID"),
+        "title": element_text(article.find(".//ArticleTitle")),
+        "summary": "\n".join(sections) or None,
+        "year": year,
+        "journal": article.findtext(".//Journal/Title"),
+        "source": "PubMed"
     }
-    r = requests.get(PUBMED_EFETCH_URL, params=params, timeout=30)
-    r.raise_for_status()
 
-    root = ET.fromstring(r.text)
+
+async def efetch_pubmed_async(params):
+    """Run one efetch request, parsing articles incrementally as the XML streams in"""
+    params = {"db": "pubmed", "retmode": "xml", "api_key": PUBMED_API_KEY, **params}
+    parser = ET.XMLPullParser(events=("end",))
     articles = []
 
-    for article in root.findall(".//PubmedArticle"):
-        articles.append({
-            "title": article.findtext(".//ArticleTitle"),
-            "summary": article.findtext(".//Abstract/AbstractText"),
-            "year": article.findtext(".//PubDate/Year"),
-            "source": "PubMed"
-        })
+    async for chunk in http_stream(PUBMED_EFETCH_URL, params=params, timeout=30):
+        parser.feed(chunk)
+        for _, element in parser.read_events():
+            if element.tag == "PubmedArticle":
+                articles.append(parse_pubmed_article(element))
+                # Parsed articles are dropped so memory stays flat on large batches
+                element.clear()
+    parser.close()
+    return articles
+
 
+async def fetch_pubmed_details_async(pmids, batch_size=PUBMED_EFETCH_BATCH_SIZE):
+    """Fetch full article details from PubMed for a list of PMIDs"""
+    articles = []
+    for start in range(0, len(pmids), batch_size):
+        batch = pmids[start:start + batch_size]
+        articles.extend(await efetch_pubmed_async({"id": ",".join(batch)}))
     return articles
 
 
-def query_pubmed(search_term):
-    """Query PubMed: search and fetch details"""
-    pmids = search_pubmed(search_term)
-    return fetch_pubmed_details(pmids)
+async def fetch_pubmed_history_async(webenv, query_key, pmids, wanted, batch_size=PUBMED_EFETCH_BATCH_SIZE):
+    """
+    Fetch articles of a result set stored on the history server, one page of
+    `pmids` (the esearch order) at a time. Pages holding no `wanted` PMID are
+    skipped, and articles outside `wanted` (already cached) are dropped.
+    """
+    articles = []
+    for start in range(0, len(pmids), batch_size):
+        page = pmids[start:start + batch_size]
+        if wanted.isdisjoint(page):
+            continue
+        fetched = await efetch_pubmed_async({
+            "WebEnv": webenv,
+            "query_key": query_key,
+            "retstart": start,
+            "retmax": len(page)
+        })
+        articles.extend(article for article in fetched if article.get("pmid") in wanted)
+    return articles
+
+
+async def query_pubmed_async(search_term, limit=PUBMED_RESULT_LIMIT):
+    """
+    Query PubMed: search, then fetch only the articles not already cached.
+    Result sets larger than one efetch batch are paged from the history server
+    instead of sending long PMID lists.
+    """
+    from data.record_cache import pubmed_cache
+
+    search = await esearch_pubmed_async(search_term, limit)
+    pmids = search["ids"]
+    articles = pubmed_cache.get_many(pmids)
+    missing = [pmid for pmid in pmids if pmid not in articles]
+
+    if missing:
+        try:
+            if len(pmids) > PUBMED_EFETCH_BATCH_SIZE and search["webenv"]:
+                fetched = await fetch_pubmed_history_async(
+                    search["webenv"], search["query_key"], pmids, set(missing), PUBMED_EFETCH_BATCH_SIZE
+                )
+            else:
+                fetched = await fetch_pubmed_details_async(missing, PUBMED_EFETCH_BATCH_SIZE)
+        except RateLimitExceeded as e:
+            # Expired cached articles beat none
+            articles.update(pubmed_cache.get_many(missing, stale=True))
+            if not articles:
+                raise
+            print(f"PubMed: {e}; returning {len(articles)} cached articles")
+            fetched = []
+        fetched = {article["pmid"]: article for article in fetched if article.get("pmid")}
+        pubmed_cache.put_many(fetched)
+        articles.update(fetched)
+
+    # Keep esearch relevance order
+    return [articles[pmid] for pmid in pmids if pmid in articles]
+
+
+def search_pubmed(query, limit=PUBMED_RESULT_LIMIT):
+    """Search PubMed for article IDs (sync wrapper)"""
+    return run_sync(search_pubmed_async(query, limit))
+
+
+def fetch_pubmed_details(pmids):
+    """Fetch full article details from PubMed (sync wrapper)"""
+    return run_sync(fetch_pubmed_details_async(pmids))
+
+
+def query_pubmed(search_term, limit=PUBMED_RESULT_LIMIT):
+    """Query PubMed: search and fetch details (sync wrapper)"""
+    return run_sync(query_pubmed_async(search_term, limit))
+
+
+register_source(SourceSpec(
+    name="PubMed",
+    result_key="pubmed",
+    query=query_pubmed_async,
+    expected_latency=1.5,
+    cache_ttl=10 * 60,
+    icon="📚",
+    category=BIOMEDICAL,
+    description="Research articles and scientific literature",
+    use_case="Latest research, scientific findings"
+))
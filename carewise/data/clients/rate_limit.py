@@ -0,0 +1,146 @@
+"""
+Upstream rate limiter - one token bucket per host, shared by all uvicorn workers.
+Bucket state lives in a small SQLite file so every process draws from the same
+budget. A caller reserves a token and sleeps until it is due; if that would
+take longer than RATE_LIMIT_MAX_WAIT the request is refused so the caller can
+fall back to cached data instead. Bucket updates run in a worker thread, since
+a busy SQLite file can block for up to its timeout.
+"""
+
+import asyncio
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+from config.settings import RATE_LIMITS, RATE_LIMIT_STATE_PATH, RATE_LIMIT_MAX_WAIT
+
+
+class RateLimitExceeded(RuntimeError):
+    """Raised when an upstream's bucket would not refill within the allowed wait"""
+
+    def __init__(self, host: str, retry_after: float):
+        super().__init__(f"Rate limit for {host} exceeded, retry after {retry_after:.1f}s")
+        self.host = host
+        self.retry_after = retry_after
+
+
+class RateLimiter:
+    """Token buckets keyed by host, stored in SQLite (or in memory if the file is unusable)"""
+
+    def __init__(self, limits=RATE_LIMITS, path=RATE_LIMIT_STATE_PATH, max_wait=RATE_LIMIT_MAX_WAIT):
+        self.limits = limits
+        self.max_wait = max_wait
+        self.path = path or os.path.join(tempfile.gettempdir(), "carewise_rate_limits.db")
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._memory = {}
+        self._db = None
+        try:
+            self._db = sqlite3.connect(self.path, timeout=1, isolation_level=None, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=OFF")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS buckets (host TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+        except sqlite3.Error as e:
+            print(f"Rate limiter: shared state unavailable ({e}), using per-process buckets")
+            self._db = None
+
+    def _count(self, host, key):
+        counters = self.counters.setdefault(
+            host, {"granted": 0, "delayed": 0, "rejected": 0, "throttled": 0, "degraded": 0}
+        )
+        counters[key] += 1
+
+    def _update(self, host, rate, burst, change):
+        """
+        Refill the bucket, let `change(tokens)` return the new token count and
+        a result, and persist the new count in one transaction. If the shared
+        file is locked or broken, the per-process bucket is used for this call.
+        """
+        now = time.time()
+        with self._lock:
+            if self._db is not None:
+                try:
+                    return self._update_shared(host, rate, burst, change, now)
+                except sqlite3.Error as e:
+                    self._count(host, "degraded")
+                    print(f"Rate limiter: shared state unavailable for {host} ({e}), using per-process bucket")
+
+            tokens, updated = self._memory.get(host, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            tokens, result = change(tokens)
+            self._memory[host] = (tokens, now)
+            return result
+
+    def _update_shared(self, host, rate, burst, change, now):
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._db.execute("SELECT tokens, updated FROM buckets WHERE host = ?", (host,)).fetchone()
+            tokens, updated = row if row else (burst, now)
+            tokens = min(burst, tokens + (now - updated) * rate)
+            tokens, result = change(tokens)
+            self._db.execute("INSERT OR REPLACE INTO buckets VALUES (?, ?, ?)", (host, tokens, now))
+            self._db.execute("COMMIT")
+        except BaseException:
+            if self._db.in_transaction:
+                self._db.execute("ROLLBACK")
+            raise
+        # Keep the per-process bucket in step, so a fallback starts from a sensible count
+        self._memory[host] = (tokens, now)
+        return result
+
+    def reserve(self, host) -> float:
+        """
+        Take a token for host and return how long to wait before using it.
+        Raises RateLimitExceeded (without taking the token) if the wait is too long.
+        """
+        rate, burst = self.limits[host]
+
+        def take(tokens):
+            wait = max(0.0, (1 - tokens) / rate)
+            if wait > self.max_wait:
+                return tokens, -wait
+            return tokens - 1, wait
+
+        wait = self._update(host, rate, burst, take)
+        if wait < 0:
+            self._count(host, "rejected")
+            raise RateLimitExceeded(host, -wait)
+        self._count(host, "delayed" if wait > 0 else "granted")
+        return wait
+
+    def backoff(self, host, seconds):
+        """Empty the bucket so no worker calls host for `seconds` (e.g. after a 429)"""
+        if host not in self.limits:
+            return
+        rate, burst = self.limits[host]
+        self._update(host, rate, burst, lambda tokens: (min(tokens, -seconds * rate), None))
+        self._count(host, "throttled")
+
+    async def backoff_async(self, host, seconds):
+        await asyncio.to_thread(self.backoff, host, seconds)
+
+    async def acquire(self, url):
+        """Wait for a token for the URL's host; hosts without a configured limit pass through"""
+        host = urlsplit(url).hostname
+        if host not in self.limits:
+            return
+        wait = await asyncio.to_thread(self.reserve, host)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def stats(self) -> dict:
+        return {
+            "shared": self._db is not None,
+            "path": self.path if self._db is not None else None,
+            "hosts": {
+                host: dict(self.counters.get(host, {}), rate=rate, burst=burst)
+                for host, (rate, burst) in self.limits.items()
+            }
+        }
+
+
+rate_limiter = RateLimiter()
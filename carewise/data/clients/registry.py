@@ -0,0 +1,74 @@
+"""
+Data source registry.
+Each client module registers a SourceSpec describing how it is queried (which
+entity types it reads, whether it is called once per entity) and how it should
+be run (expected latency, result cache TTL, parallelism). The router schedules
+whatever is registered, so adding or tuning a source does not touch it.
+"""
+
+ENTITY_ORDER = ["diseases", "drugs", "therapies", "symptoms", "topics"]
+
+BIOMEDICAL = "biomedical"
+GENERAL_HEALTH = "general_health"
+
+
+class SourceSpec:
+    """Capabilities and cost metadata of one data source"""
+
+    def __init__(self, name, result_key, query, entity_types=ENTITY_ORDER, per_entity=False,
+                 max_entities=None, entity_key=None, filter_params=(), max_parallel=4, expected_latency=1.0,
+                 cache_ttl=0, icon="•", category=BIOMEDICAL, description="", use_case=""):
+        self.name = name
+        self.result_key = result_key            # key expected by normalize_results
+        self.query = query                      # async callable(term) -> list of records
+        self.entity_types = list(entity_types)  # plan entity categories the source reads
+        self.per_entity = per_entity            # one call per entity instead of one combined search
+        self.max_entities = max_entities        # cap on per-entity calls (None = all)
+        self.entity_key = entity_key            # maps an entity to a dedupe key; None skips the entity
+        self.filter_params = tuple(filter_params)  # plan filters passed to query as keyword arguments
+        self.max_parallel = max_parallel        # concurrent per-entity calls
+        self.expected_latency = expected_latency  # seconds, typical; seeds hedging before samples exist
+        self.cache_ttl = cache_ttl              # seconds results are reused (0 = no caching)
+        self.icon = icon
+        self.category = category
+        self.description = description
+        self.use_case = use_case
+
+    def entities(self, plan_entities: dict) -> list:
+        """Entities this source reads from a plan, deduplicated in category order"""
+        values = []
+        for entity_type in self.entity_types:
+            values.extend(plan_entities.get(entity_type, []))
+        seen, selected = set(), []
+        for value in values:
+            key = self.entity_key(value) if self.entity_key else value.lower()
+            if key is None or key in seen:
+                continue
+            seen.add(key)
+            selected.append(value)
+        return selected[:self.max_entities] if self.max_entities else selected
+
+    def describe(self) -> dict:
+        return {
+            "name": self.name,
+            "description": self.description,
+            "use_case": self.use_case,
+            "entity_types": self.entity_types,
+            "per_entity": self.per_entity,
+            "filters": list(self.filter_params),
+            "expected_latency_s": self.expected_latency,
+            "cache_ttl_s": self.cache_ttl
+        }
+
+
+SOURCE_REGISTRY = {}
+
+
+def register_source(spec: SourceSpec) -> SourceSpec:
+    """Add (or replace) a source in the registry"""
+    SOURCE_REGISTRY[spec.name] = spec
+    return spec
+
+
+def get_source(name: str):
+    return SOURCE_REGISTRY.get(name)
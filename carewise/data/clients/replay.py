@@ -0,0 +1,225 @@
+"""
+Record/replay of upstream HTTP traffic, for running the pipeline offline.
+Every upstream client (source clients and the Ollama client) builds its httpx
+client with `replay_transport()`, which depends on REPLAY_MODE:
+- None:     live upstreams (no transport override)
+- "record": requests go upstream and every exchange is saved as a JSON fixture
+- "replay": requests are answered from fixtures in-process; no network at all
+- "stub":   requests are rewritten to stub_server.py, which replays the same
+            fixtures over real sockets with configurable latency and errors
+
+Record once with e.g. `CAREWISE_REPLAY_MODE=record python main.py "..."`, then
+run with CAREWISE_REPLAY_MODE=replay (or stub) against the same fixtures dir.
+No fixtures are shipped with the repository; replaying an empty fixtures dir
+fails right away with instructions to record first.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import threading
+import httpx
+from config.settings import REPLAY_MODE, REPLAY_FIXTURES_DIR, REPLAY_STUB_URL, REPLAY_IGNORED_FIELDS
+
+# Response headers kept in a fixture (bodies are stored decoded)
+FIXTURE_HEADERS = ("content-type", "etag", "last-modified", "retry-after")
+
+RECORD_HINT = (
+    'Record them first against the live upstreams, e.g. '
+    'CAREWISE_REPLAY_MODE=record CAREWISE_FIXTURES_DIR={directory} python main.py "What is diabetes?"'
+)
+
+
+class FixturesMissingError(RuntimeError):
+    """Raised when replaying from a fixtures dir that holds no recordings"""
+
+    def __init__(self, directory):
+        super().__init__(f"No recorded fixtures in {os.path.abspath(directory)}. "
+                         + RECORD_HINT.format(directory=directory))
+        self.directory = directory
+
+
+def count_fixtures(directory) -> int:
+    """Number of recorded exchanges under a fixtures dir (0 if it does not exist)"""
+    if not os.path.isdir(directory):
+        return 0
+    return sum(
+        1 for host in os.scandir(directory) if host.is_dir()
+        for entry in os.scandir(host.path) if entry.name.endswith(".json")
+    )
+
+
+def require_fixtures(directory) -> int:
+    """Fixture count, or FixturesMissingError when there is nothing to replay"""
+    count = count_fixtures(directory)
+    if not count:
+        raise FixturesMissingError(directory)
+    return count
+
+
+def fixture_key(method, netloc, path, params=(), body=b""):
+    """
+    Stable key for an exchange: ignored fields dropped from the query and from
+    a JSON body, the rest sorted. The scheme is left out so a stub server on
+    plain HTTP matches fixtures recorded over HTTPS.
+    """
+    query = sorted((str(k), str(v)) for k, v in params if k not in REPLAY_IGNORED_FIELDS)
+    payload = body.decode("utf-8", "replace") if body else ""
+    if payload:
+        try:
+            data = json.loads(payload)
+            if isinstance(data, dict):
+                data = {k: v for k, v in data.items() if k not in REPLAY_IGNORED_FIELDS}
+            payload = json.dumps(data, sort_keys=True, separators=(",", ":"))
+        except ValueError:
+            pass
+    raw = json.dumps([method.upper(), netloc, path, query, payload], separators=(",", ":"))
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+def request_key(request: httpx.Request) -> str:
+    return fixture_key(
+        request.method, request.url.netloc.decode(), request.url.path,
+        request.url.params.multi_items(), request.content
+    )
+
+
+class FixtureStore:
+    """Recorded exchanges, one JSON file per request under <dir>/<host>/<key>.json"""
+
+    def __init__(self, directory=REPLAY_FIXTURES_DIR):
+        self.directory = directory
+        self.loaded = {}
+        self.counters = {"recorded": 0, "replayed": 0, "missing": 0}
+        self._lock = threading.Lock()
+
+    def _path(self, netloc, key):
+        return os.path.join(self.directory, netloc.replace(":", "_"), key + ".json")
+
+    def load(self, netloc, key):
+        """The fixture dict for a key, or None if it was never recorded"""
+        if key not in self.loaded:
+            try:
+                with open(self._path(netloc, key), encoding="utf-8") as f:
+                    self.loaded[key] = json.load(f)
+            except FileNotFoundError:
+                self.counters["missing"] += 1
+                return None
+        self.counters["replayed"] += 1
+        return self.loaded[key]
+
+    def save(self, request: httpx.Request, status, headers, body: bytes):
+        netloc = request.url.netloc.decode()
+        key = request_key(request)
+        fixture = {
+            "request": {
+                "method": request.method,
+                "url": str(request.url.copy_with(query=None)),
+                "params": [[k, v] for k, v in request.url.params.multi_items() if k not in REPLAY_IGNORED_FIELDS],
+                "body": request.content.decode("utf-8", "replace") if request.content else None
+            },
+            "response": {
+                "status": status,
+                "headers": {name: headers[name] for name in FIXTURE_HEADERS if name in headers}
+            }
+        }
+        try:
+            fixture["response"]["body"] = body.decode("utf-8")
+        except UnicodeDecodeError:
+            fixture["response"]["body_base64"] = base64.b64encode(body).decode()
+
+        path = self._path(netloc, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(fixture, f, indent=1, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.loaded[key] = fixture
+            self.counters["recorded"] += 1
+
+
+def fixture_body(fixture) -> bytes:
+    response = fixture["response"]
+    if "body_base64" in response:
+        return base64.b64decode(response["body_base64"])
+    return response.get("body", "").encode("utf-8")
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """httpx transport recording to, replaying from, or redirecting to a stub server for fixtures"""
+
+    def __init__(self, mode, fixtures: FixtureStore, stub_url=REPLAY_STUB_URL, limits=None):
+        if mode not in ("record", "replay", "stub"):
+            raise ValueError(f"Unknown replay mode: {mode}")
+        if mode == "replay":
+            require_fixtures(fixtures.directory)
+        self.mode = mode
+        self.fixtures = fixtures
+        self.stub_url = httpx.URL(stub_url)
+        self._inner = None
+        if mode != "replay":
+            self._inner = httpx.AsyncHTTPTransport(limits=limits) if limits else httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if self.mode == "replay":
+            return self._replay(request)
+        if self.mode == "stub":
+            return await self._forward_to_stub(request)
+        return await self._record(request)
+
+    def _replay(self, request):
+        fixture = self.fixtures.load(request.url.netloc.decode(), request_key(request))
+        if fixture is None:
+            # Same failure a client sees when the upstream is unreachable
+            raise httpx.ConnectError(
+                f"No recorded fixture for {request.method} {request.url} in {self.fixtures.directory}; "
+                "record this request first (CAREWISE_REPLAY_MODE=record)",
+                request=request
+            )
+        return httpx.Response(
+            fixture["response"]["status"],
+            headers={**fixture["response"]["headers"], "x-replay": "fixture"},
+            content=fixture_body(fixture),
+            request=request
+        )
+
+    async def _forward_to_stub(self, request):
+        # https://api.fda.gov/drug/label.json?... -> <stub>/api.fda.gov/drug/label.json?...
+        request.url = self.stub_url.copy_with(
+            path=self.stub_url.path.rstrip("/") + "/" + request.url.netloc.decode() + request.url.path,
+            query=request.url.query or None
+        )
+        request.headers["Host"] = self.stub_url.netloc.decode()
+        return await self._inner.handle_async_request(request)
+
+    async def _record(self, request):
+        response = await self._inner.handle_async_request(request)
+        # Read (and decode) the whole body so it can be saved, then hand the caller a plain response
+        recorded = httpx.Response(response.status_code, headers=response.headers, stream=response.stream,
+                                  request=request)
+        body = await recorded.aread()
+        await response.aclose()
+        self.fixtures.save(request, response.status_code, recorded.headers, body)
+        headers = {k: v for k, v in recorded.headers.items()
+                   if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")}
+        return httpx.Response(response.status_code, headers=headers, content=body, request=request)
+
+    async def aclose(self):
+        if self._inner is not None:
+            await self._inner.aclose()
+
+
+fixture_store = FixtureStore()
+
+
+def replay_transport(limits=None):
+    """Transport for a new upstream client, or None for live traffic"""
+    if not REPLAY_MODE:
+        return None
+    return ReplayTransport(REPLAY_MODE, fixture_store, limits=limits)
+
+
+def replay_stats() -> dict:
+    return {"mode": REPLAY_MODE, "fixtures_dir": fixture_store.directory, **fixture_store.counters}
@@ -1,7 +1,9 @@
 """WHO API Client"""
 
-import requests
+import asyncio
 from config.settings import WHO_URL
+from .http import http_get, run_sync
+from .registry import SourceSpec, register_source, GENERAL_HEALTH
 
 
 # WHO GHO Indicator Mapping
@@ -18,41 +20,124 @@ WHO_INDICATOR_MAP = {
     "maternal mortality": "MDG_0000000026"
 }
 
+# Only the columns we use are requested from the GHO OData API
+WHO_SELECT_FIELDS = "SpatialDimType,SpatialDim,ParentLocationCode,ParentLocation,TimeDim,Dim1,NumericValue"
+
 
 def get_who_indicator(topic):
     """Map health topic to WHO indicator code"""
     return WHO_INDICATOR_MAP.get(topic.lower())
 
 
-def query_who(topic, limit=20):
-    """Query WHO Global Health Observatory"""
+def build_who_filter(country=None, year_from=None, spatial_type=None):
+    """Build an OData $filter expression evaluated by the GHO server"""
+    clauses = ["NumericValue ne null"]
+    if country:
+        clauses.append(f"SpatialDim eq '{country.upper()}'")
+    if spatial_type:
+        clauses.append(f"SpatialDimType eq '{spatial_type}'")
+    if year_from:
+        clauses.append(f"TimeDim ge {int(year_from)}")
+    return " and ".join(clauses)
+
+
+async def fetch_who_rows_async(indicator, filter_expr=None, top=None, orderby=None, timeout=10):
+    """Fetch projected rows of a GHO indicator with server-side filtering"""
+    params = {"$select": WHO_SELECT_FIELDS}
+    if filter_expr:
+        params["$filter"] = filter_expr
+    if orderby:
+        params["$orderby"] = orderby
+    if top:
+        params["$top"] = top
+
+    res = await http_get(WHO_URL + indicator, params=params, timeout=timeout)
+    res.raise_for_status()
+    return res.json().get("value", [])
+
+
+def format_who_row(item, indicator, topic):
+    """Shape a GHO row like the rest of the WHO results"""
+    return {
+        "source": "WHO",
+        "indicator": indicator,
+        "topic": topic,
+        "country": item.get("SpatialDim"),
+        "year": item.get("TimeDim"),
+        "value": item.get("NumericValue")
+    }
+
+
+async def query_who_async(topic, limit=20, country=None, year_from=None):
+    """
+    Query WHO Global Health Observatory.
+    Filtering, ordering (most recent first) and the row limit are pushed to the
+    server; a fresh local snapshot is used instead of the network when available.
+    """
     indicator = get_who_indicator(topic)
     
     if not indicator:
         print(f"ℹ️ WHO: No indicator mapping for '{topic}'")
         return []
+
+    from data.who_store import who_store
+    if who_store.enabled and not country and not year_from and await who_store.get_async(indicator):
+        latest = who_store.latest_by_country(indicator)
+        if latest:
+            return [format_who_row(item, indicator, topic) for item in latest[:limit]]
     
-    url = WHO_URL + indicator
-    
+    data = await fetch_who_rows_async(
+        indicator,
+        filter_expr=build_who_filter(country, year_from),
+        top=limit,
+        orderby="TimeDim desc"
+    )
+    return [format_who_row(item, indicator, topic) for item in data]
+
+
+async def summarize_who_async(topic):
+    """
+    Summarize the full WHO series for a topic into a few statistic items
+    (global overview, regional medians, country ranking, trend).
+    Falls back to the most recent raw rows (a small filtered query) when the
+    series cannot be downloaded or summarized.
+    """
+    indicator = get_who_indicator(topic)
+
+    if not indicator:
+        print(f"ℹ️ WHO: No indicator mapping for '{topic}'")
+        return []
+
+    from data.who_store import who_store
+    from data.who_stats import summarize_indicator
     try:
-        res = requests.get(url, timeout=10)
-        res.raise_for_status()
-
-        data = res.json().get("value", [])
-
-        results = [
-            {
-                "source": "WHO",
-                "indicator": indicator,
-                "topic": topic,
-                "country": item.get("SpatialDim"),
-                "year": item.get("TimeDim"),
-                "value": item.get("NumericValue")
-            }
-            for item in data[:limit]
-        ]
-        
-        return results
+        snapshot = await who_store.series_async(indicator)
+        if snapshot is not None:
+            summary = await asyncio.to_thread(summarize_indicator, snapshot, topic)
+            if summary:
+                return summary
     except Exception as e:
-        print(f"WHO API error: {e}")
-        return []
+        print(f"WHO summary error: {e}")
+    return await query_who_async(topic)
+
+
+def query_who(topic, limit=20, country=None, year_from=None):
+    """Query WHO Global Health Observatory (sync wrapper)"""
+    return run_sync(query_who_async(topic, limit, country, year_from))
+
+
+# WHO is queried per topic; topics without an indicator mapping (or sharing one) are skipped
+register_source(SourceSpec(
+    name="WHO",
+    result_key="who",
+    query=summarize_who_async,
+    entity_types=["topics", "diseases"],
+    per_entity=True,
+    entity_key=get_who_indicator,
+    expected_latency=1.0,
+    cache_ttl=60 * 60,
+    icon="🌍",
+    category=GENERAL_HEALTH,
+    description="Global health statistics",
+    use_case="Global health data, indicators"
+))
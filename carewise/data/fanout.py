@@ -0,0 +1,67 @@
+"""Concurrent fan-out engine - runs source fetches in parallel under per-source and overall deadlines"""
+
+import asyncio
+import time
+
+
+async def _run_source(name, coro, timeout, on_done):
+    """Run a single source fetch and describe how it went"""
+    start = time.perf_counter()
+    try:
+        value = await asyncio.wait_for(coro, timeout=timeout)
+        status = {"status": "ok", "count": len(value) if value is not None else 0}
+    except asyncio.TimeoutError:
+        value = None
+        status = {"status": "timeout", "count": 0}
+    except Exception as e:
+        value = None
+        status = {"status": "error", "count": 0, "error": str(e)[:200]}
+
+    status["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    if on_done:
+        on_done(name, status)
+    return value, status
+
+
+async def fan_out(jobs: dict, timeouts: dict, budget: float, on_done=None):
+    """
+    Run all jobs concurrently and collect whatever finishes in time.
+
+    Args:
+        jobs: Mapping of source name -> coroutine producing a list of results
+        timeouts: Mapping of source name -> per-source deadline in seconds
+        budget: Overall deadline in seconds; unfinished sources are cancelled
+        on_done: Optional callback(name, status) invoked as each source finishes
+
+    Returns:
+        Tuple of (results, status): results only holds sources that succeeded,
+        status describes every source ("ok", "error" or "timeout")
+    """
+    tasks = {
+        asyncio.ensure_future(_run_source(name, coro, timeouts[name], on_done)): name
+        for name, coro in jobs.items()
+    }
+    results, status = {}, {}
+    if not tasks:
+        return results, status
+
+    start = time.perf_counter()
+    done, pending = await asyncio.wait(tasks, timeout=budget)
+
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+    for task, name in tasks.items():
+        if task in done:
+            value, status[name] = task.result()
+            if status[name]["status"] == "ok":
+                results[name] = value
+        else:
+            status[name] = {"status": "timeout", "count": 0, "latency_ms": elapsed_ms, "budget_exceeded": True}
+            if on_done:
+                on_done(name, status[name])
+
+    return results, status
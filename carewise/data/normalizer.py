@@ -1,6 +1,7 @@
 """Unified Result Normalizer - Transforms all 6 data sources into unified format"""
 
 import re
+from telemetry import timed
 
 
 def strip_html_tags(text):
@@ -22,13 +23,18 @@ def normalize_pubmed(item):
     clean_title = strip_html_tags(raw_title)
     clean_content = strip_html_tags(raw_content)
     
+    pmid = item.get("pmid")
+    
     return {
-        "id": f"PMID-{clean_title[:20]}",
+        "id": f"PMID-{pmid}" if pmid else f"PMID-{clean_title[:20]}",
         "title": clean_title,
         "content": clean_content,
         "source": "PubMed",
         "metadata": {
+            "pmid": pmid,
             "year": item.get("year"),
+            "journal": item.get("journal"),
+            "url": f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/" if pmid else None,
             "type": "research_article"
         }
     }
@@ -62,6 +68,10 @@ def normalize_fda(item):
     
     content_parts = []
     
+    boxed = item.get("boxed_warning", "N/A")
+    if boxed and boxed != "N/A":
+        content_parts.append(f"BOXED WARNING:\n{boxed[:500]}")
+    
     warnings = item.get("warnings", "N/A")
     if warnings and warnings != "N/A":
         content_parts.append(f"WARNINGS:\n{warnings[:500]}")
@@ -75,13 +85,18 @@ def normalize_fda(item):
     else:
         content = "\n\n".join(content_parts)
     
+    brand = item.get("brand_name")
+    title_name = f"{drug} ({brand})" if brand and brand.lower() != drug.lower() else drug
+    
     return {
-        "id": drug,
-        "title": f"{drug} - Drug Safety Information",
+        "id": f"FDA-{item['set_id']}" if item.get("set_id") else drug,
+        "title": f"{title_name} - Drug Safety Information",
         "content": content,
         "source": "FDA",
         "metadata": {
             "drug_name": drug,
+            "brand_name": brand,
+            "generic_name": item.get("generic_name"),
             "purpose": item.get("purpose", "N/A"),
             "type": "drug_label"
         }
@@ -98,11 +113,14 @@ def normalize_medlineplus(item):
     clean_content = strip_html_tags(raw_content)
     
     return {
-        "id": f"MLP-{clean_title[:20]}",
+        "id": f"MLP-{item['url']}" if item.get("url") else f"MLP-{clean_title[:20]}",
         "title": clean_title,
         "content": clean_content,
         "source": "MedlinePlus",
         "metadata": {
+            "url": item.get("url"),
+            "mesh_terms": item.get("mesh_terms", []),
+            "rank": item.get("rank"),
             "type": "health_topic"
         }
     }
@@ -127,8 +145,29 @@ def normalize_cdc(item):
     }
 
 
+def normalize_who_summary(item):
+    """Normalize an aggregated WHO statistic (overview, regional, ranking, trend)"""
+    indicator = item.get("indicator", "Unknown")
+    return {
+        "id": f"WHO-{indicator}-{item['kind']}",
+        "title": item.get("title", ""),
+        "content": item.get("content", ""),
+        "source": "WHO",
+        "metadata": {
+            "indicator": indicator,
+            "kind": item["kind"],
+            "year": item.get("year"),
+            "stats": item.get("stats", {}),
+            "type": "health_statistic_summary"
+        }
+    }
+
+
 def normalize_who(item):
     """Normalize WHO data to unified format"""
+    if "kind" in item:
+        return normalize_who_summary(item)
+
     indicator = item.get("indicator", "Unknown")
     topic = item.get("topic", "Unknown")
     country = item.get("country", "Global")
@@ -153,6 +192,7 @@ def normalize_who(item):
     }
 
 
+@timed("normalize")
 def normalize_results(raw_results):
     """
     Normalize results from all sources into unified format.
@@ -1,6 +1,7 @@
 """Evidence Ranker - Scores and ranks evidence by relevance for all sources"""
 
 from datetime import datetime
+from telemetry import timed
 
 
 def calculate_relevance_score(evidence, query_entities):
@@ -143,6 +144,7 @@ def calculate_source_priority(evidence, intent):
     return priority_map.get(intent, {}).get(source, 0.5)
 
 
+@timed("rank")
 def rank_evidence(evidence_list, query_plan):
     """
     Rank evidence items by relevance to the query.
@@ -0,0 +1,149 @@
+"""Keyed record cache - LRU with TTL, optionally persisted to SQLite (PubMed articles, FDA labels, MedlinePlus responses)"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from config.settings import (
+    PUBMED_CACHE_SIZE, PUBMED_CACHE_TTL, PUBMED_CACHE_PATH,
+    FDA_CACHE_SIZE, FDA_CACHE_TTL, FDA_CACHE_PATH,
+    MEDLINEPLUS_CACHE_SIZE, MEDLINEPLUS_CACHE_TTL, MEDLINEPLUS_CACHE_PATH
+)
+from .clients.rate_limit import RateLimitExceeded
+
+
+class RecordCache:
+    """
+    JSON-serializable records keyed by an upstream ID, so only unseen IDs are fetched.
+    Expired records count as misses but are kept until replaced, so they can
+    still be served when the upstream is rate limited.
+    """
+
+    def __init__(self, table, max_size, ttl, path=None):
+        self.table = table
+        self.max_size = max_size
+        self.ttl = ttl
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, record TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def get_many(self, keys, stale=False) -> dict:
+        """Return {key: record} for the keys that are cached and not expired (any age if stale)"""
+        now = time.time()
+        found = {}
+        with self._lock:
+            missing = [key for key in keys if key not in self._entries]
+            if missing and self._db is not None:
+                self._entries.update(self._load(missing))
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None or (not stale and now - entry[1] > self.ttl):
+                    if not stale:
+                        self.misses += 1
+                    continue
+                self._entries.move_to_end(key)
+                if stale:
+                    self.stale_hits += 1
+                else:
+                    self.hits += 1
+                found[key] = json.loads(entry[0])
+            self._trim()
+        return found
+
+    def get(self, key, stale=False):
+        """Return one cached record, or None"""
+        return self.get_many([key], stale).get(key)
+
+    async def get_or_fetch(self, key, fetch):
+        """
+        Return the cached record for key, else `await fetch()` and store the
+        result. If the upstream is rate limited an expired record is returned
+        instead, when there is one.
+        """
+        record = self.get(key)
+        if record is not None:
+            return record
+        try:
+            record = await fetch()
+        except RateLimitExceeded as e:
+            record = self.get(key, stale=True)
+            if record is None:
+                raise
+            print(f"{self.table}: {e}; serving an expired record")
+            return record
+        self.put(key, record)
+        return record
+
+    def put(self, key, record):
+        self.put_many({key: record})
+
+    def put_many(self, records: dict):
+        """Store {key: record}"""
+        now = time.time()
+        rows = [(key, json.dumps(record), now) for key, record in records.items()]
+        with self._lock:
+            for key, record, created in rows:
+                self._entries[key] = (record, created)
+                self._entries.move_to_end(key)
+            self._trim()
+            if self._db is not None and rows:
+                self._db.executemany(f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?)", rows)
+                self._db.commit()
+
+    def clear(self):
+        """Drop all cached records and reset counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.stale_hits = 0
+            if self._db is not None:
+                self._db.execute(f"DELETE FROM {self.table}")
+                self._db.commit()
+
+    def stats(self) -> dict:
+        """Hit/miss counters for monitoring"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "persistent": self._db is not None
+        }
+
+    def _load(self, keys):
+        placeholders = ",".join("?" * len(keys))
+        rows = self._db.execute(
+            f"SELECT key, record, created FROM {self.table} WHERE key IN ({placeholders})", keys
+        ).fetchall()
+        return {key: (record, created) for key, record, created in rows}
+
+    def _trim(self):
+        # Only the in-memory tier is size-bounded; SQLite keeps every record until it is replaced
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+# Parsed efetch articles keyed by PMID
+pubmed_cache = RecordCache("articles", PUBMED_CACHE_SIZE, PUBMED_CACHE_TTL, PUBMED_CACHE_PATH)
+
+# Extracted label sections keyed by lowercased drug name
+fda_label_cache = RecordCache("fda_labels", FDA_CACHE_SIZE, FDA_CACHE_TTL, FDA_CACHE_PATH)
+
+# Parsed health-topic search results keyed by "<limit>:<normalized term>"
+medlineplus_cache = RecordCache("medlineplus", MEDLINEPLUS_CACHE_SIZE, MEDLINEPLUS_CACHE_TTL, MEDLINEPLUS_CACHE_PATH)
@@ -0,0 +1,198 @@
+"""
+Per-source resilience for the data layer.
+A circuit breaker stops calling a source that keeps failing or answering too
+slowly, failing fast until a probe call succeeds; a hedger sends a duplicate
+request once a call has taken longer than the source's p95 latency and keeps
+whichever answer arrives first.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from config.settings import (
+    CIRCUIT_WINDOW_SIZE, CIRCUIT_MIN_CALLS, CIRCUIT_FAILURE_RATIO,
+    CIRCUIT_SLOW_CALL_SECONDS, CIRCUIT_OPEN_SECONDS,
+    HEDGE_PERCENTILE, HEDGE_MIN_SAMPLES, HEDGE_MIN_DELAY
+)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a source whose breaker is open"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit for {name} is open, retry after {retry_after:.0f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Closed -> open on a high failure/slow ratio; open -> half-open after a cool-down"""
+
+    def __init__(self, name, window_size=CIRCUIT_WINDOW_SIZE, min_calls=CIRCUIT_MIN_CALLS,
+                 failure_ratio=CIRCUIT_FAILURE_RATIO, slow_call_seconds=CIRCUIT_SLOW_CALL_SECONDS,
+                 open_seconds=CIRCUIT_OPEN_SECONDS):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.state = CLOSED
+        self.opened_at = None
+        self.times_opened = 0
+        self.rejected = 0
+        self._window = deque(maxlen=window_size)   # True = good call
+        self._probing = False
+
+    def before_call(self):
+        """Admit a call or raise CircuitOpenError"""
+        if self.state == OPEN:
+            remaining = self.opened_at + self.open_seconds - time.monotonic()
+            if remaining > 0:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, remaining)
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN:
+            # Only one probe at a time; everyone else keeps failing fast
+            if self._probing:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, self.open_seconds)
+            self._probing = True
+
+    def record(self, ok: bool, elapsed: float):
+        """Record the outcome of an admitted call"""
+        good = ok and elapsed < self.slow_call_seconds
+        if self.state == HALF_OPEN:
+            self._probing = False
+            if good:
+                self.state = CLOSED
+                self._window.clear()
+            else:
+                self._open()
+            return
+
+        self._window.append(good)
+        bad = self._window.count(False)
+        if len(self._window) >= self.min_calls and bad / len(self._window) >= self.failure_ratio:
+            self._open()
+
+    def release(self):
+        """An admitted call ended without an outcome (e.g. the request was cancelled)"""
+        self._probing = False
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.times_opened += 1
+        self._window.clear()
+        print(f"  🔌 Circuit for {self.name} opened")
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "recent_failures": self._window.count(False),
+            "recent_calls": len(self._window),
+            "times_opened": self.times_opened,
+            "rejected": self.rejected
+        }
+
+
+class RequestHedger:
+    """Tracks a source's latency and races a duplicate request after its p95"""
+
+    def __init__(self, name, percentile=HEDGE_PERCENTILE, min_samples=HEDGE_MIN_SAMPLES, min_delay=HEDGE_MIN_DELAY,
+                 initial_delay=None):
+        self.name = name
+        self.initial_delay = initial_delay
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self._latencies = deque(maxlen=200)
+
+    def observe(self, elapsed: float):
+        self._latencies.append(elapsed)
+
+    def delay(self):
+        """Seconds to wait before hedging; the initial delay (or None = no hedging) until there is enough history"""
+        if len(self._latencies) < self.min_samples:
+            return max(self.min_delay, self.initial_delay * 2) if self.initial_delay else None
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, math.ceil(self.percentile * len(ordered)) - 1)
+        return max(self.min_delay, ordered[index])
+
+    async def run(self, factory):
+        """
+        Run factory(); if it is slower than the hedge delay, race a second
+        factory() call. Whatever ends the race (an answer, an error or the
+        caller being cancelled), the attempts still running are cancelled.
+        """
+        self.calls += 1
+        tasks = [asyncio.ensure_future(factory())]
+        primary = tasks[0]
+        try:
+            delay = self.delay()
+            if delay is None:
+                return await primary
+
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done:
+                return primary.result()
+
+            self.hedged += 1
+            hedge = asyncio.ensure_future(factory())
+            tasks.append(hedge)
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.hedge_wins += 1
+                        return task.result()
+            # Both attempts failed: surface the original error
+            return primary.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> dict:
+        delay = self.delay()
+        return {
+            "calls": self.calls,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "win_rate": round(self.hedge_wins / self.hedged, 3) if self.hedged else 0.0,
+            "delay_ms": round(delay * 1000, 1) if delay is not None else None
+        }
+
+
+async def guarded_call(breaker, factory, hedger=None):
+    """Run a source call through its breaker (and hedger, if any)"""
+    breaker.before_call()
+    start = time.monotonic()
+    try:
+        result = await (hedger.run(factory) if hedger else factory())
+    except asyncio.CancelledError:
+        # Cancelled by a deadline: that only says something about the source if it was slow
+        elapsed = time.monotonic() - start
+        if elapsed >= breaker.slow_call_seconds:
+            breaker.record(False, elapsed)
+        else:
+            breaker.release()
+        raise
+    except Exception:
+        breaker.record(False, time.monotonic() - start)
+        raise
+    elapsed = time.monotonic() - start
+    breaker.record(True, elapsed)
+    if hedger:
+        hedger.observe(elapsed)
+    return result
@@ -1,101 +1,214 @@
-"""Unified Data Router - Routes to all 6 data sources based on query plan"""
+"""Unified Data Router - Schedules the registered data sources named in a query plan"""
 
-from .clients import (
-    query_pubmed, query_clinical_trials, query_fda_drug,
-    query_medlineplus, query_cdc, query_who
-)
+import asyncio
+import time
+from collections import OrderedDict
+from config.settings import SOURCE_TIMEOUT, SOURCE_TIMEOUTS, DATA_LAYER_BUDGET, HEDGED_SOURCES
+from .clients import run_sync
+from .clients.registry import SOURCE_REGISTRY
+from .clients.rate_limit import RateLimitExceeded
+from .fanout import fan_out
 from .normalizer import normalize_results
+from .resilience import CircuitBreaker, RequestHedger, guarded_call
+from telemetry import metrics, span, record_span
+
+RESULT_CACHE_SIZE = 512
+
+# Plan source name -> key expected by normalize_results
+SOURCE_RESULT_KEYS = {name: spec.result_key for name, spec in SOURCE_REGISTRY.items()}
 
+SOURCE_ICONS = {name: spec.icon for name, spec in SOURCE_REGISTRY.items()}
 
-def build_search_term(entities):
-    """Build search term from extracted entities"""
-    parts = []
+# One breaker per source, hedging only where configured
+SOURCE_BREAKERS = {source: CircuitBreaker(source) for source in SOURCE_REGISTRY}
+SOURCE_HEDGERS = {
+    source: RequestHedger(source, initial_delay=SOURCE_REGISTRY[source].expected_latency)
+    for source in HEDGED_SOURCES if source in SOURCE_REGISTRY
+}
+
+# (source, term) -> (stored_at, results); bounded LRU, per-source TTL from the registry
+_result_cache = OrderedDict()
+
+RESULT_CACHE_LOOKUPS = metrics.counter(
+    "carewise_source_result_cache_lookups_total", "Source result cache lookups", ["source", "result"]
+)
+SOURCE_SECONDS = metrics.histogram(
+    "carewise_source_duration_seconds", "Latency of each source fetch (including hedging)", ["source"]
+)
+SOURCE_RESULTS = metrics.counter(
+    "carewise_source_requests_total", "Source fetches by outcome (ok, error, timeout)", ["source", "result"]
+)
+
+
+def build_search_term(entities, entity_types=None):
+    """Build search term from extracted entities (a term listed under two types is used once)"""
+    parts = {}
     # Combine all entity types
-    parts.extend(entities.get("diseases", []))
-    parts.extend(entities.get("drugs", []))
-    parts.extend(entities.get("therapies", []))
-    parts.extend(entities.get("symptoms", []))
-    parts.extend(entities.get("topics", []))
-    return " ".join(parts) if parts else ""
+    for entity_type in entity_types or ["diseases", "drugs", "therapies", "symptoms", "topics"]:
+        for entity in entities.get(entity_type, []):
+            parts.setdefault(entity.lower(), entity)
+    return " ".join(parts.values())
 
 
-def execute_data_layer(plan: dict):
+def clear_result_cache():
+    """Forget every cached source result (cold benchmark runs)"""
+    _result_cache.clear()
+
+
+async def cached_query(spec, term, filters=None):
+    """
+    Call a source for one term (and filters), reusing results younger than its
+    cache TTL. If the source is rate limited, expired results are reused too.
+    """
+    filters = filters or {}
+    if not spec.cache_ttl:
+        return await spec.query(term, **filters)
+    key = (spec.name, term.lower(), repr(sorted(filters.items())))
+    entry = _result_cache.get(key)
+    if entry is not None and time.monotonic() - entry[0] < spec.cache_ttl:
+        _result_cache.move_to_end(key)
+        RESULT_CACHE_LOOKUPS.inc(source=spec.name, result="hit")
+        return entry[1]
+    RESULT_CACHE_LOOKUPS.inc(source=spec.name, result="miss")
+    try:
+        results = await spec.query(term, **filters)
+    except RateLimitExceeded as e:
+        if entry is None:
+            raise
+        print(f"     ⏳ {spec.name}: {e}; reusing cached results")
+        RESULT_CACHE_LOOKUPS.inc(source=spec.name, result="stale")
+        _result_cache.move_to_end(key)
+        return entry[1]
+    _result_cache[key] = (time.monotonic(), results)
+    _result_cache.move_to_end(key)
+    while len(_result_cache) > RESULT_CACHE_SIZE:
+        _result_cache.popitem(last=False)
+    return results
+
+
+async def query_per_entity(spec, entities, filters=None):
+    """Query a per-entity source for every entity (bounded parallelism) and merge the results"""
+    semaphore = asyncio.Semaphore(spec.max_parallel)
+
+    async def run(entity):
+        async with semaphore:
+            return await cached_query(spec, entity, filters)
+
+    entity_results = await asyncio.gather(*(run(entity) for entity in entities), return_exceptions=True)
+    merged, errors = [], []
+    for entity, result in zip(entities, entity_results):
+        if isinstance(result, Exception):
+            print(f"     ⚠️ {spec.name} failed for '{entity}': {str(result)[:100]}")
+            errors.append(result)
+            continue
+        merged.extend(result)
+    # Only a source-level failure if nothing worked
+    if errors and len(errors) == len(entities):
+        raise errors[0]
+    return merged
+
+
+def build_source_job(spec, entities, filters=None):
+    """Zero-argument coroutine factory for one source, or None if the plan gives it nothing to query"""
+    # Only pass the filters the source declares it understands
+    filters = {name: value for name, value in (filters or {}).items() if name in spec.filter_params}
+    if spec.per_entity:
+        selected = spec.entities(entities)
+        if not selected:
+            return None
+        return lambda: query_per_entity(spec, selected, filters)
+    return lambda: cached_query(spec, build_search_term(entities, spec.entity_types), filters)
+
+
+def build_source_jobs(plan: dict):
+    """Create one zero-argument coroutine factory per planned, registered source"""
+    jobs = {}
+    for source in plan["sources"]:
+        spec = SOURCE_REGISTRY.get(source)
+        if spec is None:
+            print(f"  • Skipping {source} (no registered client)")
+            continue
+        job = build_source_job(spec, plan["entities"], plan.get("filters", {}).get(source))
+        if job is None:
+            print(f"  {spec.icon} Skipping {source} (no {'/'.join(spec.entity_types)} in query)")
+            continue
+        jobs[source] = job
+    return jobs
+
+
+def source_resilience_stats() -> dict:
+    """Breaker state and hedging counters per source"""
+    return {
+        source: {
+            "breaker": breaker.stats(),
+            **({"hedging": SOURCE_HEDGERS[source].stats()} if source in SOURCE_HEDGERS else {})
+        }
+        for source, breaker in SOURCE_BREAKERS.items()
+    }
+
+
+def log_source_done(source, status):
+    """Print a one-line summary as each source finishes"""
+    icon = SOURCE_ICONS.get(source, "•")
+    if status["status"] == "ok":
+        print(f"  {icon} {source}: ✅ {status['count']} results in {status['latency_ms']:.0f}ms")
+    elif status["status"] == "timeout":
+        print(f"  {icon} {source}: ⏱️ timed out after {status['latency_ms']:.0f}ms")
+    else:
+        print(f"  {icon} {source}: ⚠️ failed: {status.get('error', '')[:100]}")
+
+
+async def fetch_sources_async(plan: dict, on_source_done=None):
+    """
+    Fetch all planned sources concurrently.
+
+    Each source gets its own deadline (SOURCE_TIMEOUTS, falling back to SOURCE_TIMEOUT)
+    and the whole fan-out is bounded by DATA_LAYER_BUDGET. Sources that miss their
+    deadline are reported with status "timeout" and contribute no results. Each call
+    goes through the source's circuit breaker, so a source that keeps failing is
+    skipped immediately, and latency-critical sources are hedged.
+
+    Returns:
+        Tuple of (raw_results, source_status) where raw_results is keyed like
+        normalize_results expects and source_status is keyed by plan source name
+    """
+    jobs = {
+        source: guarded_call(SOURCE_BREAKERS[source], factory, SOURCE_HEDGERS.get(source))
+        for source, factory in build_source_jobs(plan).items()
+    }
+    timeouts = {source: SOURCE_TIMEOUTS.get(source, SOURCE_TIMEOUT) for source in jobs}
+
+    def on_done(source, status):
+        log_source_done(source, status)
+        SOURCE_SECONDS.observe(status["latency_ms"] / 1000, source=source)
+        SOURCE_RESULTS.inc(source=source, result=status["status"])
+        record_span("source", status["latency_ms"] / 1000, source=source, result=status["status"],
+                    count=status["count"])
+        if on_source_done:
+            on_source_done(source, status)
+
+    with span("fetch", sources=len(jobs)):
+        results, status = await fan_out(jobs, timeouts, DATA_LAYER_BUDGET, on_done=on_done)
+
+    raw_results = {SOURCE_RESULT_KEYS[source]: [] for source in plan["sources"] if source in SOURCE_RESULT_KEYS}
+    for source, items in results.items():
+        raw_results[SOURCE_RESULT_KEYS[source]] = items
+    for source in plan["sources"]:
+        if source in SOURCE_RESULT_KEYS and source not in status:
+            status[source] = {"status": "skipped", "count": 0, "latency_ms": 0.0}
+
+    return raw_results, status
+
+
+async def execute_data_layer_async(plan: dict):
     """
     Execute unified data layer based on plan from query intelligence.
     Handles both biomedical research and general health sources.
     """
-    results = {}
-    search_term = build_search_term(plan["entities"])
-    entities = plan["entities"]
+    raw_results, _ = await fetch_sources_async(plan)
+    return normalize_results(raw_results)
 
-    for source in plan["sources"]:
-        
-        # Biomedical Research Sources
-        if source == "PubMed":
-            try:
-                print(f"  📚 Fetching from PubMed...")
-                results["pubmed"] = query_pubmed(search_term)
-                print(f"     ✅ Found {len(results['pubmed'])} articles")
-            except Exception as e:
-                print(f"     ⚠️ PubMed failed: {str(e)[:100]}")
-                results["pubmed"] = []
-
-        elif source == "ClinicalTrials":
-            try:
-                print(f"  🏥 Fetching from ClinicalTrials...")
-                results["clinical_trials"] = query_clinical_trials(search_term)
-                print(f"     ✅ Found {len(results['clinical_trials'])} trials")
-            except Exception as e:
-                print(f"     ⚠️ ClinicalTrials failed: {str(e)[:100]}")
-                results["clinical_trials"] = []
-
-        elif source == "FDA":
-            drugs = entities.get("drugs", [])
-            if drugs:
-                try:
-                    print(f"  💊 Fetching from FDA for drug: {drugs[0]}...")
-                    results["fda"] = query_fda_drug(drugs[0])
-                    print(f"     ✅ Found {len(results['fda'])} FDA records")
-                except Exception as e:
-                    print(f"     ⚠️ FDA failed: {str(e)[:100]}")
-                    results["fda"] = []
-            else:
-                print(f"  💊 Skipping FDA (no drugs specified in query)")
-                results["fda"] = []
-        
-        # General Health Sources
-        elif source == "MedlinePlus":
-            try:
-                print(f"  📖 Fetching from MedlinePlus...")
-                results["medlineplus"] = query_medlineplus(search_term)
-                print(f"     ✅ Found {len(results['medlineplus'])} health topics")
-            except Exception as e:
-                print(f"     ⚠️ MedlinePlus failed: {str(e)[:100]}")
-                results["medlineplus"] = []
-
-        elif source == "CDC":
-            try:
-                print(f"  🏛️ Fetching from CDC...")
-                results["cdc"] = query_cdc(search_term)
-                print(f"     ✅ Found {len(results['cdc'])} CDC records")
-            except Exception as e:
-                print(f"     ⚠️ CDC failed: {str(e)[:100]}")
-                results["cdc"] = []
-
-        elif source == "WHO":
-            # WHO needs specific topics for indicator mapping
-            topics = entities.get("topics", []) + entities.get("diseases", [])
-            who_results = []
-            for topic in topics:
-                try:
-                    print(f"  🌍 Fetching from WHO for topic: {topic}...")
-                    topic_results = query_who(topic)
-                    who_results.extend(topic_results)
-                    if topic_results:
-                        print(f"     ✅ Found {len(topic_results)} WHO data points")
-                except Exception as e:
-                    print(f"     ⚠️ WHO failed for '{topic}': {str(e)[:100]}")
-            
-            results["who"] = who_results
-
-    return normalize_results(results)
+
+def execute_data_layer(plan: dict):
+    """Execute unified data layer based on plan (sync wrapper for the CLI)."""
+    return run_sync(execute_data_layer_async(plan))
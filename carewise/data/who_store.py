@@ -0,0 +1,295 @@
+"""
+Local WHO indicator store.
+Keeps a compact columnar snapshot of each GHO indicator on disk, refreshed in
+the background, so "latest value per country" and "global trend" questions are
+answered without network I/O. Without a directory the snapshots are kept in
+memory only.
+"""
+
+import asyncio
+import gzip
+import json
+import os
+import statistics
+import time
+from collections import Counter
+from config.settings import WHO_STORE_DIR, WHO_STORE_REFRESH_INTERVAL
+from .clients.who import WHO_INDICATOR_MAP, fetch_who_rows_async, build_who_filter
+from .clients.rate_limit import RateLimitExceeded
+
+# Dim1 values meaning "both sexes" / no disaggregation, in order of preference
+PREFERRED_DIMS = ("SEX_BTSX", "BTSX", "")
+
+
+class IndicatorSnapshot:
+    """Columnar view of one indicator series; location and dimension codes are dictionary-encoded"""
+
+    def __init__(self, indicator, fetched_at, codes, code_idx, spatial_types, years, values,
+                 parents=None, parent_names=None, dims=None, dim_idx=None):
+        self.indicator = indicator
+        self.fetched_at = fetched_at
+        self.codes = codes                  # distinct SpatialDim codes
+        self.code_idx = code_idx            # per row: index into codes
+        self.spatial_types = spatial_types  # per code: SpatialDimType (COUNTRY, REGION, GLOBAL, ...)
+        self.years = years
+        self.values = values
+        self.parents = parents or [""] * len(codes)    # per code: WHO region code
+        self.parent_names = parent_names or {}         # region code -> region name
+        self.dims = dims or [""]                       # distinct Dim1 values (e.g. SEX_BTSX)
+        self.dim_idx = dim_idx or [0] * len(values)    # per row: index into dims
+
+    @classmethod
+    def from_rows(cls, indicator, rows):
+        codes, spatial_types, parents, lookup = [], [], [], {}
+        dims, dim_lookup, parent_names = [], {}, {}
+        code_idx, dim_idx, years, values = [], [], [], []
+        for row in rows:
+            code = row.get("SpatialDim")
+            year = row.get("TimeDim")
+            value = row.get("NumericValue")
+            if code is None or year is None or value is None:
+                continue
+            if code not in lookup:
+                lookup[code] = len(codes)
+                codes.append(code)
+                spatial_types.append(row.get("SpatialDimType") or "")
+                parent = row.get("ParentLocationCode") or ""
+                parents.append(parent)
+                if parent:
+                    parent_names[parent] = row.get("ParentLocation") or parent
+            dim = row.get("Dim1") or ""
+            if dim not in dim_lookup:
+                dim_lookup[dim] = len(dims)
+                dims.append(dim)
+            code_idx.append(lookup[code])
+            dim_idx.append(dim_lookup[dim])
+            years.append(int(year))
+            values.append(float(value))
+        return cls(
+            indicator, time.time(), codes, code_idx, spatial_types, years, values,
+            parents, parent_names, dims, dim_idx
+        )
+
+    def to_dict(self):
+        return {
+            "indicator": self.indicator,
+            "fetched_at": self.fetched_at,
+            "codes": self.codes,
+            "code_idx": self.code_idx,
+            "spatial_types": self.spatial_types,
+            "years": self.years,
+            "values": self.values,
+            "parents": self.parents,
+            "parent_names": self.parent_names,
+            "dims": self.dims,
+            "dim_idx": self.dim_idx
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        # Snapshots written before regions/dimensions were stored load with defaults
+        return cls(
+            data["indicator"], data["fetched_at"], data["codes"], data["code_idx"],
+            data["spatial_types"], data["years"], data["values"],
+            data.get("parents"), data.get("parent_names"), data.get("dims"), data.get("dim_idx")
+        )
+
+    def __len__(self):
+        return len(self.values)
+
+    def primary_dim(self):
+        """
+        Index of the Dim1 slice to report (both sexes when published, else the
+        most common one), or None when the series is not disaggregated.
+        """
+        if len(self.dims) <= 1:
+            return None
+        for dim in PREFERRED_DIMS:
+            if dim in self.dims:
+                return self.dims.index(dim)
+        return Counter(self.dim_idx).most_common(1)[0][0]
+
+    def rows(self):
+        """(code index, year, value) of the primary Dim1 slice"""
+        dim = self.primary_dim()
+        if dim is None:
+            return zip(self.code_idx, self.years, self.values)
+        return (
+            (idx, year, value)
+            for idx, year, value, row_dim in zip(self.code_idx, self.years, self.values, self.dim_idx)
+            if row_dim == dim
+        )
+
+
+class WHOIndicatorStore:
+    """Per-indicator snapshots on disk with an in-memory copy (memory only without a directory)"""
+
+    def __init__(self, directory=WHO_STORE_DIR, refresh_interval=WHO_STORE_REFRESH_INTERVAL):
+        self.directory = directory
+        self.refresh_interval = refresh_interval
+        self._snapshots = {}
+        self._refreshing = {}    # indicator -> background refresh task
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directory)
+
+    def _path(self, indicator):
+        return os.path.join(self.directory, f"{indicator}.json.gz")
+
+    def get(self, indicator):
+        """Return the snapshot for an indicator, loading it from disk on first use (blocking)"""
+        snapshot = self._snapshots.get(indicator)
+        if snapshot is None and self.enabled and os.path.exists(self._path(indicator)):
+            try:
+                with gzip.open(self._path(indicator), "rt", encoding="utf-8") as f:
+                    snapshot = IndicatorSnapshot.from_dict(json.load(f))
+                self._snapshots[indicator] = snapshot
+            except Exception as e:
+                print(f"WHO store: unreadable snapshot for {indicator}: {e}")
+        return snapshot
+
+    async def get_async(self, indicator):
+        """Like get(), with the disk read and JSON parse in a worker thread"""
+        snapshot = self._snapshots.get(indicator)
+        if snapshot is None and self.enabled:
+            snapshot = await asyncio.to_thread(self.get, indicator)
+        return snapshot
+
+    def _fresh(self, snapshot) -> bool:
+        return snapshot is not None and time.time() - snapshot.fetched_at < self.refresh_interval
+
+    def is_fresh(self, indicator) -> bool:
+        return self._fresh(self.get(indicator))
+
+    async def fetch_series(self, indicator):
+        """Download the full (projected) series without storing it"""
+        rows = await fetch_who_rows_async(indicator, filter_expr=build_who_filter(), timeout=60)
+        return await asyncio.to_thread(IndicatorSnapshot.from_rows, indicator, rows)
+
+    async def series_async(self, indicator):
+        """
+        Full series for an indicator, or None if it cannot be downloaded.
+        Only the first request for an indicator waits for the download (shared
+        by concurrent requests); after that a stale snapshot is served while a
+        background refresh replaces it.
+        """
+        snapshot = await self.get_async(indicator)
+        if snapshot is None:
+            # Shielded: a cancelled request must not abort the download others wait on
+            await asyncio.shield(self.refresh_in_background(indicator))
+            return self._snapshots.get(indicator)
+        if not self._fresh(snapshot):
+            self.refresh_in_background(indicator)
+        return snapshot
+
+    def refresh_in_background(self, indicator):
+        """Start a refresh of one indicator unless one is already running"""
+        task = self._refreshing.get(indicator)
+        if task is not None and not task.done():
+            return task
+
+        async def run():
+            try:
+                snapshot = await self.refresh(indicator)
+                print(f"  🌍 WHO store: refreshed {indicator} ({len(snapshot)} observations)")
+            except RateLimitExceeded:
+                pass
+            except Exception as e:
+                print(f"  ⚠️ WHO store: refresh failed for {indicator}: {str(e)[:100]}")
+            finally:
+                self._refreshing.pop(indicator, None)
+
+        task = self._refreshing[indicator] = asyncio.create_task(run())
+        return task
+
+    def _write(self, snapshot):
+        path = self._path(snapshot.indicator)
+        tmp_path = path + ".tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(snapshot.to_dict(), f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    async def refresh(self, indicator):
+        """Download the full (projected) series and replace the snapshot atomically"""
+        snapshot = await self.fetch_series(indicator)
+        if self.enabled:
+            await asyncio.to_thread(self._write, snapshot)
+        self._snapshots[indicator] = snapshot
+        return snapshot
+
+    async def refresh_stale(self, indicators=None):
+        """Refresh every snapshot that is missing or older than refresh_interval"""
+        for indicator in sorted(set(indicators or WHO_INDICATOR_MAP.values())):
+            if self._fresh(await self.get_async(indicator)):
+                continue
+            try:
+                snapshot = await self.refresh(indicator)
+                print(f"  🌍 WHO store: refreshed {indicator} ({len(snapshot)} observations)")
+            except Exception as e:
+                print(f"  ⚠️ WHO store: refresh failed for {indicator}: {str(e)[:100]}")
+
+    async def run_refresher(self):
+        """Background loop keeping all mapped indicators fresh"""
+        while True:
+            await self.refresh_stale()
+            await asyncio.sleep(min(self.refresh_interval, 3600))
+
+    def latest_by_country(self, indicator):
+        """
+        Most recent observation per location, newest first, as GHO-style rows.
+        Only the primary Dim1 slice is used, so e.g. male/female rows do not
+        overwrite the both-sexes value.
+        """
+        snapshot = self.get(indicator)
+        if snapshot is None:
+            return []
+        latest = {}
+        for idx, year, value in snapshot.rows():
+            current = latest.get(idx)
+            if current is None or year > current[0]:
+                latest[idx] = (year, value)
+        rows = [
+            {
+                "SpatialDim": snapshot.codes[idx],
+                "SpatialDimType": snapshot.spatial_types[idx],
+                "TimeDim": year,
+                "NumericValue": value
+            }
+            for idx, (year, value) in latest.items()
+        ]
+        # Global/regional aggregates first, then the most recent country values
+        rows.sort(key=lambda row: (row["SpatialDimType"] == "COUNTRY", -row["TimeDim"]))
+        return rows
+
+    def global_trend(self, indicator):
+        """
+        Yearly global value: the WHO GLOBAL aggregate when published,
+        otherwise the median across countries.
+        """
+        snapshot = self.get(indicator)
+        if snapshot is None:
+            return []
+        global_values, country_values = {}, {}
+        for idx, year, value in snapshot.rows():
+            spatial_type = snapshot.spatial_types[idx]
+            if spatial_type == "GLOBAL":
+                global_values.setdefault(year, []).append(value)
+            elif spatial_type == "COUNTRY":
+                country_values.setdefault(year, []).append(value)
+        by_year = global_values or country_values
+        return [(year, statistics.median(values)) for year, values in sorted(by_year.items())]
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "indicators": {
+                indicator: {"observations": len(snapshot), "age_s": round(time.time() - snapshot.fetched_at)}
+                for indicator, snapshot in self._snapshots.items()
+            }
+        }
+
+
+who_store = WHOIndicatorStore()
@@ -1,6 +1,23 @@
 """Unified Intelligence module - Query understanding and planning"""
-from .planner import build_execution_plan
-from .llm_client import call_llm
-from .entity_extraction import EntityExtractor
+from .planner import build_execution_plan, build_execution_plan_async
+from .llm_client import OllamaClient, llm_client, call_llm, call_llm_async, stream_llm_async
+from .entity_extraction import EntityExtractor, GazetteerEntityExtractor
+from .plan_cache import PlanCache, plan_cache
+from .scheduler import LLMScheduler, LLMQueueFullError, llm_scheduler
 
-__all__ = ["build_execution_plan", "call_llm", "EntityExtractor"]
+__all__ = [
+    "build_execution_plan",
+    "build_execution_plan_async",
+    "OllamaClient",
+    "llm_client",
+    "call_llm",
+    "call_llm_async",
+    "stream_llm_async",
+    "EntityExtractor",
+    "GazetteerEntityExtractor",
+    "PlanCache",
+    "plan_cache",
+    "LLMScheduler",
+    "LLMQueueFullError",
+    "llm_scheduler"
+]
@@ -1,18 +1,52 @@
 """Entity extractor using LLM for both biomedical and general health queries"""
 
 import json
-import requests
-from config.settings import OLLAMA_URL, LLM_MODEL, LLM_TIMEOUT
+from config.settings import GAZETTEER_VOCAB_DIR, GAZETTEER_INDEX_PATH
+from data.clients.http import run_sync
+from .gazetteer import load_gazetteer
+from .llm_client import llm_client
+from .scheduler import llm_scheduler, PRIORITY_PLAN
+
+_gazetteer = None
+
+
+def get_gazetteer():
+    """Load the shared gazetteer on first use"""
+    global _gazetteer
+    if _gazetteer is None:
+        _gazetteer = load_gazetteer(GAZETTEER_VOCAB_DIR, GAZETTEER_INDEX_PATH)
+    return _gazetteer
+
+
+class GazetteerEntityExtractor:
+    """Offline drop-in for EntityExtractor backed by bundled term lists"""
+
+    def __init__(self, gazetteer=None):
+        self.gazetteer = gazetteer or get_gazetteer()
+
+    def extract(self, query: str) -> dict:
+        """
+        Extract entities from query with a single pass over the text.
+        
+        Returns:
+            Dict with diseases, drugs, therapies, symptoms, and topics
+        """
+        return self.gazetteer.extract(query)
 
 
 class EntityExtractor:
     """Extracts entities from health and biomedical queries"""
     
-    def __init__(self):
-        self.url = OLLAMA_URL
-        self.model = LLM_MODEL
+    def __init__(self, client=None):
+        self.client = client or llm_client
+        self.url = self.client.url
+        self.model = self.client.model
 
     def extract(self, query: str) -> dict:
+        """Extract entities from query (sync wrapper)"""
+        return run_sync(self.extract_async(query))
+
+    async def extract_async(self, query: str) -> dict:
         """
         Extract entities from query for both biomedical and general health contexts.
         
@@ -47,14 +81,8 @@ Query:
 """
 
         try:
-            response = requests.post(
-                self.url,
-                json={"model": self.model, "prompt": prompt, "stream": False},
-                timeout=LLM_TIMEOUT
-            )
-            response.raise_for_status()
-            
-            output = response.json()["response"].strip()
+            async with llm_scheduler.slot(PRIORITY_PLAN):
+                output = (await self.client.generate(prompt, json_mode=True)).strip()
 
             # Extract JSON from response
             start = output.find("{")
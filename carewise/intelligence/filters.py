@@ -0,0 +1,88 @@
+"""
+Source filter extraction.
+Pulls structured constraints out of the query text (trial recruitment status,
+trial phase) so sources can filter server-side. Deterministic, so it applies
+the same way to rule-based and LLM plans.
+"""
+
+import re
+
+# (pattern, ClinicalTrials.gov overallStatus values); checked in order, first match of a span wins
+TRIAL_STATUS_RULES = [
+    (r"\bnot yet recruiting\b", ["NOT_YET_RECRUITING"]),
+    (r"\b(currently |actively |now )?recruiting\b|\benrolling\b|\bopen (clinical )?trials?\b", ["RECRUITING"]),
+    (r"\b(ongoing|active) (clinical )?trials?\b", ["RECRUITING", "ACTIVE_NOT_RECRUITING", "ENROLLING_BY_INVITATION"]),
+    (r"\bcompleted\b", ["COMPLETED"]),
+    (r"\bterminated\b", ["TERMINATED"]),
+    (r"\bsuspended\b", ["SUSPENDED"]),
+    (r"\bwithdrawn\b", ["WITHDRAWN"]),
+]
+
+PHASE_NAMES = {"1": "PHASE1", "i": "PHASE1", "2": "PHASE2", "ii": "PHASE2",
+               "3": "PHASE3", "iii": "PHASE3", "4": "PHASE4", "iv": "PHASE4"}
+
+_STATUS_RULES = [(re.compile(pattern), statuses) for pattern, statuses in TRIAL_STATUS_RULES]
+_EARLY_PHASE = re.compile(r"\bearly phase (1|i)\b")
+_PHASE = re.compile(r"\bphases? (iv|i{1,3}|[1-4])(?:\s*(?:/|-|and|or|,)\s*(iv|i{1,3}|[1-4]))?\b")
+
+
+def extract_trial_filters(query: str) -> dict:
+    """
+    Trial filters mentioned in the query.
+
+    Returns:
+        Dict with optional "status" (overallStatus values) and "phase" (phase values)
+    """
+    text = query.lower()
+    filters = {}
+
+    statuses = []
+    for pattern, values in _STATUS_RULES:
+        if pattern.search(text):
+            statuses.extend(v for v in values if v not in statuses)
+            if values == ["NOT_YET_RECRUITING"]:
+                # "not yet recruiting" must not also select RECRUITING
+                text = pattern.sub(" ", text)
+    if statuses:
+        filters["status"] = statuses
+
+    phases = []
+    if _EARLY_PHASE.search(text):
+        phases.append("EARLY_PHASE1")
+        text = _EARLY_PHASE.sub(" ", text)
+    for match in _PHASE.finditer(text):
+        for group in match.groups():
+            if group and PHASE_NAMES[group] not in phases:
+                phases.append(PHASE_NAMES[group])
+    if phases:
+        filters["phase"] = phases
+
+    return filters
+
+
+def filter_values(value) -> list:
+    """A filter value as a list of strings ("RECRUITING" -> ["RECRUITING"]); LLM plans use either form"""
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [str(item) for item in value if item]
+    return [str(value)] if value else []
+
+
+def attach_source_filters(plan: dict, query: str) -> dict:
+    """
+    Add server-side filters for the plan's sources under plan["filters"].
+    Filters already in the plan (from the LLM) are kept, with every value
+    normalized to a list; ones extracted from the query text take precedence.
+    """
+    filters = {
+        source: {name: filter_values(value) for name, value in source_filters.items()}
+        for source, source_filters in plan.get("filters", {}).items()
+    }
+    if "ClinicalTrials" in plan.get("sources", []):
+        trial_filters = extract_trial_filters(query)
+        if trial_filters:
+            filters["ClinicalTrials"] = trial_filters
+    if filters:
+        plan["filters"] = filters
+    return plan
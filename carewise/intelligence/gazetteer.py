@@ -0,0 +1,252 @@
+"""
+Gazetteer for offline entity extraction.
+Builds an Aho-Corasick automaton over all vocabulary terms so a query is
+scanned once, in time linear in its length, however many terms are loaded.
+The compiled automaton can be saved as plain JSON (never pickle, so a
+tampered index file cannot run code) and is reused while the term lists match.
+"""
+
+import hashlib
+import json
+import os
+from .schema import ENTITY_KEYS
+from .vocabulary import VOCABULARIES
+
+INDEX_FORMAT_VERSION = 2
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, unify apostrophes and collapse whitespace"""
+    text = text.lower().replace("’", "'").replace("‘", "'")
+    return " ".join(text.split())
+
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == "-"
+
+
+def _surface_forms(term):
+    # Simple plurals on the last word ("headaches", "trials") map back to the term
+    yield term
+    if term[-1].isalpha():
+        yield term + "s"
+        if term.endswith(("s", "x", "z", "ch", "sh")):
+            yield term + "es"
+
+
+class AhoCorasick:
+    """Multi-pattern string matcher (goto/fail/output automaton)"""
+
+    def __init__(self, patterns, tables=None):
+        """
+        Args:
+            patterns: Iterable of pattern strings; a pattern's id is its index
+            tables: Previously compiled (goto, fail, output, dict_link), see to_dict()
+        """
+        self.patterns = list(patterns)
+        if tables is not None:
+            self.goto, self.fail, self.output, self.dict_link = tables
+            return
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [-1]      # Pattern id ending exactly at this node, or -1
+        self.dict_link = [0]    # Nearest node on the fail chain with an output
+        for pattern_id, pattern in enumerate(self.patterns):
+            self._add(pattern, pattern_id)
+        self._link()
+
+    def to_dict(self) -> dict:
+        return {"goto": self.goto, "fail": self.fail, "output": self.output, "dict_link": self.dict_link}
+
+    def _add(self, pattern, pattern_id):
+        node = 0
+        for ch in pattern:
+            nxt = self.goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[node][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(-1)
+                self.dict_link.append(0)
+            node = nxt
+        self.output[node] = pattern_id
+
+    def _link(self):
+        # Breadth-first so every fail target is finished before it is used
+        queue = list(self.goto[0].values())
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            for ch, child in self.goto[node].items():
+                queue.append(child)
+                state = self.fail[node]
+                while state and ch not in self.goto[state]:
+                    state = self.fail[state]
+                target = self.goto[state].get(ch, 0)
+                self.fail[child] = target if target != child else 0
+                fallback = self.fail[child]
+                self.dict_link[child] = fallback if self.output[fallback] != -1 else self.dict_link[fallback]
+
+    def iter_matches(self, text):
+        """Yield (start, end, pattern_id) for every occurrence of every pattern"""
+        goto, fail, output, dict_link, patterns = self.goto, self.fail, self.output, self.dict_link, self.patterns
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            hit = node if output[node] != -1 else dict_link[node]
+            while hit:
+                pattern_id = output[hit]
+                yield i + 1 - len(patterns[pattern_id]), i + 1, pattern_id
+                hit = dict_link[hit]
+
+
+class Gazetteer:
+    """Term lists compiled into a single automaton, mapping surface forms to (category, term)"""
+
+    def __init__(self, vocabularies: dict = None):
+        if vocabularies is None:
+            return
+        surfaces = {}
+        for category, terms in vocabularies.items():
+            for term in terms:
+                term = normalize_text(term)
+                if not term:
+                    continue
+                for surface in _surface_forms(term):
+                    entry = surfaces.setdefault(surface, [])
+                    if (category, term) not in entry:
+                        entry.append((category, term))
+        self.surfaces = list(surfaces)
+        self.labels = [surfaces[surface] for surface in self.surfaces]
+        self.automaton = AhoCorasick(self.surfaces)
+        self.term_count = sum(len(terms) for terms in vocabularies.values())
+
+    def to_dict(self) -> dict:
+        return {
+            "surfaces": self.surfaces,
+            "labels": self.labels,
+            "term_count": self.term_count,
+            "automaton": self.automaton.to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        gazetteer = cls()
+        gazetteer.surfaces = data["surfaces"]
+        gazetteer.labels = [[tuple(label) for label in labels] for labels in data["labels"]]
+        gazetteer.term_count = data["term_count"]
+        tables = data["automaton"]
+        gazetteer.automaton = AhoCorasick(
+            gazetteer.surfaces, (tables["goto"], tables["fail"], tables["output"], tables["dict_link"])
+        )
+        return gazetteer
+
+    def find(self, text: str):
+        """
+        Return non-overlapping (start, end, labels) spans, preferring the
+        leftmost then longest match and requiring word boundaries on both ends.
+        """
+        text = normalize_text(text)
+        candidates = []
+        for start, end, pattern_id in self.automaton.iter_matches(text):
+            if start > 0 and _is_word_char(text[start - 1]):
+                continue
+            if end < len(text) and _is_word_char(text[end]):
+                continue
+            candidates.append((start, end, pattern_id))
+
+        candidates.sort(key=lambda match: (match[0], match[0] - match[1]))
+        spans = []
+        covered_until = 0
+        for start, end, pattern_id in candidates:
+            if start < covered_until:
+                continue
+            spans.append((start, end, self.labels[pattern_id]))
+            covered_until = end
+        return spans
+
+    def extract(self, text: str) -> dict:
+        """Group matched terms by entity category"""
+        entities = {key: [] for key in ENTITY_KEYS}
+        for _, _, labels in self.find(text):
+            for category, term in labels:
+                if term not in entities[category]:
+                    entities[category].append(term)
+        return entities
+
+
+def read_vocabulary_dir(path: str) -> dict:
+    """
+    Load extra term lists from a directory of <category>.txt files
+    (one term per line, '#' starts a comment), e.g. drugs.txt, diseases.txt.
+    """
+    vocabularies = {}
+    for category in ENTITY_KEYS:
+        file_path = os.path.join(path, f"{category}.txt")
+        if not os.path.exists(file_path):
+            continue
+        with open(file_path, encoding="utf-8") as f:
+            terms = {line.split("#", 1)[0].strip() for line in f}
+        vocabularies[category] = {term for term in terms if term}
+    return vocabularies
+
+
+def bundled_vocabularies(vocab_dir=None) -> dict:
+    """
+    Curated term lists plus WHO indicator topics plus any loadable files.
+    WHO topics that are already e.g. diseases ("diabetes") stay in that
+    category only, so a query does not yield the same term twice.
+    """
+    from data.clients.who import WHO_INDICATOR_MAP
+
+    vocabularies = {category: set(terms) for category, terms in VOCABULARIES.items()}
+    claimed = {
+        normalize_text(term)
+        for category, terms in vocabularies.items() if category != "topics"
+        for term in terms
+    }
+    vocabularies["topics"].update(topic for topic in WHO_INDICATOR_MAP if normalize_text(topic) not in claimed)
+    if vocab_dir:
+        for category, terms in read_vocabulary_dir(vocab_dir).items():
+            vocabularies[category].update(terms)
+    return vocabularies
+
+
+def _fingerprint(vocabularies):
+    digest = hashlib.sha256(str(INDEX_FORMAT_VERSION).encode())
+    for category in sorted(vocabularies):
+        digest.update(category.encode())
+        for term in sorted(vocabularies[category]):
+            digest.update(b"\0" + term.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def load_gazetteer(vocab_dir=None, index_path=None) -> Gazetteer:
+    """
+    Build the gazetteer, reusing a JSON index when its vocabulary fingerprint matches.
+    The index is rewritten whenever the term lists change.
+    """
+    vocabularies = bundled_vocabularies(vocab_dir)
+    fingerprint = _fingerprint(vocabularies)
+
+    if index_path and os.path.exists(index_path):
+        try:
+            with open(index_path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("fingerprint") == fingerprint:
+                return Gazetteer.from_dict(data)
+        except Exception as e:
+            print(f"Gazetteer index unreadable, rebuilding: {e}")
+
+    gazetteer = Gazetteer(vocabularies)
+    if index_path:
+        tmp_path = f"{index_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"fingerprint": fingerprint, **gazetteer.to_dict()}, f, ensure_ascii=False,
+                      separators=(",", ":"))
+        os.replace(tmp_path, index_path)
+    return gazetteer
@@ -0,0 +1,155 @@
+"""Local repair of almost-JSON LLM output, so trivial syntax slips don't cost an LLM retry"""
+
+import json
+import re
+from .schema import ENTITY_KEYS
+
+_FENCE = re.compile(r"```(?:json|JSON)?\s*(.*?)```", re.DOTALL)
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+def _strip_fences(text):
+    match = _FENCE.search(text)
+    return match.group(1) if match else text
+
+
+def _outer_object(text):
+    """Slice from the first '{' to its matching '}' (or to the end if never closed)"""
+    start = text.find("{")
+    if start == -1:
+        return None
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            depth += 1
+        elif ch in "}]":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return text[start:]
+
+
+def _close_brackets(text):
+    """Append whatever closing brackets/quotes a truncated object is missing"""
+    stack = []
+    in_string = False
+    escaped = False
+    for ch in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]" and stack:
+            stack.pop()
+    if in_string:
+        text += '"'
+    return text.rstrip().rstrip(",") + "".join(reversed(stack))
+
+
+def _strip_comments(text):
+    """Drop // line comments that sit outside string literals"""
+    out = []
+    in_string = False
+    escaped = False
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == "/" and text.startswith("//", i):
+            newline = text.find("\n", i)
+            i = len(text) if newline == -1 else newline
+            continue
+        out.append(ch)
+        i += 1
+    return "".join(out)
+
+
+def _fix_syntax(text):
+    text = text.replace("“", '"').replace("”", '"').replace("‘", "'").replace("’", "'")
+    text = _strip_comments(text)
+    # Single-quoted keys/values -> double quotes (only when no double quotes are present)
+    if '"' not in text:
+        text = text.replace("'", '"')
+    text = re.sub(r"\b(True|False|None)\b", lambda m: _PY_LITERALS[m.group(1)], text)
+    text = _TRAILING_COMMA.sub(r"\1", text)
+    return text
+
+
+def repair_json(raw_output: str):
+    """
+    Try to recover a JSON object from raw LLM output.
+
+    Handles markdown fences, prose around the object, trailing commas,
+    comments, Python literals, smart/single quotes and truncated output.
+
+    Returns:
+        The parsed dict, or None if the output could not be repaired
+    """
+    if not raw_output:
+        return None
+    text = _outer_object(_strip_fences(raw_output))
+    if text is None:
+        return None
+
+    for candidate in (text, _fix_syntax(text), _close_brackets(_fix_syntax(text))):
+        try:
+            parsed = json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+        return parsed if isinstance(parsed, dict) else None
+    return None
+
+
+def fill_plan_defaults(plan: dict) -> bool:
+    """
+    Fill missing entity keys and flags with defaults, in place.
+
+    Returns:
+        True if anything had to be filled in
+    """
+    changed = False
+    entities = plan.get("entities")
+    if not isinstance(entities, dict):
+        entities = {}
+        plan["entities"] = entities
+        changed = True
+    for key in ENTITY_KEYS:
+        value = entities.get(key)
+        if value is None:
+            entities[key] = []
+            changed = True
+        elif isinstance(value, str):
+            entities[key] = [value] if value else []
+            changed = True
+    if not isinstance(plan.get("analysis_required"), bool):
+        plan["analysis_required"] = bool(plan.get("analysis_required", False))
+        changed = True
+    return changed
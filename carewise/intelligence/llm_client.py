@@ -1,32 +1,288 @@
 """LLM interface using Ollama for local inference"""
 
-import requests
-from config.settings import OLLAMA_URL, LLM_MODEL, LLM_TIMEOUT
+import asyncio
+import json
+import time
+from collections import deque
+import httpx
+from config.settings import (
+    OLLAMA_URLS, LLM_MODEL, LLM_TIMEOUT, LLM_KEEP_ALIVE, LLM_MAX_CONNECTIONS
+)
+from data.clients.http import register_close_hook, run_sync
+from data.clients.replay import replay_transport
+from telemetry import metrics, record_span
+from .load_balancer import EndpointPool
+from .scheduler import llm_scheduler, PRIORITY_ANSWER
 
 
-def call_llm(prompt: str) -> str:
-    """Call the local Ollama LLM with a prompt."""
-    try:
-        response = requests.post(
-            OLLAMA_URL,
-            json={"model": LLM_MODEL, "prompt": prompt, "stream": False},
-            timeout=LLM_TIMEOUT
-        )
-        response.raise_for_status()
-        return response.json()["response"]
-    except requests.exceptions.ConnectionError:
-        raise RuntimeError(
-            f"Cannot connect to Ollama at {OLLAMA_URL}. "
+LLM_SECONDS = metrics.histogram("carewise_llm_duration_seconds", "Latency of LLM calls", ["kind"])
+LLM_TTFT_SECONDS = metrics.histogram("carewise_llm_ttft_seconds", "LLM time to first token", ["kind"])
+LLM_TOKENS = metrics.counter("carewise_llm_tokens_total", "Tokens generated by the LLM", ["kind"])
+
+
+class OllamaClient:
+    """
+    Reusable Ollama client.
+    Holds a keep-alive connection pool, balances calls across the configured
+    Ollama endpoints, asks Ollama to keep the model resident, and records
+    latency and time-to-first-token for every call.
+    """
+
+    def __init__(self, urls=OLLAMA_URLS, model=LLM_MODEL, timeout=LLM_TIMEOUT,
+                 keep_alive=LLM_KEEP_ALIVE, max_connections=LLM_MAX_CONNECTIONS, pool=None):
+        self.pool = pool or EndpointPool(urls)
+        self.model = model
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+        self.max_connections = max_connections
+        self.calls = 0
+        self.errors = 0
+        self.recent_calls = deque(maxlen=100)
+        self._client = None
+        self._client_loop = None
+        self._retired = []    # clients left behind by a previous event loop
+
+    @property
+    def url(self):
+        """Primary endpoint URL"""
+        return self.pool.endpoints[0].url
+
+    def _http(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._client_loop is not loop:
+            if self._client is not None and not self._client.is_closed:
+                # Bound to the previous loop: close it there if that loop still runs, else in aclose()
+                if self._client_loop.is_running():
+                    asyncio.run_coroutine_threadsafe(self._client.aclose(), self._client_loop)
+                else:
+                    self._retired.append(self._client)
+            limits = httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections
+            )
+            self._client = httpx.AsyncClient(limits=limits, timeout=self.timeout, transport=replay_transport(limits))
+            self._client_loop = loop
+        return self._client
+
+    def _payload(self, prompt, stream, json_mode=False):
+        payload = {"model": self.model, "prompt": prompt, "stream": stream, "keep_alive": self.keep_alive}
+        if json_mode:
+            payload["format"] = "json"
+        return payload
+
+    def _record(self, started, ttft, tokens, load_ms=None, kind="generate"):
+        call = {
+            "kind": kind,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+            "ttft_ms": round(ttft * 1000, 1) if ttft is not None else None,
+            "tokens": tokens,
+            "load_ms": load_ms
+        }
+        self.calls += 1
+        self.recent_calls.append(call)
+        LLM_SECONDS.observe(call["latency_ms"] / 1000, kind=kind)
+        if ttft is not None:
+            LLM_TTFT_SECONDS.observe(ttft, kind=kind)
+        LLM_TOKENS.inc(tokens or 0, kind=kind)
+        record_span("llm", call["latency_ms"] / 1000, kind=kind, tokens=tokens)
+        return call
+
+    def _connection_error(self, url):
+        return RuntimeError(
+            f"Cannot connect to Ollama at {url}. "
             "Please ensure Ollama is running with: ollama serve"
         )
-    except requests.exceptions.HTTPError as e:
-        error_detail = ""
-        try:
-            error_detail = response.json().get("error", "")
-        except:
-            pass
-        raise RuntimeError(
+
+    def _timeout_error(self, url):
+        return RuntimeError(f"Ollama at {url} did not answer within {self.timeout}s")
+
+    def _status_error(self, e, error_detail=""):
+        return RuntimeError(
             f"Ollama API error: {e}. "
             f"Detail: {error_detail}. "
-            f"Make sure model '{LLM_MODEL}' is installed with: ollama pull {LLM_MODEL}"
+            f"Make sure model '{self.model}' is installed with: ollama pull {self.model}"
         )
+
+    async def _post(self, prompt, payload):
+        """POST to the chosen endpoint, failing over to another one if it refuses connections or times out"""
+        tried = []
+        while True:
+            endpoint = self.pool.pick(prompt, exclude=tried)
+            self.pool.begin(endpoint)
+            ok = False
+            try:
+                response = await self._http().post(endpoint.url, json=payload)
+                response.raise_for_status()
+                ok = True
+                return response
+            except (httpx.ConnectError, httpx.TimeoutException) as e:
+                tried.append(endpoint)
+                if len(tried) < len(self.pool.endpoints):
+                    continue
+                self.errors += 1
+                if isinstance(e, httpx.TimeoutException):
+                    raise self._timeout_error(endpoint.url)
+                raise self._connection_error(endpoint.url)
+            except httpx.HTTPStatusError as e:
+                # 4xx (e.g. unknown model) is not the endpoint's fault
+                ok = e.response.status_code < 500
+                self.errors += 1
+                error_detail = ""
+                try:
+                    error_detail = e.response.json().get("error", "")
+                except:
+                    pass
+                raise self._status_error(e, error_detail)
+            finally:
+                self.pool.end(endpoint, ok)
+
+    async def generate(self, prompt: str, json_mode: bool = False) -> str:
+        """
+        Run a non-streaming completion.
+        Time-to-first-token comes from Ollama's own load + prompt-eval timings.
+        """
+        started = time.perf_counter()
+        response = await self._post(prompt, self._payload(prompt, False, json_mode))
+
+        body = response.json()
+        load_ns = body.get("load_duration", 0)
+        prefill_ns = body.get("prompt_eval_duration", 0)
+        ttft = (load_ns + prefill_ns) / 1e9 if (load_ns or prefill_ns) else None
+        self._record(started, ttft, body.get("eval_count"), round(load_ns / 1e6, 1))
+        return body["response"]
+
+    async def stream(self, prompt: str):
+        """
+        Stream a completion token by token.
+        Ollama's streaming mode returns one JSON object per line until "done" is true.
+        """
+        started = time.perf_counter()
+        ttft = None
+        tokens = 0
+        tried = []
+        while True:
+            endpoint = self.pool.pick(prompt, exclude=tried)
+            self.pool.begin(endpoint)
+            ok = False
+            try:
+                async for token in self._stream_from(endpoint, prompt):
+                    if ttft is None:
+                        ttft = time.perf_counter() - started
+                    tokens += 1
+                    yield token
+                ok = True
+                break
+            except (GeneratorExit, asyncio.CancelledError):
+                # Consumer stopped reading; not the endpoint's fault
+                ok = True
+                raise
+            except (httpx.ConnectError, httpx.TimeoutException) as e:
+                tried.append(endpoint)
+                if tokens == 0 and len(tried) < len(self.pool.endpoints):
+                    continue
+                self.errors += 1
+                if isinstance(e, httpx.TimeoutException):
+                    raise self._timeout_error(endpoint.url)
+                raise self._connection_error(endpoint.url)
+            except httpx.HTTPStatusError as e:
+                ok = e.response.status_code < 500
+                self.errors += 1
+                raise self._status_error(e)
+            finally:
+                self.pool.end(endpoint, ok)
+        self._record(started, ttft, tokens, kind="stream")
+
+    async def _stream_from(self, endpoint, prompt):
+        async with self._http().stream("POST", endpoint.url, json=self._payload(prompt, True)) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise RuntimeError(f"Ollama API error: {chunk['error']}")
+                if chunk.get("response"):
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    break
+
+    async def warm_up(self) -> bool:
+        """
+        Load the model into memory on every endpoint ahead of the first user query.
+        An empty prompt makes Ollama load the model without generating anything.
+        """
+        results = await asyncio.gather(*(self._warm_endpoint(e) for e in self.pool.endpoints))
+        return all(results)
+
+    async def _warm_endpoint(self, endpoint) -> bool:
+        started = time.perf_counter()
+        try:
+            response = await self._http().post(endpoint.url, json=self._payload("", False))
+            response.raise_for_status()
+        except Exception as e:
+            print(f"⚠️ LLM warm-up failed for {endpoint.url}: {e}")
+            return False
+        load_ns = response.json().get("load_duration", 0)
+        call = self._record(started, None, 0, round(load_ns / 1e6, 1), kind="warm_up")
+        print(f"🔥 LLM '{self.model}' warm on {endpoint.url} in {call['latency_ms']:.0f}ms")
+        return True
+
+    async def run_health_prober(self):
+        """Background task re-probing ejected endpoints (started from the API lifespan)"""
+        await self.pool.run_prober(self._http)
+
+    async def aclose(self):
+        """Close the connection pool (and any left behind by an earlier event loop)"""
+        for client in [*self._retired, self._client]:
+            if client is not None and not client.is_closed:
+                try:
+                    await client.aclose()
+                except RuntimeError:
+                    # Pool belonged to an event loop that is already closed
+                    pass
+        self._retired.clear()
+        self._client = None
+        self._client_loop = None
+
+    def stats(self) -> dict:
+        """Call counts plus latency/TTFT of recent calls"""
+        latencies = sorted(c["latency_ms"] for c in self.recent_calls if c["kind"] != "warm_up")
+        ttfts = sorted(c["ttft_ms"] for c in self.recent_calls if c["ttft_ms"] is not None)
+
+        def median(values):
+            return values[len(values) // 2] if values else None
+
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "endpoints": self.pool.stats(),
+            "median_latency_ms": median(latencies),
+            "median_ttft_ms": median(ttfts),
+            "last_call": self.recent_calls[-1] if self.recent_calls else None
+        }
+
+
+llm_client = OllamaClient()
+register_close_hook(llm_client.aclose)
+
+
+async def call_llm_async(prompt: str, json_mode: bool = False, priority: int = PRIORITY_ANSWER) -> str:
+    """
+    Call the local Ollama LLM with a prompt without blocking the event loop.
+    With json_mode, Ollama constrains decoding to valid JSON (format: json).
+    The call waits for a scheduler slot; lower priority values run first.
+    """
+    async with llm_scheduler.slot(priority):
+        return await llm_client.generate(prompt, json_mode)
+
+
+async def stream_llm_async(prompt: str, priority: int = PRIORITY_ANSWER):
+    """Stream a completion from Ollama token by token, holding a scheduler slot throughout."""
+    async with llm_scheduler.slot(priority):
+        async for token in llm_client.stream(prompt):
+            yield token
+
+
+def call_llm(prompt: str, json_mode: bool = False, priority: int = PRIORITY_ANSWER) -> str:
+    """Call the local Ollama LLM with a prompt."""
+    return run_sync(call_llm_async(prompt, json_mode, priority))
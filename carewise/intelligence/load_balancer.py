@@ -0,0 +1,117 @@
+"""
+Ollama endpoint pool.
+Routes each LLM call to the endpoint with the fewest outstanding requests,
+ejects endpoints that keep failing and re-probes them periodically, and
+keeps prompts with the same prefix on the same endpoint (so its KV cache is
+reused) as long as that endpoint is no busier than the least loaded one.
+"""
+
+import asyncio
+import hashlib
+import time
+from config.settings import (
+    OLLAMA_URLS, LLM_ENDPOINT_FAILURE_THRESHOLD, LLM_ENDPOINT_PROBE_INTERVAL, LLM_STICKY_PREFIX_CHARS
+)
+
+
+class Endpoint:
+    """One Ollama generate URL and its load/health state"""
+
+    def __init__(self, url):
+        self.url = url
+        self.outstanding = 0
+        self.served = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.healthy = True
+        self.ejected_at = None
+
+    @property
+    def health_url(self):
+        return self.url.rsplit("/api/", 1)[0] + "/api/tags"
+
+    def stats(self) -> dict:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "served": self.served,
+            "failures": self.failures
+        }
+
+
+class EndpointPool:
+    """Least-outstanding-requests balancer with ejection and prefix stickiness"""
+
+    def __init__(self, urls=OLLAMA_URLS, failure_threshold=LLM_ENDPOINT_FAILURE_THRESHOLD,
+                 probe_interval=LLM_ENDPOINT_PROBE_INTERVAL, sticky_prefix_chars=LLM_STICKY_PREFIX_CHARS):
+        if not urls:
+            raise ValueError("At least one Ollama endpoint is required")
+        self.endpoints = [Endpoint(url) for url in urls]
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+        self.sticky_prefix_chars = sticky_prefix_chars
+
+    def _rendezvous(self, prefix, endpoints):
+        # Highest-random-weight hashing: stable owner per prefix, minimal reshuffle on ejection
+        def weight(endpoint):
+            return hashlib.blake2b(f"{endpoint.url}|{prefix}".encode(), digest_size=8).digest()
+        return sorted(endpoints, key=weight, reverse=True)
+
+    def pick(self, prompt: str = "", exclude=()) -> Endpoint:
+        """Choose an endpoint for a prompt"""
+        candidates = [e for e in self.endpoints if e.healthy and e not in exclude]
+        if not candidates:
+            # Everything is ejected: try the remaining endpoints anyway rather than fail outright
+            candidates = [e for e in self.endpoints if e not in exclude] or self.endpoints
+
+        # Rendezvous order breaks ties, so an idle pool keeps a prefix on its owner
+        ranked = self._rendezvous(prompt[:self.sticky_prefix_chars], candidates)
+        least = min(e.outstanding for e in ranked)
+        return next(e for e in ranked if e.outstanding == least)
+
+    def begin(self, endpoint: Endpoint):
+        endpoint.outstanding += 1
+
+    def end(self, endpoint: Endpoint, ok: bool):
+        endpoint.outstanding -= 1
+        if ok:
+            endpoint.served += 1
+            endpoint.consecutive_failures = 0
+            self._restore(endpoint)
+        else:
+            endpoint.failures += 1
+            endpoint.consecutive_failures += 1
+            if endpoint.healthy and endpoint.consecutive_failures >= self.failure_threshold:
+                endpoint.healthy = False
+                endpoint.ejected_at = time.monotonic()
+                print(f"⚠️ LLM endpoint ejected: {endpoint.url}")
+
+    def _restore(self, endpoint):
+        if not endpoint.healthy:
+            endpoint.healthy = True
+            endpoint.ejected_at = None
+            endpoint.consecutive_failures = 0
+            print(f"✅ LLM endpoint restored: {endpoint.url}")
+
+    async def probe_ejected(self, http):
+        """Probe every ejected endpoint once and restore the ones that answer"""
+        for endpoint in self.endpoints:
+            if endpoint.healthy:
+                continue
+            try:
+                response = await http.get(endpoint.health_url, timeout=5)
+                if response.status_code == 200:
+                    self._restore(endpoint)
+            except Exception:
+                endpoint.ejected_at = time.monotonic()
+
+    async def run_prober(self, http_factory):
+        """Background loop re-probing ejected endpoints every probe_interval seconds"""
+        while True:
+            await asyncio.sleep(self.probe_interval)
+            if any(not e.healthy for e in self.endpoints):
+                await self.probe_ejected(http_factory())
+
+    def stats(self) -> list:
+        return [endpoint.stats() for endpoint in self.endpoints]
@@ -0,0 +1,119 @@
+"""Execution plan cache - in-process LRU with TTL, optionally persisted to SQLite"""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from config.settings import PLAN_CACHE_SIZE, PLAN_CACHE_TTL, PLAN_CACHE_PATH
+from .validator import validate_execution_plan
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a query so trivial variations share a cache entry.
+    Lowercases, drops punctuation (keeping intra-word hyphens like "covid-19")
+    and collapses whitespace.
+    """
+    text = query.lower()
+    text = re.sub(r"[^\w\s-]", " ", text)
+    text = re.sub(r"(?<!\w)-|-(?!\w)", " ", text)
+    return " ".join(text.split())
+
+
+class PlanCache:
+    """LRU + TTL cache of validated execution plans keyed by normalized query"""
+
+    def __init__(self, max_size=PLAN_CACHE_SIZE, ttl=PLAN_CACHE_TTL, path=PLAN_CACHE_PATH):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS plans (key TEXT PRIMARY KEY, plan TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def get(self, query: str):
+        """Return a cached plan for the query, or None"""
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._db is not None:
+                entry = self._load(key)
+            if entry is not None and now - entry[1] > self.ttl:
+                self._evict(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._trim()
+            self.hits += 1
+            return json.loads(entry[0])
+
+    def put(self, query: str, plan: dict) -> bool:
+        """Store a plan if it passes validation. Returns True when stored."""
+        valid, _ = validate_execution_plan(plan)
+        if not valid:
+            return False
+        key = normalize_query(query)
+        entry = (json.dumps(plan), time.time())
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._trim()
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO plans VALUES (?, ?, ?)", (key, entry[0], entry[1]))
+                self._db.commit()
+        return True
+
+    def clear(self):
+        """Drop all cached plans and reset counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM plans")
+                self._db.commit()
+
+    def stats(self) -> dict:
+        """Hit/miss counters for monitoring"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "persistent": self._db is not None
+        }
+
+    def _load(self, key):
+        row = self._db.execute("SELECT plan, created FROM plans WHERE key = ?", (key,)).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def _evict(self, key):
+        self._entries.pop(key, None)
+        if self._db is not None:
+            self._db.execute("DELETE FROM plans WHERE key = ?", (key,))
+            self._db.commit()
+
+    def _trim(self):
+        # Only the in-memory tier is size-bounded; SQLite keeps everything until TTL
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+plan_cache = PlanCache()
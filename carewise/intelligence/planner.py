@@ -3,34 +3,101 @@ Unified planner with self-healing logic for both biomedical and general health q
 """
 
 import json
-from .llm_client import call_llm
+from .llm_client import call_llm_async
+from .scheduler import PRIORITY_PLAN
 from .prompt import build_planner_prompt
 from .validator import validate_execution_plan
+from .plan_cache import plan_cache
+from .rule_planner import build_rule_plan
+from .json_repair import repair_json, fill_plan_defaults
+from .filters import attach_source_filters
+from config.settings import RULE_PLANNER_ENABLED, RULE_PLANNER_MIN_CONFIDENCE, LLM_JSON_MODE
+from data.clients.http import run_sync
+from telemetry import span
 
 MAX_RETRIES = 3
 
+# How each plan was produced, for /stats
+planner_stats = {
+    "cache_plans": 0,
+    "rule_plans": 0,
+    "llm_plans": 0,
+    "llm_calls": 0,
+    "repaired_locally": 0,   # Plans fixed without another LLM call
+    "llm_retries": 0         # Extra LLM calls spent on self-healing
+}
 
-def build_execution_plan(query: str) -> dict:
+
+async def build_execution_plan_async(query: str, use_cache: bool = True) -> dict:
     """
     Build a validated execution plan from a user query.
     Handles both biomedical research and general health queries.
-    Uses self-healing loop to automatically correct invalid LLM outputs.
+    Repeated queries are answered from the plan cache and obvious ones by the
+    rule-based planner; otherwise a self-healing loop automatically corrects
+    invalid LLM outputs.
     """
+    with span("plan") as attributes:
+        return await _build_plan(query, use_cache, attributes)
+
+
+async def _build_plan(query, use_cache, attributes):
+    """The planning steps; records on the span which planner answered and how many LLM attempts it took"""
+    if use_cache:
+        cached = plan_cache.get(query)
+        if cached is not None:
+            planner_stats["cache_plans"] += 1
+            attributes["planner"] = "cache"
+            return cached
+
+    if RULE_PLANNER_ENABLED:
+        plan, confidence = build_rule_plan(query)
+        if confidence >= RULE_PLANNER_MIN_CONFIDENCE:
+            planner_stats["rule_plans"] += 1
+            attributes["planner"] = "rule"
+            attach_source_filters(plan, query)
+            if use_cache:
+                plan_cache.put(query, plan)
+            return plan
+
     prompt = build_planner_prompt(query)
+    attributes["planner"] = "llm"
 
     for attempt in range(1, MAX_RETRIES + 1):
-        raw_output = call_llm(prompt)
+        attributes["llm_attempts"] = attempt
+        if attempt > 1:
+            planner_stats["llm_retries"] += 1
+        planner_stats["llm_calls"] += 1
+        raw_output = await call_llm_async(prompt, json_mode=LLM_JSON_MODE, priority=PRIORITY_PLAN)
 
+        # Repair trivial problems locally before spending another LLM call
+        repaired = False
         try:
             plan = json.loads(raw_output)
         except json.JSONDecodeError:
-            prompt += "\n\nYour previous output was INVALID JSON. Fix it."
-            continue
+            plan = repair_json(raw_output)
+            if plan is None:
+                prompt += "\n\nYour previous output was INVALID JSON. Fix it."
+                continue
+            repaired = True
+
+        if isinstance(plan, dict) and fill_plan_defaults(plan):
+            repaired = True
 
         valid, error = validate_execution_plan(plan)
         if valid:
+            planner_stats["llm_plans"] += 1
+            if repaired:
+                planner_stats["repaired_locally"] += 1
+            attach_source_filters(plan, query)
+            if use_cache:
+                plan_cache.put(query, plan)
             return plan
 
         prompt += f"\n\nERROR: {error}\nFix the JSON. Output ONLY valid JSON."
 
     raise RuntimeError("Failed to generate valid execution plan after retries")
+
+
+def build_execution_plan(query: str, use_cache: bool = True) -> dict:
+    """Build a validated execution plan from a user query (sync wrapper for the CLI)."""
+    return run_sync(build_execution_plan_async(query, use_cache))
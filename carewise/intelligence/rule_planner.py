@@ -0,0 +1,124 @@
+"""
+Rule-based fast-path planner.
+Classifies intent with keyword/pattern rules, extracts entities from curated
+term lists and applies the exact source routing table, so obvious queries are
+planned without an LLM round trip.
+"""
+
+import re
+from .schema import INTENT_SOURCES
+from .validator import validate_execution_plan
+from .entity_extraction import get_gazetteer
+
+# (intent, pattern, weight) - weights add up per intent
+INTENT_RULES = [
+    # Biomedical research intents
+    ("DRUG_SAFETY", r"\bside[- ]?effects?\b", 1.0),
+    ("DRUG_SAFETY", r"\badverse (reactions?|events?|effects?)\b", 1.0),
+    ("DRUG_SAFETY", r"\b(boxed|black box) warnings?\b", 1.0),
+    ("DRUG_SAFETY", r"\bwarnings?\b", 0.6),
+    ("DRUG_SAFETY", r"\bcontraindicat\w*\b", 0.8),
+    ("DRUG_SAFETY", r"\b(safety|toxicity|overdose|interactions?)\b", 0.6),
+    ("DRUG_SAFETY", r"\bis \w+ safe\b", 0.7),
+    ("CLINICAL_TRIALS", r"\bclinical trials?\b", 1.0),
+    ("CLINICAL_TRIALS", r"\btrials?\b", 0.8),
+    ("CLINICAL_TRIALS", r"\b(recruiting|enroll\w*)\b", 0.6),
+    ("CLINICAL_TRIALS", r"\bphase (i{1,3}|iv|[1-4])\b", 0.6),
+    ("COMPARATIVE_RESEARCH", r"\b(compare|comparing|comparison)\b", 1.0),
+    ("COMPARATIVE_RESEARCH", r"\b(vs\.?|versus)\b", 1.0),
+    ("COMPARATIVE_RESEARCH", r"\b(better|more effective|safer) than\b", 0.8),
+    ("COMPARATIVE_RESEARCH", r"\bdifference between\b", 0.8),
+    ("LITERATURE_REVIEW", r"\b(research|literature|publications?|papers?)\b", 0.9),
+    ("LITERATURE_REVIEW", r"\bstud(y|ies)\b", 0.8),
+    ("LITERATURE_REVIEW", r"\blatest (findings|advances|developments|evidence)\b", 0.8),
+    ("DATA_ANALYSIS", r"\bsurvival rates?\b", 1.0),
+    ("DATA_ANALYSIS", r"\b(meta-analys[ie]s|dataset|calculate|hazard ratio|odds ratio)\b", 1.0),
+    ("DATA_ANALYSIS", r"\b(efficacy|response|remission) rates?\b", 0.8),
+    # General health intents
+    ("SYMPTOMS_RELATED", r"\bsymptoms?\b", 1.0),
+    ("SYMPTOMS_RELATED", r"\bsigns? of\b", 0.8),
+    ("SYMPTOMS_RELATED", r"\bwhat causes?\b", 0.8),
+    ("SYMPTOMS_RELATED", r"\bi (have|feel|keep|am having|have been having)\b", 0.8),
+    ("SYMPTOMS_RELATED", r"\bwhy (do|does|am|is) (i|my)\b", 0.8),
+    ("INFORMATIONAL", r"\b(information|facts) (about|on)\b", 1.0),
+    ("INFORMATIONAL", r"\b(tell me about|explain|overview of)\b", 0.9),
+    ("INFORMATIONAL", r"\bhow is \w+( \w+)? (diagnosed|treated|spread|transmitted)\b", 0.8),
+    ("GENERAL_HEALTH", r"\bprevent(ion|ing)?\b", 1.0),
+    ("GENERAL_HEALTH", r"\b(healthy|lifestyle|wellness|wellbeing|well-being)\b", 0.9),
+    ("GENERAL_HEALTH", r"\b(diet|nutrition|exercise|physical activity|sleep)\b", 0.8),
+    ("GENERAL_HEALTH", r"\b(global|worldwide|prevalence|statistics|mortality)\b", 0.8),
+    ("GENERAL_HEALTH", r"\b(vaccin\w*|immuniz\w*|quit smoking)\b", 0.8),
+]
+
+# Generic question openers - only used when no specific rule matched
+FALLBACK_RULES = [
+    ("INFORMATIONAL", r"^(what|who) (is|are)\b", 0.9),
+]
+
+_COMPILED_RULES = [(intent, re.compile(pattern), weight) for intent, pattern, weight in INTENT_RULES]
+_COMPILED_FALLBACK_RULES = [(intent, re.compile(pattern), weight) for intent, pattern, weight in FALLBACK_RULES]
+
+
+def extract_entities(query: str) -> dict:
+    """Extract entities from the query using the bundled gazetteer"""
+    return get_gazetteer().extract(query)
+
+
+def classify_intent(query: str, entities: dict) -> tuple[str, float]:
+    """
+    Score every intent against the rules.
+
+    Returns:
+        Tuple of (best intent, confidence in [0, 1]). Confidence is the best
+        score (capped at 1) discounted by how close the runner-up came.
+    """
+    text = query.lower().strip()
+    scores = {}
+    for intent, pattern, weight in _COMPILED_RULES:
+        if pattern.search(text):
+            scores[intent] = scores.get(intent, 0.0) + weight
+    if not scores:
+        for intent, pattern, weight in _COMPILED_FALLBACK_RULES:
+            if pattern.search(text):
+                scores[intent] = max(scores.get(intent, 0.0), weight)
+
+    if not scores:
+        return "INFORMATIONAL", 0.0
+
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    best_intent, best = ranked[0]
+    runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+    confidence = min(best, 1.0) * (1.0 - runner_up / best)
+
+    # Intents whose sources depend on a particular entity type
+    if best_intent == "DRUG_SAFETY" and not entities["drugs"]:
+        confidence *= 0.5
+    if best_intent == "COMPARATIVE_RESEARCH" and sum(len(v) for v in entities.values()) < 2:
+        confidence *= 0.5
+    if not any(entities.values()):
+        confidence *= 0.5
+
+    return best_intent, round(confidence, 3)
+
+
+def build_rule_plan(query: str) -> tuple[dict, float]:
+    """
+    Plan a query without the LLM.
+
+    Returns:
+        Tuple of (plan, confidence). Confidence is 0 when the plan would not
+        pass validate_execution_plan.
+    """
+    entities = extract_entities(query)
+    intent, confidence = classify_intent(query, entities)
+    plan = {
+        "intent": intent,
+        "entities": entities,
+        "sources": list(INTENT_SOURCES[intent]),
+        "analysis_required": intent == "DATA_ANALYSIS"
+    }
+
+    valid, _ = validate_execution_plan(plan)
+    if not valid:
+        return plan, 0.0
+    return plan, confidence
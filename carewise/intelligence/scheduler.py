@@ -0,0 +1,118 @@
+"""
+LLM scheduler - admission control and priority queueing for Ollama calls.
+A bounded number of calls run at once (LLM_MAX_CONCURRENCY per Ollama
+endpoint); the rest wait in a priority queue (planner calls ahead of answer
+calls) and are rejected once the queue is full.
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from config.settings import OLLAMA_URLS, LLM_MAX_CONCURRENCY, LLM_MAX_QUEUE_DEPTH
+
+# Lower runs first
+PRIORITY_PLAN = 0
+PRIORITY_ANSWER = 1
+
+
+class LLMQueueFullError(RuntimeError):
+    """Raised when the LLM queue is over its depth limit"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"LLM queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class LLMScheduler:
+    """Bounded-concurrency priority scheduler for LLM calls"""
+
+    def __init__(self, max_concurrency=LLM_MAX_CONCURRENCY * len(OLLAMA_URLS), max_queue_depth=LLM_MAX_QUEUE_DEPTH):
+        self.max_concurrency = max_concurrency
+        self.max_queue_depth = max_queue_depth
+        self.active = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._waiters = []              # heap of (priority, seq, future)
+        self._seq = itertools.count()
+        self._waits = deque(maxlen=200)
+        self._service_times = deque(maxlen=200)
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    def retry_after(self) -> int:
+        """Seconds until a new call would likely be served"""
+        service = sorted(self._service_times)[len(self._service_times) // 2] if self._service_times else 5.0
+        rounds = (self.queue_depth + 1) / self.max_concurrency
+        return max(1, math.ceil(rounds * service))
+
+    def check_admission(self):
+        """Fail fast before doing any work if a new call would be rejected"""
+        if self.active >= self.max_concurrency and self.queue_depth >= self.max_queue_depth:
+            self.rejected += 1
+            raise LLMQueueFullError(self.retry_after())
+
+    async def acquire(self, priority: int = PRIORITY_ANSWER):
+        """Wait for a slot; raises LLMQueueFullError if the queue is full"""
+        started = time.perf_counter()
+        if self.active < self.max_concurrency and not self.queue_depth:
+            self.active += 1
+        else:
+            self.check_admission()
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (priority, next(self._seq), future))
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # The slot was handed to us just as we were cancelled
+                    self.release()
+                raise
+        self.admitted += 1
+        self._waits.append(time.perf_counter() - started)
+
+    def release(self):
+        """Hand the slot to the highest-priority waiter, or free it"""
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_ANSWER):
+        """Hold a slot for the duration of an LLM call"""
+        await self.acquire(priority)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._service_times.append(time.perf_counter() - started)
+            self.release()
+
+    def stats(self) -> dict:
+        """Queue depth and wait times for capacity planning"""
+        waits = sorted(self._waits)
+
+        def percentile(p):
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))] * 1000, 1) if waits else None
+
+        return {
+            "active": self.active,
+            "queue_depth": self.queue_depth,
+            "max_concurrency": self.max_concurrency,
+            "max_queue_depth": self.max_queue_depth,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "wait_p50_ms": percentile(0.5),
+            "wait_p95_ms": percentile(0.95)
+        }
+
+
+llm_scheduler = LLMScheduler()
@@ -25,3 +25,20 @@ ALLOWED_SOURCES = {
     "CDC",
     "WHO"
 }
+
+# Exact source routing per intent (mirrors the routing table in prompt.py)
+INTENT_SOURCES = {
+    # Biomedical research intents
+    "LITERATURE_REVIEW": ["PubMed"],
+    "CLINICAL_TRIALS": ["ClinicalTrials", "PubMed"],
+    "DRUG_SAFETY": ["FDA"],
+    "COMPARATIVE_RESEARCH": ["PubMed", "ClinicalTrials"],
+    "DATA_ANALYSIS": ["PubMed"],
+    # General health intents
+    "SYMPTOMS_RELATED": ["MedlinePlus", "CDC"],
+    "INFORMATIONAL": ["MedlinePlus", "CDC", "WHO"],
+    "GENERAL_HEALTH": ["CDC", "WHO"]
+}
+
+# Entity categories every plan must carry
+ENTITY_KEYS = ["diseases", "drugs", "therapies", "symptoms", "topics"]
@@ -63,5 +63,12 @@ def validate_execution_plan(plan: dict) -> tuple[bool, str]:
     if "analysis_required" not in plan or not isinstance(plan["analysis_required"], bool):
         return False, "Invalid analysis_required flag"
 
+    # Optional server-side filters, keyed by source
+    filters = plan.get("filters", {})
+    if not isinstance(filters, dict) or not all(
+        src in sources and isinstance(value, dict) for src, value in filters.items()
+    ):
+        return False, "Invalid filters: must map planned sources to filter objects"
+
     return True, ""
 
@@ -0,0 +1,91 @@
+"""Curated medical term lists used for offline entity extraction"""
+
+DISEASES = {
+    # WHO indicator topics
+    "diabetes", "tuberculosis", "malaria", "hiv", "covid", "covid-19", "obesity", "hypertension",
+    # Cancers
+    "cancer", "melanoma", "lung cancer", "breast cancer", "prostate cancer", "colorectal cancer",
+    "pancreatic cancer", "ovarian cancer", "cervical cancer", "leukemia", "lymphoma", "myeloma",
+    "multiple myeloma", "glioblastoma", "non-small cell lung cancer",
+    # Cardiometabolic
+    "type 1 diabetes", "type 2 diabetes", "heart disease", "coronary artery disease", "heart failure",
+    "atrial fibrillation", "stroke", "high blood pressure", "high cholesterol", "hypercholesterolemia",
+    "atherosclerosis", "metabolic syndrome",
+    # Respiratory and infectious
+    "asthma", "copd", "pneumonia", "influenza", "flu", "common cold", "bronchitis", "hepatitis",
+    "hepatitis b", "hepatitis c", "measles", "mumps", "rubella", "polio", "cholera", "dengue",
+    "ebola", "zika", "mpox", "sepsis", "rsv", "aids", "sickle cell disease",
+    # Neurological and mental health
+    "alzheimer's disease", "alzheimer's", "dementia", "parkinson's disease", "parkinson's",
+    "epilepsy", "multiple sclerosis", "migraine", "depression", "anxiety", "bipolar disorder",
+    "schizophrenia", "adhd", "autism", "ptsd", "insomnia",
+    # Other chronic conditions
+    "arthritis", "rheumatoid arthritis", "osteoarthritis", "osteoporosis", "psoriasis", "eczema",
+    "lupus", "crohn's disease", "ulcerative colitis", "celiac disease", "chronic kidney disease",
+    "kidney disease", "liver disease", "cirrhosis", "gout", "anemia", "hypothyroidism",
+    "hyperthyroidism", "cystic fibrosis", "endometriosis", "glaucoma", "cataracts",
+}
+
+DRUGS = {
+    # Oncology
+    "pembrolizumab", "nivolumab", "ipilimumab", "atezolizumab", "durvalumab", "trastuzumab",
+    "bevacizumab", "rituximab", "cetuximab", "imatinib", "tamoxifen", "letrozole", "cisplatin",
+    "carboplatin", "paclitaxel", "docetaxel", "doxorubicin", "cyclophosphamide", "methotrexate",
+    "keytruda", "opdivo", "herceptin",
+    # Cardiometabolic
+    "metformin", "insulin", "semaglutide", "liraglutide", "tirzepatide", "empagliflozin",
+    "dapagliflozin", "sitagliptin", "glipizide", "atorvastatin", "simvastatin", "rosuvastatin",
+    "lisinopril", "losartan", "amlodipine", "metoprolol", "hydrochlorothiazide", "warfarin",
+    "apixaban", "rivaroxaban", "clopidogrel", "ozempic", "wegovy", "lipitor", "eliquis",
+    # Pain and inflammation
+    "aspirin", "ibuprofen", "naproxen", "acetaminophen", "paracetamol", "celecoxib", "diclofenac",
+    "prednisone", "dexamethasone", "tramadol", "oxycodone", "morphine", "tylenol", "advil",
+    # Anti-infectives
+    "amoxicillin", "azithromycin", "ciprofloxacin", "doxycycline", "penicillin", "vancomycin",
+    "oseltamivir", "remdesivir", "paxlovid", "nirmatrelvir", "acyclovir", "isoniazid", "rifampin",
+    "hydroxychloroquine", "ivermectin", "tenofovir",
+    # Mental health and neurology
+    "sertraline", "fluoxetine", "escitalopram", "citalopram", "bupropion", "venlafaxine",
+    "duloxetine", "alprazolam", "lorazepam", "diazepam", "lithium", "quetiapine", "aripiprazole",
+    "gabapentin", "pregabalin", "levetiracetam", "lamotrigine", "donepezil", "levodopa",
+    # Other common prescriptions
+    "levothyroxine", "omeprazole", "pantoprazole", "albuterol", "montelukast", "cetirizine",
+    "loratadine", "adalimumab", "humira", "sildenafil", "finasteride",
+}
+
+THERAPIES = {
+    "car-t", "car-t cell therapy", "crispr", "gene therapy", "immunotherapy", "chemotherapy",
+    "radiotherapy", "radiation therapy", "stem cell therapy", "stem cell transplant",
+    "bone marrow transplant", "targeted therapy", "hormone therapy", "cell therapy",
+    "mrna vaccine", "monoclonal antibodies", "dialysis", "physical therapy",
+    "cognitive behavioral therapy", "deep brain stimulation", "surgery", "checkpoint inhibitors",
+}
+
+SYMPTOMS = {
+    "headache", "migraine", "fever", "cough", "fatigue", "nausea", "vomiting", "diarrhea",
+    "constipation", "dizziness", "chest pain", "back pain", "abdominal pain", "stomach pain",
+    "joint pain", "muscle pain", "sore throat", "shortness of breath", "rash", "itching",
+    "insomnia", "anxiety", "swelling", "numbness", "tingling", "blurred vision", "palpitations",
+    "weight loss", "weight gain", "night sweats", "chills", "runny nose", "congestion",
+    "heartburn", "bloating", "hair loss", "frequent urination", "excessive thirst", "wheezing",
+    "memory loss", "tremor", "seizures",
+}
+
+TOPICS = {
+    # WHO indicator topics
+    "life expectancy", "maternal mortality",
+    # Prevention and lifestyle
+    "nutrition", "diet", "exercise", "physical activity", "sleep", "smoking", "smoking cessation",
+    "alcohol", "vaccination", "immunization", "hand hygiene", "mental health", "stress",
+    "weight management", "healthy eating", "screening", "prenatal care", "air pollution",
+    "child mortality", "infant mortality", "obesity prevention", "diabetes prevention",
+}
+
+# Category name in the plan -> term list
+VOCABULARIES = {
+    "diseases": DISEASES,
+    "drugs": DRUGS,
+    "therapies": THERAPIES,
+    "symptoms": SYMPTOMS,
+    "topics": TOPICS,
+}
@@ -0,0 +1,153 @@
+"""
+Local stand-in for every upstream (NCBI, openFDA, ClinicalTrials.gov, MedlinePlus,
+CDC, WHO and Ollama), replaying recorded fixtures over HTTP.
+Clients reach it with CAREWISE_REPLAY_MODE=stub: a request for
+https://api.fda.gov/drug/label.json arrives here as /api.fda.gov/drug/label.json.
+Latency, jitter and error injection are configurable (per host too) and seeded,
+so runs are repeatable.
+
+Usage:
+    python stub_server.py --fixtures fixtures --port 8765 --latency-ms 80 --jitter-ms 20 \
+        --host-latency eutils.ncbi.nlm.nih.gov=250 --error-rate 0.02 --token-delay-ms 15
+"""
+
+import argparse
+import asyncio
+import random
+import threading
+import time
+from fastapi import FastAPI, Request
+from fastapi.responses import Response, StreamingResponse, JSONResponse
+from config.settings import REPLAY_FIXTURES_DIR
+from data.clients.replay import FixtureStore, FixturesMissingError, fixture_key, fixture_body, require_fixtures
+
+
+class FaultProfile:
+    """Latency and error injection applied to every replayed response"""
+
+    def __init__(self, latency_ms=0, jitter_ms=0, host_latency_ms=None, error_rate=0.0, error_status=503,
+                 token_delay_ms=0, seed=0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.host_latency_ms = host_latency_ms or {}
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.token_delay_ms = token_delay_ms    # pause between NDJSON lines (streamed LLM tokens)
+        self.random = random.Random(seed)
+
+    def delay(self, host) -> float:
+        """Seconds to wait before answering a request for a host"""
+        base = self.host_latency_ms.get(host, self.latency_ms)
+        return max(0.0, base + self.random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+
+    def should_fail(self) -> bool:
+        return self.error_rate > 0 and self.random.random() < self.error_rate
+
+
+def create_stub_app(fixtures: FixtureStore, faults: FaultProfile) -> FastAPI:
+    app = FastAPI(title="CareWise upstream stub")
+    counters = {"requests": 0, "served": 0, "missing": 0, "injected_errors": 0}
+
+    @app.get("/__stub__/stats")
+    async def stub_stats():
+        return {**counters, "fixtures": fixtures.counters}
+
+    @app.api_route("/{host}/{path:path}", methods=["GET", "POST"])
+    async def replay(host: str, path: str, request: Request):
+        counters["requests"] += 1
+        body = await request.body()
+        key = fixture_key(request.method, host, "/" + path, request.query_params.multi_items(), body)
+
+        await asyncio.sleep(faults.delay(host))
+        if faults.should_fail():
+            counters["injected_errors"] += 1
+            return JSONResponse({"error": "injected failure"}, status_code=faults.error_status)
+
+        fixture = fixtures.load(host, key)
+        if fixture is None:
+            counters["missing"] += 1
+            return JSONResponse({
+                "error": f"no fixture for {request.method} {host}/{path}",
+                "hint": "record this request first with CAREWISE_REPLAY_MODE=record"
+            }, status_code=404)
+
+        counters["served"] += 1
+        status = fixture["response"]["status"]
+        headers = dict(fixture["response"]["headers"])
+        media_type = headers.pop("content-type", None)
+        content = fixture_body(fixture)
+        if faults.token_delay_ms and media_type and "ndjson" in media_type:
+            return StreamingResponse(paced_lines(content, faults.token_delay_ms / 1000), status_code=status,
+                                     headers=headers, media_type=media_type)
+        return Response(content, status_code=status, headers=headers, media_type=media_type)
+
+    return app
+
+
+async def paced_lines(content: bytes, delay: float):
+    """Yield an NDJSON body line by line, like Ollama streaming tokens"""
+    for line in content.splitlines(keepends=True):
+        yield line
+        await asyncio.sleep(delay)
+
+
+def start_stub_server(fixtures_dir=REPLAY_FIXTURES_DIR, port=8765, faults=None):
+    """
+    Run the stub server in a background thread; returns the uvicorn server (set should_exit to stop).
+    Raises FixturesMissingError if there is nothing recorded to serve.
+    """
+    import uvicorn
+
+    require_fixtures(fixtures_dir)
+    app = create_stub_app(FixtureStore(fixtures_dir), faults or FaultProfile())
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError(f"Stub server failed to start on port {port}")
+        time.sleep(0.05)
+    return server
+
+
+def parse_host_latency(values):
+    host_latency = {}
+    for value in values:
+        host, _, ms = value.partition("=")
+        host_latency[host] = float(ms)
+    return host_latency
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Replay recorded upstream fixtures over HTTP")
+    parser.add_argument("--fixtures", default=REPLAY_FIXTURES_DIR)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--host-latency", action="append", default=[], metavar="HOST=MS")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--token-delay-ms", type=float, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    try:
+        fixture_count = require_fixtures(args.fixtures)
+    except FixturesMissingError as e:
+        print(f"❌ {e}")
+        raise SystemExit(2)
+
+    faults = FaultProfile(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        host_latency_ms=parse_host_latency(args.host_latency),
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        token_delay_ms=args.token_delay_ms,
+        seed=args.seed
+    )
+    print(f"🧪 Replaying {fixture_count} fixtures from {args.fixtures} on port {args.port}")
+    uvicorn.run(create_stub_app(FixtureStore(args.fixtures), faults), host="127.0.0.1", port=args.port,
+                log_level="warning")
@@ -0,0 +1,20 @@
+"""Telemetry module - Pipeline timing spans, request traces and Prometheus metrics"""
+from .metrics import Counter, Histogram, MetricsRegistry, metrics
+from .tracing import (
+    Trace, TraceMiddleware, span, timed, record_span, current_trace_id, trace_buffer, TRACE_HEADER
+)
+
+__all__ = [
+    "Counter",
+    "Histogram",
+    "MetricsRegistry",
+    "metrics",
+    "Trace",
+    "TraceMiddleware",
+    "span",
+    "timed",
+    "record_span",
+    "current_trace_id",
+    "trace_buffer",
+    "TRACE_HEADER"
+]
@@ -0,0 +1,203 @@
+"""
+Request traces made of timing spans.
+Every API request gets a trace ID (taken from an incoming X-Trace-Id header or
+generated) that is returned in the X-Trace-Id response header. Pipeline stages
+open spans inside the current trace; each span also feeds the stage latency
+histogram, so the CLI (which has no trace) still produces metrics. Recent
+traces are kept in memory for /traces/{trace_id}, and slow ones are printed as
+one JSON line.
+"""
+
+import functools
+import inspect
+import json
+import re
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from config.settings import TRACE_BUFFER_SIZE, TRACE_SLOW_REQUEST_SECONDS
+from .metrics import metrics
+
+TRACE_HEADER = "x-trace-id"
+_VALID_TRACE_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+STAGE_SECONDS = metrics.histogram(
+    "carewise_stage_duration_seconds", "Latency of pipeline stages", ["stage"]
+)
+HTTP_SECONDS = metrics.histogram(
+    "carewise_http_request_duration_seconds", "API request latency until the last body byte",
+    ["method", "route", "status"]
+)
+
+_current_trace = ContextVar("carewise_trace", default=None)
+
+
+class Trace:
+    """Spans recorded for one request"""
+
+    def __init__(self, trace_id=None, name=""):
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.name = name
+        self.started = time.perf_counter()
+        self.spans = []
+        self.duration_ms = None
+        self.status = None
+
+    def add(self, name, started, duration, attributes, error=None):
+        span = {
+            "name": name,
+            "start_ms": round((started - self.started) * 1000, 1),
+            "duration_ms": round(duration * 1000, 1),
+            **attributes
+        }
+        if error:
+            span["error"] = error
+        self.spans.append(span)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "status": self.status,
+            "duration_ms": self.duration_ms,
+            "spans": sorted(self.spans, key=lambda s: s["start_ms"])
+        }
+
+
+class TraceBuffer:
+    """The most recent finished traces, by ID"""
+
+    def __init__(self, max_size=TRACE_BUFFER_SIZE):
+        self.max_size = max_size
+        self._traces = OrderedDict()
+
+    def add(self, trace: Trace):
+        self._traces[trace.trace_id] = trace
+        self._traces.move_to_end(trace.trace_id)
+        while len(self._traces) > self.max_size:
+            self._traces.popitem(last=False)
+
+    def get(self, trace_id):
+        return self._traces.get(trace_id)
+
+
+trace_buffer = TraceBuffer()
+
+
+def current_trace_id():
+    trace = _current_trace.get()
+    return trace.trace_id if trace else None
+
+
+@contextmanager
+def span(name, **attributes):
+    """
+    Time a block as a span of the current trace and a stage latency sample.
+    Yields the attribute dict, so the block can add attributes it learns
+    (e.g. how many LLM attempts planning took).
+    """
+    started = time.perf_counter()
+    error = None
+    try:
+        yield attributes
+    except GeneratorExit:
+        # A streaming consumer stopped reading; not a failure of the stage
+        raise
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        duration = time.perf_counter() - started
+        STAGE_SECONDS.observe(duration, stage=name)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add(name, started, duration, attributes, error)
+
+
+def timed(name):
+    """Decorator running a function (sync, async or async generator) inside span(name)"""
+    def decorator(func):
+        if inspect.isasyncgenfunction(func):
+            @functools.wraps(func)
+            async def gen_wrapper(*args, **kwargs):
+                with span(name):
+                    async for item in func(*args, **kwargs):
+                        yield item
+            return gen_wrapper
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_span(name, duration, **attributes):
+    """Add a span that was timed elsewhere and ended just now (no stage sample)"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(name, time.perf_counter() - duration, duration, attributes)
+
+
+class TraceMiddleware:
+    """
+    ASGI middleware opening a trace per HTTP request. The trace is finished
+    when the last body chunk is sent, so streamed (SSE) responses are timed
+    to the end.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = dict(scope["headers"]).get(TRACE_HEADER.encode(), b"").decode("latin-1")
+        trace = Trace(incoming if _VALID_TRACE_ID.match(incoming) else None,
+                      name=f"{scope['method']} {scope['path']}")
+        token = _current_trace.set(trace)
+        finished = False
+
+        def finish(status):
+            nonlocal finished
+            if finished:
+                return
+            finished = True
+            duration = time.perf_counter() - trace.started
+            trace.duration_ms = round(duration * 1000, 1)
+            trace.status = status
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_SECONDS.observe(duration, method=scope["method"], route=route, status=status)
+            if trace.spans:
+                trace_buffer.add(trace)
+                if duration >= TRACE_SLOW_REQUEST_SECONDS:
+                    print(f"🐢 slow request {json.dumps(trace.to_dict())}")
+
+        status_code = 500
+
+        async def send_with_trace_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message = {**message, "headers": [*message.get("headers", []),
+                                                  (TRACE_HEADER.encode(), trace.trace_id.encode())]}
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                finish(status_code)
+
+        try:
+            await self.app(scope, receive, send_with_trace_id)
+        finally:
+            finish(status_code)
+            _current_trace.reset(token)
@@ -0,0 +1,6 @@
+"""Shared test setup: modules import each other as top-level packages (config, data, ...)"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
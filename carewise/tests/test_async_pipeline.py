@@ -0,0 +1,66 @@
+"""Upstream calls on the shared async HTTP client do not block the event loop"""
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from data.clients.http import http_get, run_sync, session_stats
+
+DELAY = 0.3
+
+
+@pytest.fixture
+def slow_upstream():
+    """Local upstream answering every GET after DELAY seconds"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(DELAY)
+            payload = json.dumps({"path": self.path}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_concurrent_requests_overlap_and_the_loop_stays_responsive(slow_upstream):
+    async def main():
+        gaps = []
+
+        async def heartbeat():
+            while True:
+                started = time.perf_counter()
+                await asyncio.sleep(0.01)
+                gaps.append(time.perf_counter() - started)
+
+        ticker = asyncio.create_task(heartbeat())
+        started = time.perf_counter()
+        responses = await asyncio.gather(*(http_get(f"{slow_upstream}/item/{i}") for i in range(6)))
+        elapsed = time.perf_counter() - started
+        ticker.cancel()
+        return responses, elapsed, max(gaps)
+
+    responses, elapsed, longest_gap = run_sync(main())
+    assert [res.json()["path"] for res in responses] == [f"/item/{i}" for i in range(6)]
+    # Six sequential calls would take 6 * DELAY
+    assert elapsed < 3 * DELAY
+    assert longest_gap < DELAY / 2
+
+
+def test_sync_wrapper_closes_the_shared_client(slow_upstream):
+    assert run_sync(http_get(f"{slow_upstream}/first")).json() == {"path": "/first"}
+    assert session_stats()["hosts"] == []
+    # A later run_sync gets a fresh client bound to its own loop
+    assert run_sync(http_get(f"{slow_upstream}/second")).json() == {"path": "/second"}
@@ -0,0 +1,54 @@
+"""Concurrent source fan-out under per-source and overall deadlines"""
+
+import asyncio
+import time
+from data.fanout import fan_out
+
+
+async def answer(value, delay=0.0):
+    await asyncio.sleep(delay)
+    return value
+
+
+async def fail():
+    raise RuntimeError("upstream down")
+
+
+def test_statuses_for_ok_error_and_source_timeout():
+    jobs = {"fast": answer([1, 2]), "broken": fail(), "slow": answer([3], delay=1)}
+    timeouts = {"fast": 1, "broken": 1, "slow": 0.05}
+    results, status = asyncio.run(fan_out(jobs, timeouts, budget=2))
+
+    assert results == {"fast": [1, 2]}
+    assert status["fast"]["status"] == "ok" and status["fast"]["count"] == 2
+    assert status["broken"]["status"] == "error" and "upstream down" in status["broken"]["error"]
+    assert status["slow"]["status"] == "timeout"
+    assert "budget_exceeded" not in status["slow"]
+
+
+def test_overall_budget_cancels_unfinished_sources():
+    cancelled = []
+
+    async def stuck():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    finished = []
+    started = time.perf_counter()
+    results, status = asyncio.run(fan_out(
+        {"fast": answer(["a"]), "stuck": stuck()}, {"fast": 5, "stuck": 5}, budget=0.1,
+        on_done=lambda name, source_status: finished.append(name)
+    ))
+
+    assert time.perf_counter() - started < 1
+    assert results == {"fast": ["a"]}
+    assert status["stuck"]["status"] == "timeout" and status["stuck"]["budget_exceeded"]
+    assert cancelled == [True]
+    assert sorted(finished) == ["fast", "stuck"]
+
+
+def test_no_jobs():
+    assert asyncio.run(fan_out({}, {}, budget=1)) == ({}, {})
@@ -0,0 +1,49 @@
+"""Gazetteer entity extraction and its on-disk index"""
+
+import json
+from intelligence.gazetteer import AhoCorasick, Gazetteer, bundled_vocabularies, load_gazetteer
+
+
+def extract(text):
+    return Gazetteer({"diseases": {"type 2 diabetes", "diabetes"}, "drugs": {"metformin"},
+                      "symptoms": {"headache"}, "topics": {"diabetes"}}).extract(text)
+
+
+def test_aho_corasick_finds_overlapping_patterns():
+    matcher = AhoCorasick(["he", "she", "hers"])
+    assert sorted(matcher.iter_matches("ushers")) == [(1, 4, 1), (2, 4, 0), (2, 6, 2)]
+
+
+def test_longest_match_wins_and_plurals_map_back():
+    entities = extract("Metformin for Type 2 Diabetes and frequent headaches")
+    assert entities["diseases"] == ["type 2 diabetes"]
+    assert entities["drugs"] == ["metformin"]
+    assert entities["symptoms"] == ["headache"]
+
+
+def test_word_boundaries_are_required():
+    assert extract("prediabetes-related fatigue")["diseases"] == []
+
+
+def test_who_topics_do_not_duplicate_other_categories():
+    vocabularies = bundled_vocabularies()
+    assert "diabetes" in vocabularies["diseases"]
+    assert "diabetes" not in vocabularies["topics"]
+
+
+def test_index_is_json_and_reused(tmp_path):
+    path = tmp_path / "gazetteer.json"
+    built = load_gazetteer(index_path=str(path))
+    with open(path, encoding="utf-8") as f:
+        assert "fingerprint" in json.load(f)
+    loaded = load_gazetteer(index_path=str(path))
+    query = "side effects of metformin for type 2 diabetes"
+    assert loaded.extract(query) == built.extract(query)
+
+
+def test_corrupt_index_is_rebuilt(tmp_path):
+    path = tmp_path / "gazetteer.json"
+    path.write_text("not json")
+    gazetteer = load_gazetteer(index_path=str(path))
+    assert gazetteer.extract("metformin")["drugs"] == ["metformin"]
+    assert json.loads(path.read_text())["fingerprint"]
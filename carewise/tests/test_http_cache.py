@@ -0,0 +1,162 @@
+"""HTTP response cache: fresh hits, stale-while-revalidate, 304 revalidation and error fallback"""
+
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import httpx
+import pytest
+from data.clients import http
+from data.clients.http_cache import HTTPCache, cache_key
+
+HOST = "api.example.org"
+URL = f"https://{HOST}/items"
+PARAMS = {"q": "aspirin"}
+
+
+class Upstream:
+    """fetch(extra_headers) callable answering with queued responses"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    async def __call__(self, extra_headers):
+        self.calls.append(extra_headers)
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def ok(body, etag='"v1"'):
+    return httpx.Response(200, headers={"content-type": "application/json", "etag": etag}, content=body)
+
+
+def make_cache(tmp_path, ttl=60, stale_seconds=60):
+    return HTTPCache(directory=str(tmp_path / "http"), ttls={HOST: ttl}, max_bytes=1 << 20,
+                     stale_seconds=stale_seconds)
+
+
+def age(cache, seconds):
+    """Move the stored entry's expiry `seconds` into the past"""
+    cache._db.execute("UPDATE responses SET expires_at = expires_at - ?", (seconds,))
+    cache._db.commit()
+
+
+def test_fresh_entry_is_served_without_fetching(tmp_path):
+    async def main():
+        cache = make_cache(tmp_path)
+        first = await cache.get(URL, PARAMS, Upstream(ok(b'{"n": 1}')))
+        assert first.content == b'{"n": 1}'
+        second = await cache.get(URL, PARAMS, Upstream())
+        assert second.headers["x-cache"] == "HIT" and second.json() == {"n": 1}
+        assert cache.counters[HOST]["hits"] == 1 and cache.counters[HOST]["stored"] == 1
+
+    asyncio.run(main())
+
+
+def test_stale_entry_is_served_while_refreshing(tmp_path):
+    async def main():
+        cache = make_cache(tmp_path)
+        await cache.get(URL, PARAMS, Upstream(ok(b"old")))
+        age(cache, 61)
+        upstream = Upstream(ok(b"new", etag='"v2"'))
+        stale = await cache.get(URL, PARAMS, upstream)
+        assert stale.content == b"old"
+        await asyncio.gather(*cache._refreshing.values())
+        assert upstream.calls == [{"If-None-Match": '"v1"'}]
+        assert (await cache.get(URL, PARAMS, Upstream())).content == b"new"
+        assert cache.counters[HOST]["stale_hits"] == 1
+
+    asyncio.run(main())
+
+
+def test_not_modified_extends_the_entry(tmp_path):
+    async def main():
+        cache = make_cache(tmp_path, stale_seconds=0)
+        await cache.get(URL, PARAMS, Upstream(ok(b"body")))
+        age(cache, 120)
+        upstream = Upstream(httpx.Response(304))
+        revalidated = await cache.get(URL, PARAMS, upstream)
+        assert revalidated.content == b"body" and revalidated.headers["x-cache"] == "HIT"
+        assert upstream.calls == [{"If-None-Match": '"v1"'}]
+        assert cache.counters[HOST]["revalidated"] == 1
+        assert (await cache.get(URL, PARAMS, Upstream())).content == b"body"
+
+    asyncio.run(main())
+
+
+def test_unreachable_upstream_falls_back_to_any_stored_copy(tmp_path):
+    async def main():
+        cache = make_cache(tmp_path, stale_seconds=0)
+        await cache.get(URL, PARAMS, Upstream(ok(b"body")))
+        age(cache, 3600)
+        down = await cache.get(URL, PARAMS, Upstream(httpx.ConnectError("refused")))
+        assert down.content == b"body"
+        failing = await cache.get(URL, PARAMS, Upstream(httpx.Response(503)))
+        assert failing.content == b"body"
+        with pytest.raises(httpx.ConnectError):
+            await cache.get(URL, {"q": "other"}, Upstream(httpx.ConnectError("refused")))
+        assert await cache.get_stale_body(URL, PARAMS) == b"body"
+
+    asyncio.run(main())
+
+
+def test_cache_key_normalizes_method_and_param_order():
+    assert cache_key("GET", URL, {"q": "a", "b": 1}) == cache_key("get", URL, {"b": "1", "q": "a"})
+
+
+@pytest.fixture
+def xml_upstream():
+    """Local upstream serving `state["body"]` with an ETag, answering 304 when it matches"""
+    state = {"body": b"<list>one</list>", "etag": '"v1"', "requests": []}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            state["requests"].append(self.headers.get("If-None-Match"))
+            if self.headers.get("If-None-Match") == state["etag"]:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/xml")
+            self.send_header("ETag", state["etag"])
+            self.send_header("Content-Length", str(len(state["body"])))
+            self.end_headers()
+            self.wfile.write(state["body"])
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    state["url"] = f"http://127.0.0.1:{server.server_address[1]}/ws/query"
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+def test_streamed_responses_are_revalidated_with_their_etag(xml_upstream, monkeypatch, tmp_path):
+    cache = HTTPCache(directory=str(tmp_path / "http"), ttls={"127.0.0.1": 60}, max_bytes=1 << 20, stale_seconds=0)
+    monkeypatch.setattr(http, "http_cache", cache)
+    url, requests = xml_upstream["url"], xml_upstream["requests"]
+
+    async def read():
+        return b"".join([chunk async for chunk in http.http_stream(url, params={"term": "flu"}, chunk_size=4)])
+
+    assert http.run_sync(read()) == b"<list>one</list>"
+    assert http.run_sync(read()) == b"<list>one</list>"
+    assert requests == [None]
+
+    age(cache, 120)
+    assert http.run_sync(read()) == b"<list>one</list>"
+    assert requests == [None, '"v1"']
+    assert http.run_sync(read()) == b"<list>one</list>"    # fresh again after the 304
+    assert len(requests) == 2
+
+    xml_upstream.update(body=b"<list>two</list>", etag='"v2"')
+    age(cache, 120)
+    assert http.run_sync(read()) == b"<list>two</list>"
+    assert requests[-1] == '"v1"'
+    counters = cache.counters["127.0.0.1"]
+    assert (counters["hits"], counters["revalidated"], counters["misses"]) == (2, 1, 2)
@@ -0,0 +1,38 @@
+"""Local repair of almost-JSON planner output"""
+
+from intelligence.json_repair import repair_json, fill_plan_defaults
+from intelligence.schema import ENTITY_KEYS
+
+
+def test_fenced_single_quoted_with_trailing_commas():
+    raw = "Sure! ```json\n{'intent': 'DRUG_SAFETY', 'sources': ['FDA',],}\n```"
+    assert repair_json(raw) == {"intent": "DRUG_SAFETY", "sources": ["FDA"]}
+
+
+def test_truncated_output_is_closed():
+    raw = '{"intent": "DRUG_SAFETY", "entities": {"drugs": ["aspirin"'
+    assert repair_json(raw) == {"intent": "DRUG_SAFETY", "entities": {"drugs": ["aspirin"]}}
+
+
+def test_comments_and_python_literals():
+    raw = '{"analysis_required": True, // not needed\n "note": None}'
+    assert repair_json(raw) == {"analysis_required": True, "note": None}
+
+
+def test_comment_markers_inside_strings_are_kept():
+    assert repair_json('{"url": "https://example.org"}') == {"url": "https://example.org"}
+
+
+def test_unrepairable_output():
+    assert repair_json("") is None
+    assert repair_json("no json here") is None
+    assert repair_json("[1, 2]") is None
+
+
+def test_fill_plan_defaults():
+    plan = {"intent": "INFORMATIONAL", "entities": {"diseases": "asthma"}}
+    assert fill_plan_defaults(plan) is True
+    assert plan["entities"]["diseases"] == ["asthma"]
+    assert all(plan["entities"][key] == [] for key in ENTITY_KEYS if key != "diseases")
+    assert plan["analysis_required"] is False
+    assert fill_plan_defaults(plan) is False
@@ -0,0 +1,140 @@
+"""LLM endpoint balancing and failover against local Ollama stand-ins"""
+
+import asyncio
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from intelligence.llm_client import OllamaClient
+from intelligence.load_balancer import EndpointPool
+
+
+class FakeOllama:
+    """Answers /api/generate after a fixed delay and counts the prompts it served"""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.prompts = []
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                fake.prompts.append(body["prompt"])
+                time.sleep(fake.delay)
+                payload = json.dumps({"response": "ok", "done": True, "eval_count": 1}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/api/generate"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def closed_port_url():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{s.getsockname()[1]}/api/generate"
+
+
+@pytest.fixture
+def servers():
+    started = [FakeOllama(), FakeOllama(), FakeOllama()]
+    yield started
+    for server in started:
+        server.close()
+
+
+def run_calls(client, prompts):
+    async def main():
+        try:
+            return await asyncio.gather(*(client.generate(prompt) for prompt in prompts))
+        finally:
+            await client.aclose()
+    return asyncio.run(main())
+
+
+def test_concurrent_calls_spread_across_endpoints(servers):
+    client = OllamaClient(urls=[s.url for s in servers])
+    # Same prompt prefix everywhere: stickiness alone would pin them all to one endpoint
+    answers = run_calls(client, ["shared system prompt"] * 9)
+    assert answers == ["ok"] * 9
+    assert [len(s.prompts) for s in servers] == [3, 3, 3]
+
+
+def test_idle_pool_keeps_prefix_on_one_endpoint(servers):
+    client = OllamaClient(urls=[s.url for s in servers])
+
+    async def sequential():
+        try:
+            for _ in range(4):
+                await client.generate("same prefix")
+        finally:
+            await client.aclose()
+
+    asyncio.run(sequential())
+    assert sorted(len(s.prompts) for s in servers) == [0, 0, 4]
+
+
+def test_failover_and_ejection(servers):
+    dead = closed_port_url()
+    pool = EndpointPool([dead, servers[0].url], failure_threshold=2)
+    client = OllamaClient(pool=pool)
+    answers = run_calls(client, [f"prompt {i}" for i in range(6)])
+
+    assert answers == ["ok"] * 6
+    assert len(servers[0].prompts) == 6
+    assert client.errors == 0
+    dead_endpoint = pool.endpoints[0]
+    assert not dead_endpoint.healthy
+    assert dead_endpoint.outstanding == 0
+
+
+def test_timeout_fails_over_to_next_endpoint(servers):
+    hung = FakeOllama(delay=2)
+    try:
+        pool = EndpointPool([hung.url, servers[0].url])
+        client = OllamaClient(pool=pool, timeout=0.3)
+        # Whichever endpoint the prompt lands on first, the answer comes from the responsive one
+        assert run_calls(client, ["slow prompt"]) == ["ok"]
+        assert client.errors == 0
+        assert pool.endpoints[0].failures <= 1
+    finally:
+        hung.close()
+
+
+def test_timeout_on_every_endpoint_raises_friendly_error():
+    hung = FakeOllama(delay=2)
+    try:
+        client = OllamaClient(urls=[hung.url], timeout=0.3)
+        with pytest.raises(RuntimeError, match="did not answer"):
+            run_calls(client, ["hello"])
+        assert client.errors == 1
+    finally:
+        hung.close()
+
+
+def test_all_endpoints_down_raises_friendly_error():
+    client = OllamaClient(urls=[closed_port_url(), closed_port_url()])
+    with pytest.raises(RuntimeError, match="Cannot connect to Ollama"):
+        run_calls(client, ["hello"])
+    assert client.errors == 1
+
+
+def test_sticky_owner_yields_to_less_loaded_endpoint():
+    pool = EndpointPool(["http://a/api/generate", "http://b/api/generate"])
+    owner = pool.pick("prefix")
+    pool.begin(owner)
+    assert pool.pick("prefix") is not owner
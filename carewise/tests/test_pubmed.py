@@ -0,0 +1,97 @@
+"""PubMed search and fetch: PMID cache, streamed efetch and history-server paging"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+import pytest
+import data.record_cache
+from data.clients import pubmed
+from data.clients.http import run_sync
+from data.record_cache import RecordCache
+
+PMIDS = [str(pmid) for pmid in range(101, 106)]
+
+
+def article_xml(pmid):
+    return (
+        f"<PubmedArticle><MedlineCitation><PMID>{pmid}</PMID><Article>"
+        f"<Journal><Title>Journal {pmid}</Title></Journal><ArticleTitle>Article <i>{pmid}</i></ArticleTitle>"
+        f"<Abstract><AbstractText Label=\"BACKGROUND\">Why {pmid}.</AbstractText>"
+        f"<AbstractText Label=\"RESULTS\">What {pmid}.</AbstractText></Abstract>"
+        f"</Article></MedlineCitation></PubmedArticle>"
+    )
+
+
+@pytest.fixture
+def eutils(monkeypatch):
+    """Local esearch/efetch pair over PMIDS; records each efetch's parameters"""
+    efetches = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlsplit(self.path)
+            params = {name: values[0] for name, values in parse_qs(url.query).items()}
+            if url.path.endswith("esearch.fcgi"):
+                ids = PMIDS[:int(params["retmax"])]
+                body = json.dumps({"esearchresult": {
+                    "idlist": ids, "count": str(len(PMIDS)), "webenv": "ENV_1", "querykey": "1"
+                }}).encode()
+                content_type = "application/json"
+            else:
+                efetches.append(params)
+                if "WebEnv" in params:
+                    start = int(params["retstart"])
+                    ids = PMIDS[start:start + int(params["retmax"])]
+                else:
+                    ids = params["id"].split(",")
+                body = ("<PubmedArticleSet>" + "".join(article_xml(pmid) for pmid in ids)
+                        + "</PubmedArticleSet>").encode()
+                content_type = "application/xml"
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    monkeypatch.setattr(pubmed, "PUBMED_ESEARCH_URL", base + "/esearch.fcgi")
+    monkeypatch.setattr(pubmed, "PUBMED_EFETCH_URL", base + "/efetch.fcgi")
+    cache = RecordCache("articles", 100, 3600)
+    monkeypatch.setattr(data.record_cache, "pubmed_cache", cache)
+    yield efetches, cache
+    server.shutdown()
+    server.server_close()
+
+
+def test_small_result_sets_fetch_only_uncached_ids(eutils):
+    efetches, cache = eutils
+    cache.put_many({"102": {"pmid": "102", "title": "cached", "source": "PubMed"}})
+
+    articles = run_sync(pubmed.query_pubmed_async("asthma", limit=3))
+    assert [article["pmid"] for article in articles] == ["101", "102", "103"]
+    assert articles[1]["title"] == "cached"
+    assert articles[0]["title"] == "Article 101"
+    assert articles[0]["summary"] == "BACKGROUND: Why 101.\nRESULTS: What 101."
+    assert [params["id"] for params in efetches] == ["101,103"]
+
+
+def test_large_result_sets_page_the_history_server_for_uncached_pages(eutils, monkeypatch):
+    efetches, cache = eutils
+    monkeypatch.setattr(pubmed, "PUBMED_EFETCH_BATCH_SIZE", 2)
+    cached = {pmid: {"pmid": pmid, "title": "cached", "source": "PubMed"} for pmid in ("101", "102", "104")}
+    cache.put_many(cached)
+
+    articles = run_sync(pubmed.query_pubmed_async("asthma", limit=5))
+    assert [article["pmid"] for article in articles] == PMIDS
+    assert [article["title"] for article in articles] == ["cached", "cached", "Article 103", "cached", "Article 105"]
+    # Page 101-102 is fully cached and skipped; 104 comes back with 103 but keeps its cached record
+    assert [(params["WebEnv"], params["retstart"], params["retmax"]) for params in efetches] == [
+        ("ENV_1", "2", "2"), ("ENV_1", "4", "1")
+    ]
+    assert cache.get("104")["title"] == "cached"
@@ -0,0 +1,62 @@
+"""Shared token-bucket rate limiter"""
+
+import sqlite3
+import pytest
+from data.clients.rate_limit import RateLimiter, RateLimitExceeded
+
+HOST = "api.example.org"
+
+
+def make_limiter(tmp_path, rate=2.0, burst=2, max_wait=1.0):
+    return RateLimiter(limits={HOST: (rate, burst)}, path=str(tmp_path / "buckets.db"), max_wait=max_wait)
+
+
+def test_burst_then_paced_waits(tmp_path):
+    limiter = make_limiter(tmp_path)
+    assert limiter.reserve(HOST) == 0
+    assert limiter.reserve(HOST) == 0
+    # Empty bucket at 2 tokens/s: the next tokens are due in ~0.5s and ~1s
+    assert limiter.reserve(HOST) == pytest.approx(0.5, abs=0.05)
+    assert limiter.reserve(HOST) == pytest.approx(1.0, abs=0.05)
+    assert limiter.counters[HOST]["granted"] == 2 and limiter.counters[HOST]["delayed"] == 2
+
+
+def test_too_long_a_wait_is_refused_without_taking_a_token(tmp_path):
+    limiter = make_limiter(tmp_path, max_wait=0.6)
+    limiter.reserve(HOST)
+    limiter.reserve(HOST)
+    limiter.reserve(HOST)
+    with pytest.raises(RateLimitExceeded) as error:
+        limiter.reserve(HOST)
+    assert error.value.host == HOST
+    assert error.value.retry_after == pytest.approx(1.0, abs=0.05)
+    assert limiter.counters[HOST]["rejected"] == 1
+
+
+def test_backoff_empties_the_bucket(tmp_path):
+    limiter = make_limiter(tmp_path, max_wait=10)
+    limiter.backoff(HOST, 3)
+    assert limiter.reserve(HOST) == pytest.approx(3.5, abs=0.05)
+    assert limiter.counters[HOST]["throttled"] == 1
+    limiter.backoff("unlimited.example.org", 3)
+
+
+def test_buckets_are_shared_between_limiters(tmp_path):
+    first = make_limiter(tmp_path)
+    second = make_limiter(tmp_path)
+    first.reserve(HOST)
+    first.reserve(HOST)
+    assert second.reserve(HOST) == pytest.approx(0.5, abs=0.05)
+
+
+def test_locked_state_file_falls_back_to_the_process_bucket(tmp_path):
+    limiter = make_limiter(tmp_path)
+    blocker = sqlite3.connect(limiter.path, isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")
+    try:
+        assert limiter.reserve(HOST) == 0
+    finally:
+        blocker.execute("ROLLBACK")
+        blocker.close()
+    assert limiter.counters[HOST]["degraded"] == 1
+    assert not limiter._db.in_transaction
@@ -0,0 +1,30 @@
+"""Recording and replaying upstream exchanges as fixtures"""
+
+import asyncio
+import httpx
+import pytest
+from data.clients.replay import FixtureStore, FixturesMissingError, ReplayTransport
+
+URL = "https://api.example.org/items"
+PARAMS = {"q": "aspirin"}
+
+
+def test_replay_transport_answers_from_recorded_fixtures(tmp_path):
+    async def main():
+        store = FixtureStore(str(tmp_path / "fixtures"))
+        request = httpx.Request("GET", URL, params=PARAMS)
+        store.save(request, 200, {"content-type": "application/json"}, b'{"recorded": true}')
+
+        transport = ReplayTransport("replay", FixtureStore(store.directory))
+        async with httpx.AsyncClient(transport=transport) as client:
+            res = await client.get(URL, params=PARAMS)
+            assert res.json() == {"recorded": True} and res.headers["x-replay"] == "fixture"
+            with pytest.raises(httpx.ConnectError, match="No recorded fixture"):
+                await client.get(URL, params={"q": "unrecorded"})
+
+    asyncio.run(main())
+
+
+def test_replaying_without_fixtures_fails_fast(tmp_path):
+    with pytest.raises(FixturesMissingError, match="Record them first"):
+        ReplayTransport("replay", FixtureStore(str(tmp_path / "empty")))
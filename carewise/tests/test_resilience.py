@@ -0,0 +1,140 @@
+"""Circuit breaker transitions and request hedging"""
+
+import asyncio
+import time
+import pytest
+from data.resilience import CircuitBreaker, CircuitOpenError, RequestHedger, guarded_call, CLOSED, OPEN, HALF_OPEN
+
+
+def make_breaker(**overrides):
+    options = dict(window_size=4, min_calls=4, failure_ratio=0.5, slow_call_seconds=1, open_seconds=60)
+    options.update(overrides)
+    return CircuitBreaker("test", **options)
+
+
+def test_breaker_opens_on_failure_ratio_and_rejects():
+    breaker = make_breaker()
+    for ok in (True, False, True):
+        breaker.before_call()
+        breaker.record(ok, 0.1)
+    assert breaker.state == CLOSED
+    breaker.before_call()
+    breaker.record(True, 5)    # slow calls count as failures
+    assert breaker.state == OPEN and breaker.times_opened == 1
+
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.before_call()
+    assert 0 < error.value.retry_after <= 60
+    assert breaker.rejected == 1
+
+
+def test_half_open_admits_a_single_probe():
+    breaker = make_breaker(open_seconds=0)
+    breaker._open()
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record(True, 0.1)
+    assert breaker.state == CLOSED
+
+    breaker._open()
+    breaker.before_call()
+    breaker.record(False, 0.1)
+    assert breaker.state == OPEN and breaker.times_opened == 3
+
+
+def test_cancelled_probe_frees_the_half_open_slot():
+    async def main():
+        breaker = make_breaker(open_seconds=0)
+        breaker._open()
+        call = asyncio.create_task(guarded_call(breaker, lambda: asyncio.sleep(10)))
+        await asyncio.sleep(0)
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+        breaker.before_call()    # a new probe is admitted
+        assert breaker.state == HALF_OPEN
+
+    asyncio.run(main())
+
+
+def test_hedge_wins_and_the_slow_attempt_is_cancelled():
+    async def main():
+        hedger = RequestHedger("test", min_samples=1, min_delay=0.01)
+        hedger.observe(0.02)
+        attempts, cancelled = [], []
+
+        async def fetch():
+            attempts.append(len(attempts))
+            try:
+                await asyncio.sleep(10 if len(attempts) == 1 else 0)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+            return f"attempt {len(attempts)}"
+
+        started = time.perf_counter()
+        result = await hedger.run(fetch)
+        await asyncio.sleep(0)
+        assert time.perf_counter() - started < 1
+        assert result == "attempt 2"
+        assert cancelled == [True]
+        assert (hedger.hedged, hedger.hedge_wins) == (1, 1)
+
+    asyncio.run(main())
+
+
+def test_caller_cancellation_cancels_every_attempt():
+    async def main():
+        hedger = RequestHedger("test", min_samples=1, min_delay=0.01)
+        hedger.observe(0.01)
+        cancelled = []
+
+        async def fetch():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        run = asyncio.create_task(hedger.run(fetch))
+        await asyncio.sleep(0.05)
+        run.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await run
+        await asyncio.sleep(0)
+        assert cancelled == [True, True]
+
+    asyncio.run(main())
+
+
+def test_cancellation_before_the_hedge_delay_cancels_the_attempt():
+    async def main():
+        hedger = RequestHedger("test", min_samples=1, min_delay=5)
+        hedger.observe(5)
+        cancelled = []
+
+        async def fetch():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        run = asyncio.create_task(hedger.run(fetch))
+        await asyncio.sleep(0.05)
+        run.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await run
+        await asyncio.sleep(0)
+        assert cancelled == [True]
+        assert hedger.hedged == 0
+
+    asyncio.run(main())
+
+
+def test_no_hedging_without_history():
+    hedger = RequestHedger("test", min_samples=5)
+    assert hedger.delay() is None
+    assert RequestHedger("test", min_samples=5, initial_delay=0.4, min_delay=0.1).delay() == 0.8
@@ -0,0 +1,39 @@
+"""Rule-based fast-path planning"""
+
+from intelligence.rule_planner import build_rule_plan
+from intelligence.validator import validate_execution_plan
+
+
+def test_drug_safety_query():
+    plan, confidence = build_rule_plan("What are the side effects of metformin?")
+    assert plan["intent"] == "DRUG_SAFETY"
+    assert plan["entities"]["drugs"] == ["metformin"]
+    assert plan["sources"] == ["FDA"]
+    assert confidence == 1.0
+    assert validate_execution_plan(plan)[0]
+
+
+def test_trial_query_routes_to_trials():
+    plan, confidence = build_rule_plan("Recruiting phase 3 trials for breast cancer")
+    assert plan["intent"] == "CLINICAL_TRIALS"
+    assert plan["entities"]["diseases"] == ["breast cancer"]
+    assert "ClinicalTrials" in plan["sources"]
+    assert confidence > 0.5
+
+
+def test_comparison_needs_two_entities():
+    plan, confidence = build_rule_plan("Compare metformin vs insulin for type 2 diabetes")
+    assert plan["intent"] == "COMPARATIVE_RESEARCH"
+    assert plan["entities"]["drugs"] == ["metformin", "insulin"]
+    assert confidence == 1.0
+
+
+def test_unrecognized_query_has_no_confidence():
+    _, confidence = build_rule_plan("hello there")
+    assert confidence == 0.0
+
+
+def test_drug_safety_without_a_drug_is_discounted():
+    _, with_drug = build_rule_plan("side effects of ibuprofen")
+    _, without_drug = build_rule_plan("side effects of the new pill")
+    assert without_drug < with_drug
@@ -0,0 +1,70 @@
+"""LLM scheduler priority queueing and admission control"""
+
+import asyncio
+import pytest
+from intelligence.scheduler import LLMScheduler, LLMQueueFullError, PRIORITY_PLAN, PRIORITY_ANSWER
+
+
+def test_waiters_run_by_priority_then_arrival():
+    async def main():
+        scheduler = LLMScheduler(max_concurrency=1, max_queue_depth=10)
+        order = []
+        release = asyncio.Event()
+
+        async def call(name, priority):
+            async with scheduler.slot(priority):
+                order.append(name)
+                if name == "first":
+                    await release.wait()
+
+        first = asyncio.create_task(call("first", PRIORITY_ANSWER))
+        await asyncio.sleep(0)
+        waiting = [
+            asyncio.create_task(call("answer-1", PRIORITY_ANSWER)),
+            asyncio.create_task(call("plan", PRIORITY_PLAN)),
+            asyncio.create_task(call("answer-2", PRIORITY_ANSWER)),
+        ]
+        await asyncio.sleep(0)
+        assert scheduler.queue_depth == 3
+        release.set()
+        await asyncio.gather(first, *waiting)
+        assert scheduler.active == 0
+        return order
+
+    assert asyncio.run(main()) == ["first", "plan", "answer-1", "answer-2"]
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    async def main():
+        scheduler = LLMScheduler(max_concurrency=1, max_queue_depth=1)
+        await scheduler.acquire()
+        waiter = asyncio.create_task(scheduler.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(LLMQueueFullError) as error:
+            scheduler.check_admission()
+        assert error.value.retry_after >= 1
+        with pytest.raises(LLMQueueFullError):
+            await scheduler.acquire()
+        assert scheduler.rejected == 2
+        scheduler.release()
+        await waiter
+        scheduler.release()
+        assert scheduler.active == 0
+
+    asyncio.run(main())
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    async def main():
+        scheduler = LLMScheduler(max_concurrency=1, max_queue_depth=5)
+        await scheduler.acquire()
+        waiter = asyncio.create_task(scheduler.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        scheduler.release()
+        assert scheduler.active == 0
+        assert scheduler.queue_depth == 0
+
+    asyncio.run(main())
@@ -0,0 +1,62 @@
+"""Source clients surface upstream failures, so breakers and fan-out see them"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import httpx
+import pytest
+import data.who_store
+from data.clients import cdc, medline, who
+from data.clients.http import run_sync
+from data.resilience import CircuitBreaker, guarded_call, OPEN
+from data.who_store import WHOIndicatorStore
+
+
+@pytest.fixture
+def failing_upstream():
+    """Local upstream answering every GET with a 500"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(500)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(params=["CDC", "MedlinePlus", "WHO"])
+def source_query(request, failing_upstream, monkeypatch):
+    """Zero-argument coroutine factory querying one source against the failing upstream"""
+    if request.param == "CDC":
+        monkeypatch.setattr(cdc, "CDC_URL", failing_upstream + "/resource/rows.json")
+        return lambda: cdc.query_cdc_async("influenza")
+    if request.param == "MedlinePlus":
+        monkeypatch.setattr(medline, "MEDLINEPLUS_URL", failing_upstream + "/ws/query")
+        return lambda: medline.query_medlineplus_async("influenza")
+    monkeypatch.setattr(who, "WHO_URL", failing_upstream + "/api/")
+    monkeypatch.setattr(data.who_store, "who_store", WHOIndicatorStore(directory=None))
+    return lambda: who.summarize_who_async("malaria")
+
+
+def test_upstream_errors_are_raised(source_query):
+    with pytest.raises(httpx.HTTPStatusError):
+        run_sync(source_query())
+
+
+def test_fast_failures_open_the_breaker(source_query):
+    breaker = CircuitBreaker("test", window_size=2, min_calls=2, failure_ratio=0.5, open_seconds=60)
+
+    async def call():
+        with pytest.raises(httpx.HTTPStatusError):
+            await guarded_call(breaker, source_query)
+
+    for _ in range(2):
+        run_sync(call())
+    assert breaker.state == OPEN
@@ -0,0 +1,64 @@
+"""WHO series summaries, with and without an on-disk indicator store"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import data.who_store
+from data.clients import who
+from data.clients.http import run_sync
+from data.who_store import WHOIndicatorStore
+
+ROWS = [
+    {"SpatialDimType": "GLOBAL", "SpatialDim": "GLOBAL", "TimeDim": 2020, "NumericValue": 8.0},
+    {"SpatialDimType": "GLOBAL", "SpatialDim": "GLOBAL", "TimeDim": 2021, "NumericValue": 9.0},
+] + [
+    {"SpatialDimType": "COUNTRY", "SpatialDim": code, "ParentLocationCode": region, "ParentLocation": region,
+     "TimeDim": year, "NumericValue": value + (year - 2020)}
+    for code, region, value in (("FRA", "EUR", 5.0), ("DEU", "EUR", 7.0), ("IND", "SEAR", 11.0))
+    for year in (2020, 2021)
+]
+
+
+@pytest.fixture
+def gho(monkeypatch):
+    """Local GHO API serving ROWS for every indicator; records the requested paths"""
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests.append(self.path)
+            payload = json.dumps({"value": ROWS}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(who, "WHO_URL", f"http://127.0.0.1:{server.server_address[1]}/api/")
+    yield requests
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize("on_disk", [False, True])
+def test_summary_is_built_from_the_full_series(gho, monkeypatch, tmp_path, on_disk):
+    store = WHOIndicatorStore(directory=str(tmp_path / "who") if on_disk else None)
+    monkeypatch.setattr(data.who_store, "who_store", store)
+
+    items = run_sync(who.summarize_who_async("diabetes"))
+    assert [item["kind"] for item in items] == ["overview", "regional", "ranking", "trend"]
+    overview = items[0]["stats"]
+    assert overview["countries"] == 3 and overview["country_median"] == 8.0 and overview["global_value"] == 9.0
+    assert items[2]["stats"]["top"][0]["country"] == "IND"
+    assert len(gho) == 1 and "top=" not in gho[0]
+
+    # The snapshot is reused instead of downloading the series again
+    assert len(run_sync(who.summarize_who_async("diabetes"))) == 4
+    assert len(gho) == 1
+    assert (tmp_path / "who" / "NCD_GLUC_04.json.gz").exists() == on_disk
@@ -0,0 +1,97 @@
+"""
+Load test for the /query endpoint.
+Compares sequential vs concurrent throughput and checks that /health
+stays responsive while queries are in flight.
+"""
+
+import sys
+import time
+import statistics
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+API_URL = "http://localhost:8000"
+
+QUERIES = [
+    "What is diabetes?",
+    "What are the side effects of metformin?",
+    "Any ongoing CAR-T trials for melanoma?",
+    "What causes headaches and how to treat them?",
+    "Global statistics on tuberculosis",
+    "Latest research on CRISPR gene therapy",
+]
+
+
+def run_query(query):
+    """Send one /query request and return its latency in seconds"""
+    start = time.perf_counter()
+    response = requests.post(f"{API_URL}/query", json={"query": query}, timeout=300)
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+
+def run_batch(total, concurrency):
+    """Run `total` queries with the given concurrency, return (wall time, latencies)"""
+    queries = [QUERIES[i % len(QUERIES)] for i in range(total)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(run_query, queries))
+    return time.perf_counter() - start, latencies
+
+
+def probe_health(stop, samples):
+    """Poll /health while the batch runs to show the event loop is not blocked"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            requests.get(f"{API_URL}/health", timeout=30)
+            samples.append(time.perf_counter() - start)
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.2)
+
+
+def report(label, wall, latencies):
+    throughput = len(latencies) / wall if wall else 0.0
+    print(f"{label}")
+    print(f"  Requests:   {len(latencies)}")
+    print(f"  Wall time:  {wall:.2f}s")
+    print(f"  Throughput: {throughput:.2f} req/s")
+    print(f"  Latency:    median {statistics.median(latencies):.2f}s, max {max(latencies):.2f}s")
+    return throughput
+
+
+if __name__ == "__main__":
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    total = int(sys.argv[2]) if len(sys.argv) > 2 else concurrency * 2
+
+    print("="*60)
+    print("🏥 CAREWISE /query LOAD TEST")
+    print("="*60)
+    print()
+
+    try:
+        wall, latencies = run_batch(total, 1)
+        sequential = report("🐢 Sequential (concurrency=1)", wall, latencies)
+        print()
+
+        stop = threading.Event()
+        health_samples = []
+        prober = threading.Thread(target=probe_health, args=(stop, health_samples), daemon=True)
+        prober.start()
+        wall, latencies = run_batch(total, concurrency)
+        stop.set()
+        prober.join()
+        concurrent = report(f"🚀 Concurrent (concurrency={concurrency})", wall, latencies)
+
+        if health_samples:
+            print(f"  /health during load: median {statistics.median(health_samples)*1000:.0f}ms, "
+                  f"max {max(health_samples)*1000:.0f}ms")
+
+        print()
+        print(f"📈 Speedup: {concurrent / sequential:.2f}x")
+
+    except requests.exceptions.ConnectionError:
+        print("❌ ERROR: Could not connect to backend API")
+        print("Make sure the backend is running on http://localhost:8000")